@@ -3,16 +3,114 @@
 
 """
 DeepSeek API封装模块
-提供与DeepSeek大模型交互的接口
+提供与DeepSeek大模型交互的同步和异步接口，可选持久化缓存相同请求的响应；
+所有请求共用一个限流器，失败时按指数退避重试；
+共享客户端在首次使用时才创建，不调用大模型的命令无需加载openai，也无需配置API密钥
 """
 
 import os
+import sys
+import time
+import types
+import asyncio
 import logging
-from openai import OpenAI
+import weakref
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from utils.llm_cache import llm_cache
+from utils.rate_limiter import RateLimiter
+from utils.text_utils import estimate_tokens
+from utils.usage_ledger import usage_ledger
+from utils.prompt_templates import build_prompt, SYSTEM_PROMPT, PROMPT_VERSION, RESEARCH_PROGRESS_INSTRUCTIONS
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 同时进行中的最大请求数，被限流时自动减小，请求成功后逐步恢复
+DEEPSEEK_MAX_CONCURRENCY = int(os.getenv('DEEPSEEK_MAX_CONCURRENCY', '4'))
+
+# 每分钟请求数和token数上限（输入和输出之和），0表示不限制
+DEEPSEEK_RPM = int(os.getenv('DEEPSEEK_RPM', '0'))
+DEEPSEEK_TPM = int(os.getenv('DEEPSEEK_TPM', '0'))
+
+# 单次调用（含重试）的最长时间（秒）和最大重试次数
+DEEPSEEK_TIMEOUT = float(os.getenv('DEEPSEEK_TIMEOUT', '600'))
+DEEPSEEK_MAX_RETRIES = int(os.getenv('DEEPSEEK_MAX_RETRIES', '5'))
+
+# 可以重试的HTTP状态码，其中429和503表示被限流
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+THROTTLE_STATUS_CODES = {429, 503}
+
+# 模型上下文长度（输入和输出token之和），超出时论文分析改为分块进行
+DEEPSEEK_CONTEXT_TOKENS = int(os.getenv('DEEPSEEK_CONTEXT_TOKENS', '65536'))
+
+# 所有客户端实例共用的限流器
+rate_limiter = RateLimiter(
+    requests_per_minute=DEEPSEEK_RPM,
+    tokens_per_minute=DEEPSEEK_TPM,
+    max_concurrency=DEEPSEEK_MAX_CONCURRENCY
+)
+
+
+def _infer_caller():
+    """
+    从调用栈推断调用方，跳过本模块和asyncio内部的帧
+    
+    Returns:
+        “模块.函数”形式的调用方名称
+    """
+    frame = sys._getframe(1)
+    while frame and (frame.f_code.co_filename == __file__ or f'{os.sep}asyncio{os.sep}' in frame.f_code.co_filename):
+        frame = frame.f_back
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}" if frame else None
+
+
+def _log_prompt_cache(usage):
+    """记录DeepSeek上下文硬盘缓存命中的输入token数（usage中的prompt_cache_hit_tokens）"""
+    hit_tokens = getattr(usage, 'prompt_cache_hit_tokens', None)
+    if hit_tokens is None or not usage.prompt_tokens:
+        return
+    logger.info(
+        f'提示词前缀缓存命中 {hit_tokens}/{usage.prompt_tokens} tokens（{hit_tokens / usage.prompt_tokens:.0%}）'
+    )
+
+
+def _estimated_usage(prompt, text):
+    """流式请求未返回用量时，按提示词和输出文本估算用量"""
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+    completion_tokens = estimate_tokens(text)
+    return types.SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )
+
+
+def _retry_after(error):
+    """
+    读取错误响应中的Retry-After（秒数或HTTP日期）
+    
+    Args:
+        error: API调用抛出的异常
+    
+    Returns:
+        需要等待的秒数，没有该响应头时返回None
+    """
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
 
 class DeepSeekAPI:
     """DeepSeek API封装类"""
@@ -25,13 +123,99 @@ class DeepSeekAPI:
         if not api_key:
             raise ValueError('DeepSeek API密钥未设置，请在.env文件中配置DEEPSEEK_API_KEY')
         
+        # openai导入较慢，只在创建客户端时导入
+        from openai import OpenAI
+        
+        # 重试由共用的限流器统一控制，关闭SDK自带的重试
         self.client = OpenAI(
             api_key=api_key,
-            base_url=api_base
+            base_url=api_base,
+            max_retries=0
         )
         self.model = "deepseek-chat"
+        self.api_key = api_key
+        self.api_base = api_base
+        # 异步客户端的连接池绑定在创建时的事件循环上，按事件循环分别创建
+        self._async_clients = weakref.WeakKeyDictionary()
+    
+    def _get_async_client(self):
+        """
+        获取当前事件循环对应的异步客户端
+        
+        Returns:
+            AsyncOpenAI客户端
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=self.api_key, base_url=self.api_base, max_retries=0)
+            self._async_clients[loop] = client
+        return client
+    
+    def _handle_failure(self, error, attempt, deadline, emitted):
+        """
+        请求失败后释放限流名额，并判断是否重试
+        
+        Args:
+            error: 请求抛出的异常
+            attempt: 已重试次数
+            deadline: 本次调用的截止时间（time.monotonic）
+            emitted: 流式模式下是否已经输出过内容，已输出时不再重试以免内容重复
+        
+        Returns:
+            重试前需要等待的秒数，不重试时返回None
+        """
+        status = getattr(error, 'status_code', None)
+        throttled = status in THROTTLE_STATUS_CODES
+        retry_after = _retry_after(error) if throttled else None
+        rate_limiter.release(throttled=throttled, retry_after=retry_after, success=False)
+        
+        from openai import APIConnectionError, APIStatusError
+        
+        retryable = isinstance(error, APIConnectionError) or (
+            isinstance(error, APIStatusError) and status in RETRYABLE_STATUS_CODES
+        )
+        if not retryable or emitted or attempt >= DEEPSEEK_MAX_RETRIES:
+            return None
+        delay = rate_limiter.backoff(attempt, retry_after)
+        if time.monotonic() + delay >= deadline:
+            return None
+        logger.warning(f'调用DeepSeek API失败（{str(error)}），{delay:.1f} 秒后第 {attempt + 1} 次重试')
+        return delay
+    
+    def _record_failure(self, model, caller, started, attempt, error):
+        """记录最终失败的调用"""
+        logger.error(f'调用DeepSeek API失败: {str(error)}')
+        usage_ledger.record(
+            model, caller, time.monotonic() - started, retries=attempt, error=f'{type(error).__name__}: {str(error)}'
+        )
+    
+    def _stream_options(self, stream):
+        """流式请求要求在最后一个数据块中返回用量（SDK版本较旧时通过extra_body传递）"""
+        return {'extra_body': {'stream_options': {'include_usage': True}}} if stream else {}
+    
+    def _lookup_cache(self, prompt, model, max_tokens, temperature, use_cache):
+        """
+        计算缓存键并查询缓存
         
-    def generate_text(self, prompt, model=None, max_tokens=2000, temperature=0.7):
+        Returns:
+            (缓存键, 缓存的响应文本)，未启用缓存时缓存键为None，未命中时响应文本为None
+        """
+        if not llm_cache.enabled:
+            return None, None
+        cache_key = llm_cache.make_key(model, f'{PROMPT_VERSION}:{SYSTEM_PROMPT}', prompt, temperature, max_tokens)
+        return cache_key, llm_cache.get(cache_key) if use_cache else None
+    
+    def _messages(self, prompt):
+        """构造请求消息列表"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def generate_text(self, prompt, model=None, max_tokens=2000, temperature=0.7, use_cache=True, stream=False, on_token=None,
+                      caller=None):
         """
         生成文本回复
         
@@ -40,26 +224,182 @@ class DeepSeekAPI:
             model: 模型名称，默认为deepseek-chat
             max_tokens: 最大生成 tokens 数
             temperature: 生成温度，控制随机性
+            use_cache: 是否使用响应缓存（需设置环境变量LLM_CACHE=1启用），False时强制调用API并刷新缓存
+            stream: 是否流式生成，逐段回调on_token，首段内容约1秒内即可输出
+            on_token: 流式模式下接收每段新生成文本的回调函数，命中缓存时以完整文本调用一次
+            caller: 记录到用量台账的调用方名称，默认从调用栈推断
         
         Returns:
             生成的文本字符串
         """
-        try:
-            response = self.client.chat.completions.create(
-                model=model or self.model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的学术论文助手，擅长分析和总结学术论文。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            logger.error(f'调用DeepSeek API失败: {str(e)}')
-            raise
+        model = model or self.model
+        caller = caller or _infer_caller()
+        started = time.monotonic()
+        cache_key, cached_text = self._lookup_cache(prompt, model, max_tokens, temperature, use_cache)
+        if cached_text is not None:
+            usage_ledger.record(model, caller, time.monotonic() - started, cache_hit=True)
+            if stream and on_token:
+                on_token(cached_text)
+            return cached_text
+        
+        estimated_tokens = estimate_tokens(SYSTEM_PROMPT + prompt) + max_tokens
+        deadline = time.monotonic() + DEEPSEEK_TIMEOUT
+        attempt = 0
+        while True:
+            try:
+                rate_limiter.acquire(estimated_tokens, deadline=deadline)
+            except TimeoutError as e:
+                self._record_failure(model, caller, started, attempt, e)
+                raise
+            parts = []
+            first_token_latency = None
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=self._messages(prompt),
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=stream,
+                    timeout=max(1.0, deadline - time.monotonic()),
+                    **self._stream_options(stream)
+                )
+                usage = finish_reason = None
+                if stream:
+                    for chunk in response:
+                        usage = getattr(chunk, 'usage', None) or usage
+                        if not chunk.choices:
+                            continue
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if first_token_latency is None:
+                                first_token_latency = time.monotonic() - started
+                            parts.append(delta)
+                            if on_token:
+                                on_token(delta)
+                    text = ''.join(parts).strip()
+                else:
+                    text = response.choices[0].message.content.strip()
+                    usage, finish_reason = response.usage, response.choices[0].finish_reason
+            except Exception as e:
+                delay = self._handle_failure(e, attempt, deadline, emitted=bool(parts))
+                if delay is None:
+                    self._record_failure(model, caller, started, attempt, e)
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            rate_limiter.release(unused_tokens=estimated_tokens - usage.total_tokens if usage else 0)
+            break
+        
+        _log_prompt_cache(usage)
+        usage_ledger.record(
+            model, caller, time.monotonic() - started, usage=usage or _estimated_usage(prompt, text),
+            finish_reason=finish_reason, first_token_latency=first_token_latency, retries=attempt,
+            usage_estimated=usage is None
+        )
+        if cache_key:
+            llm_cache.set(cache_key, text)
+        return text
     
-
+    async def generate_text_async(self, prompt, model=None, max_tokens=2000, temperature=0.7, use_cache=True, stream=False,
+                                  on_token=None, caller=None):
+        """
+        异步生成文本回复，与同步调用共用限流器，同时进行中的请求数不超过DEEPSEEK_MAX_CONCURRENCY
+        
+        Args:
+            prompt: 提示词
+            model: 模型名称，默认为deepseek-chat
+            max_tokens: 最大生成 tokens 数
+            temperature: 生成温度，控制随机性
+            use_cache: 是否使用响应缓存，含义与generate_text相同
+            stream: 是否流式生成，含义与generate_text相同
+            on_token: 流式模式下接收每段新生成文本的回调函数（普通函数）
+            caller: 记录到用量台账的调用方名称，默认从调用栈推断（并发任务中只能推断到启动事件循环的函数）
+        
+        Returns:
+            生成的文本字符串
+        """
+        model = model or self.model
+        caller = caller or _infer_caller()
+        started = time.monotonic()
+        # 缓存读写是本地SQLite操作，耗时远小于API请求，直接在事件循环中执行
+        cache_key, cached_text = self._lookup_cache(prompt, model, max_tokens, temperature, use_cache)
+        if cached_text is not None:
+            usage_ledger.record(model, caller, time.monotonic() - started, cache_hit=True)
+            if stream and on_token:
+                on_token(cached_text)
+            return cached_text
+        
+        client = self._get_async_client()
+        estimated_tokens = estimate_tokens(SYSTEM_PROMPT + prompt) + max_tokens
+        deadline = time.monotonic() + DEEPSEEK_TIMEOUT
+        attempt = 0
+        while True:
+            try:
+                await rate_limiter.acquire_async(estimated_tokens, deadline=deadline)
+            except TimeoutError as e:
+                self._record_failure(model, caller, started, attempt, e)
+                raise
+            parts = []
+            first_token_latency = None
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=self._messages(prompt),
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=stream,
+                    timeout=max(1.0, deadline - time.monotonic()),
+                    **self._stream_options(stream)
+                )
+                usage = finish_reason = None
+                if stream:
+                    async for chunk in response:
+                        usage = getattr(chunk, 'usage', None) or usage
+                        if not chunk.choices:
+                            continue
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if first_token_latency is None:
+                                first_token_latency = time.monotonic() - started
+                            parts.append(delta)
+                            if on_token:
+                                on_token(delta)
+                    text = ''.join(parts).strip()
+                else:
+                    text = response.choices[0].message.content.strip()
+                    usage, finish_reason = response.usage, response.choices[0].finish_reason
+            except asyncio.CancelledError:
+                rate_limiter.release(success=False)
+                raise
+            except Exception as e:
+                delay = self._handle_failure(e, attempt, deadline, emitted=bool(parts))
+                if delay is None:
+                    self._record_failure(model, caller, started, attempt, e)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            rate_limiter.release(unused_tokens=estimated_tokens - usage.total_tokens if usage else 0)
+            break
+        
+        _log_prompt_cache(usage)
+        usage_ledger.record(
+            model, caller, time.monotonic() - started, usage=usage or _estimated_usage(prompt, text),
+            finish_reason=finish_reason, first_token_latency=first_token_latency, retries=attempt,
+            usage_estimated=usage is None
+        )
+        if cache_key:
+            llm_cache.set(cache_key, text)
+        return text
+    
+    def _research_progress_prompt(self, paper_list):
+        """构造研究进展总结的提示词"""
+        papers_text = "\n".join([f"标题: {paper.get('title', '未知')}\n摘要: {paper.get('abstract', '未知')}\n作者: {paper.get('authors', '未知')}\n来源: {paper.get('source', '未知')}\n" for paper in paper_list])
+        
+        return build_prompt(RESEARCH_PROGRESS_INSTRUCTIONS, f"论文列表：\n{papers_text}")
     
     def summarize_research_progress(self, paper_list):
         """
@@ -71,23 +411,43 @@ class DeepSeekAPI:
         Returns:
             研究进展总结报告
         """
-        papers_text = "\n".join([f"标题: {paper.get('title', '未知')}\n摘要: {paper.get('abstract', '未知')}\n作者: {paper.get('authors', '未知')}\n来源: {paper.get('source', '未知')}\n" for paper in paper_list])
+        return self.generate_text(self._research_progress_prompt(paper_list), max_tokens=4000)
+    
+    async def summarize_research_progress_async(self, paper_list):
+        """
+        异步总结研究进展
         
-        prompt = f"""请根据以下最近发表的论文，生成一份研究领域最新进展报告：
+        Args:
+            paper_list: 论文列表，每个元素包含标题、摘要、作者等信息
+        
+        Returns:
+            研究进展总结报告
+        """
+        return await self.generate_text_async(self._research_progress_prompt(paper_list), max_tokens=4000)
 
-论文列表：
-{papers_text}
 
-报告要求：
-1. 概述：总结该领域的最新研究动态和趋势
-2. 主要研究方向：分类整理主要的研究方向和每个方向的进展
-3. 关键技术进展：分析最新的技术突破和创新点
-4. 未来研究展望：预测该领域未来的研究方向和可能的发展趋势
+# 共享客户端及其创建锁，首次使用时才创建
+_deepseek_client = None
+_deepseek_client_lock = threading.Lock()
 
-请以Markdown格式输出报告。"""
-        
-        return self.generate_text(prompt, max_tokens=4000)
+
+def get_deepseek_client():
+    """
+    获取共享的DeepSeek API客户端，首次调用时创建，多线程同时调用时只会创建一次
+    
+    Returns:
+        DeepSeekAPI实例
+    """
+    global _deepseek_client
+    if _deepseek_client is None:
+        with _deepseek_client_lock:
+            if _deepseek_client is None:
+                _deepseek_client = DeepSeekAPI()
+    return _deepseek_client
 
 
-# 创建全局实例，方便其他模块直接导入使用
-deepseek_client = DeepSeekAPI()
\ No newline at end of file
+def __getattr__(name):
+    """兼容原来的模块级实例deepseek_client，访问时才创建客户端"""
+    if name == 'deepseek_client':
+        return get_deepseek_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
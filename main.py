@@ -50,22 +50,45 @@ def main():
     analyze_parser = subparsers.add_parser('analyze', help='分析指定论文')
     analyze_parser.add_argument('--paper_path', type=str, required=True, help='论文文件路径')
     analyze_parser.add_argument('--output_path', type=str, help='输出Markdown文件路径')
+    analyze_parser.add_argument('--workers', type=int, default=1, help='PDF文本并行提取的进程数，默认为1（串行）')
+    analyze_parser.add_argument('--backend', type=str, choices=['pdfplumber', 'layout', 'pypdf2', 'pypdfium2'],
+                              help='PDF正文文本解析后端，默认为pdfplumber（可通过PDF_BACKEND环境变量修改）；标题、表格和图片始终使用pdfplumber')
+    analyze_parser.add_argument('--token_budget', type=int, help='论文内容的输入token预算（不含参考文献），默认不限制')
+    analyze_parser.add_argument('--stream', action='store_true', help='流式生成，报告边生成边写入文件')
+    analyze_parser.add_argument('--echo', action='store_true', help='流式生成并将报告实时输出到终端')
+    analyze_parser.add_argument('--refresh_cache', action='store_true', help='忽略已缓存的LLM响应，重新调用API并刷新缓存（LLM_CACHE=1时有效）')
     
     # 通过链接下载并分析论文命令
     analyze_url_parser = subparsers.add_parser('analyze_from_url_download', help='通过链接下载并分析论文')
     analyze_url_parser.add_argument('--url', type=str, required=True, help='论文URL链接')
     analyze_url_parser.add_argument('--output_dir', type=str, help='分析报告保存目录，默认为outputs')
     analyze_url_parser.add_argument('--overwrite', action='store_true', help='是否覆盖已存在的下载文件')
+    analyze_url_parser.add_argument('--workers', type=int, default=1, help='PDF文本并行提取的进程数，默认为1（串行）')
+    analyze_url_parser.add_argument('--backend', type=str, choices=['pdfplumber', 'layout', 'pypdf2', 'pypdfium2'],
+                              help='PDF正文文本解析后端，默认为pdfplumber（可通过PDF_BACKEND环境变量修改）；标题、表格和图片始终使用pdfplumber')
+    analyze_url_parser.add_argument('--refresh_cache', action='store_true', help='忽略已缓存的LLM响应，重新调用API并刷新缓存（LLM_CACHE=1时有效）')
     
     # 新增：直接从URL分析论文命令（无需下载）
     analyze_from_url_parser = subparsers.add_parser('analyze_from_url', help='直接从URL分析论文，无需下载PDF文件')
     analyze_from_url_parser.add_argument('--url', type=str, required=True, help='论文PDF的URL链接')
     analyze_from_url_parser.add_argument('--output_dir', type=str, help='分析报告保存目录，默认为outputs')
+    analyze_from_url_parser.add_argument('--backend', type=str, choices=['pdfplumber', 'layout', 'pypdf2', 'pypdfium2'],
+                              help='PDF正文文本解析后端，默认为pdfplumber（可通过PDF_BACKEND环境变量修改）；标题、表格和图片始终使用pdfplumber')
+    analyze_from_url_parser.add_argument('--token_budget', type=int, help='论文内容的输入token预算（不含参考文献），默认不限制')
+    analyze_from_url_parser.add_argument('--stream', action='store_true', help='流式生成，报告边生成边写入文件')
+    analyze_from_url_parser.add_argument('--echo', action='store_true', help='流式生成并将报告实时输出到终端')
+    analyze_from_url_parser.add_argument('--refresh_cache', action='store_true', help='忽略已缓存的LLM响应，重新调用API并刷新缓存（LLM_CACHE=1时有效）')
     
     # 批量分析论文命令
     batch_analyze_parser = subparsers.add_parser('batch_analyze', help='批量分析文件夹中的所有论文')
     batch_analyze_parser.add_argument('--folder_path', type=str, required=True, help='包含论文的文件夹路径')
     batch_analyze_parser.add_argument('--output_dir', type=str, help='报告保存根目录，默认为outputs')
+    batch_analyze_parser.add_argument('--workers', type=int, default=1, help='PDF文本并行提取的进程数，默认为1（串行）')
+    batch_analyze_parser.add_argument('--backend', type=str, choices=['pdfplumber', 'layout', 'pypdf2', 'pypdfium2'],
+                              help='PDF正文文本解析后端，默认为pdfplumber（可通过PDF_BACKEND环境变量修改）；标题、表格和图片始终使用pdfplumber')
+    batch_analyze_parser.add_argument('--token_budget', type=int, help='论文内容的输入token预算（不含参考文献），默认不限制')
+    batch_analyze_parser.add_argument('--concurrency', type=int, help='同时分析的论文数，默认为DEEPSEEK_MAX_CONCURRENCY（4）')
+    batch_analyze_parser.add_argument('--refresh_cache', action='store_true', help='忽略已缓存的LLM响应，重新调用API并刷新缓存（LLM_CACHE=1时有效）')
     
     # 搜索论文命令
     search_parser = subparsers.add_parser('search', help='搜索指定领域的论文')
@@ -73,6 +96,7 @@ def main():
     search_parser.add_argument('--source', type=str, choices=['google_scholar', 'arxiv', 'dblp', 'all'], 
                               default='all', help='搜索来源')
     search_parser.add_argument('--limit', type=int, default=10, help='返回结果数量')
+    search_parser.add_argument('--preview', action='store_true', help='只下载PDF首页，显示摘要预览')
     
     # 下载论文命令
     download_parser = subparsers.add_parser('download', help='下载指定论文')
@@ -86,6 +110,7 @@ def main():
     report_parser.add_argument('--topic', type=str, required=True, help='关注的主题')
     report_parser.add_argument('--frequency', type=str, choices=['daily', 'weekly', 'monthly'], 
                               default='weekly', help='报告频率')
+    report_parser.add_argument('--refresh_cache', action='store_true', help='忽略已缓存的LLM响应，重新调用API并刷新缓存（LLM_CACHE=1时有效）')
     
     # Notion导入命令
     notion_parser = subparsers.add_parser('notion_import', help='将论文分析报告导入到Notion')
@@ -95,6 +120,23 @@ def main():
     notion_parser.add_argument('--no_proxy', action='store_true', help='禁用代理（解决代理连接问题）')
     notion_parser.add_argument('--as_page', action='store_true', help='创建独立页面而不是数据库条目')
     
+    # 提取缓存管理命令
+    cache_parser = subparsers.add_parser('cache', help='查看或清空PDF提取缓存和LLM响应缓存')
+    cache_parser.add_argument('--clear', action='store_true', help='清空缓存')
+    cache_parser.add_argument('--llm', action='store_true', help='操作LLM响应缓存而不是PDF提取缓存')
+    
+    # LLM用量汇总命令
+    usage_parser = subparsers.add_parser('usage', help='汇总LLM调用的token用量和耗时')
+    usage_parser.add_argument('--days', type=int, help='只统计最近多少天，默认统计全部')
+    usage_parser.add_argument('--by', type=str, nargs='+', choices=['command', 'day', 'paper', 'caller', 'prompt_version'],
+                              default=['command', 'day', 'paper'], help='汇总维度，默认为command day paper')
+    
+    # PDF解析后端对比命令
+    benchmark_parser = subparsers.add_parser('benchmark_backends', help='对比各PDF解析后端的速度和文本一致性')
+    benchmark_parser.add_argument('--folder_path', type=str, default='input', help='包含PDF的文件夹路径，默认为input')
+    benchmark_parser.add_argument('--backends', type=str, nargs='+', help='要对比的后端，默认为所有已安装的后端')
+    benchmark_parser.add_argument('--max_pages', type=int, help='每个文件最多处理的页数')
+    
     # 解析命令行参数
     args = parser.parse_args()
     
@@ -102,15 +144,26 @@ def main():
         parser.print_help()
         sys.exit(1)
     
+    # 用量台账按命令汇总
+    from utils.usage_ledger import set_usage_context
+    set_usage_context(command=args.command)
+    
     try:
         if args.command == 'analyze':
             from paper_analyzer import analyze_paper
-            analyze_paper(args.paper_path, args.output_path)
+            analyze_paper(
+                args.paper_path, args.output_path, workers=args.workers, backend=args.backend,
+                token_budget=args.token_budget, stream=args.stream, echo=args.echo,
+                use_cache=not args.refresh_cache
+            )
         # 直接从URL分析论文（无需下载）
         elif args.command == 'analyze_from_url':
             from paper_analyzer import analyze_paper_from_url
             print(f'正在直接从URL分析论文: {args.url}')
-            result_path = analyze_paper_from_url(args.url, args.output_dir)
+            result_path = analyze_paper_from_url(
+                args.url, args.output_dir, backend=args.backend, token_budget=args.token_budget,
+                stream=args.stream, echo=args.echo, use_cache=not args.refresh_cache
+            )
             print(f'论文分析完成，报告已保存至: {result_path}')
         # 从URL下载后分析论文
         elif args.command == 'analyze_from_url_download':
@@ -129,7 +182,10 @@ def main():
                 print(f'论文下载成功: {pdf_path}')
                 print('开始分析论文...')
                 # 分析下载的论文
-                result_path = analyze_paper(pdf_path, args.output_dir)
+                result_path = analyze_paper(
+                    pdf_path, args.output_dir, workers=args.workers, backend=args.backend,
+                    use_cache=not args.refresh_cache
+                )
                 print(f'论文分析完成，报告已保存至: {result_path}')
             else:
                 print('论文下载失败，无法进行分析')
@@ -137,7 +193,10 @@ def main():
         elif args.command == 'batch_analyze':
             from paper_analyzer import batch_analyze_papers
             print(f'开始批量分析文件夹: {args.folder_path}')
-            result = batch_analyze_papers(args.folder_path, args.output_dir)
+            result = batch_analyze_papers(
+                args.folder_path, args.output_dir, workers=args.workers, backend=args.backend,
+                token_budget=args.token_budget, concurrency=args.concurrency, use_cache=not args.refresh_cache
+            )
             print(f'批量分析完成！总共 {result["total"]} 个文件，成功 {result["successful"]} 个，失败 {result["failed"]} 个')
             if result["failed"] > 0:
                 print('以下文件分析失败:')
@@ -155,6 +214,10 @@ def main():
                 print(f"{i}. {paper.get('title', 'Untitled')}")
                 print(f"   Authors: {paper.get('authors', 'Unknown')}")
                 print(f"   Link: {paper.get('link', 'No link')}")
+                if args.preview:
+                    preview = paper_searcher.preview_paper(paper)
+                    if preview:
+                        print(f"   Preview: {preview}")
                 print()
         elif args.command == 'download':
             from paper_downloader import PaperDownloader
@@ -185,7 +248,8 @@ def main():
                     job_id=job_id,
                     research_topic=args.topic,
                     max_papers=10,
-                    time_window_days=7
+                    time_window_days=7,
+                    use_cache=not args.refresh_cache
                 )
             elif args.frequency == 'weekly':
                 report_scheduler.add_weekly_report_job(
@@ -193,14 +257,16 @@ def main():
                     research_topic=args.topic,
                     max_papers=20,
                     time_window_days=7,
-                    day_of_week='monday'
+                    day_of_week='monday',
+                    use_cache=not args.refresh_cache
                 )
             elif args.frequency == 'monthly':
                 report_scheduler.add_monthly_report_job(
                     job_id=job_id,
                     research_topic=args.topic,
                     max_papers=30,
-                    time_window_days=30
+                    time_window_days=30,
+                    use_cache=not args.refresh_cache
                 )
             
             print(f"已启动{args.frequency}报告服务，主题: {args.topic}")
@@ -232,6 +298,68 @@ def main():
             except Exception as e:
                 logger.error(f"执行命令时出错: {str(e)}")
                 sys.exit(1)
+        elif args.command == 'cache' and args.llm:
+            from utils.llm_cache import llm_cache
+            if args.clear:
+                removed = llm_cache.clear()
+                print(f'已清空LLM响应缓存，删除 {removed} 个条目')
+            else:
+                stats = llm_cache.stats()
+                print(f"缓存数据库: {stats['db_path']}")
+                print(f"条目数: {stats['entries']}")
+                print(f"占用空间: {stats['size_mb']:.2f}MB / {stats['max_size_mb']:.2f}MB")
+                print(f"有效期: {stats['ttl_hours']:g}小时")
+                print(f"状态: {'启用' if stats['enabled'] else '禁用（设置LLM_CACHE=1启用）'}")
+        elif args.command == 'cache':
+            from utils.extraction_cache import extraction_cache
+            if args.clear:
+                removed = extraction_cache.clear()
+                print(f'已清空提取缓存，删除 {removed} 个条目')
+            else:
+                stats = extraction_cache.stats()
+                print(f"缓存目录: {stats['cache_dir']}")
+                print(f"条目数: {stats['entries']}")
+                print(f"占用空间: {stats['size_mb']:.2f}MB / {stats['max_size_mb']:.2f}MB")
+                print(f"状态: {'启用' if stats['enabled'] else '禁用'}")
+        elif args.command == 'usage':
+            from utils.usage_ledger import usage_ledger
+            from utils.markdown_utils import format_table
+            print(f'用量台账: {usage_ledger.path}')
+            titles = {'command': '命令', 'day': '日期', 'paper': '论文', 'caller': '调用方', 'prompt_version': '提示词版本'}
+            for group_by in args.by:
+                summary = usage_ledger.summarize(group_by, days=args.days)
+                if not summary:
+                    print('暂无用量记录')
+                    break
+                rows = [
+                    [
+                        item['key'], item['calls'], item['cache_hits'], item['errors'],
+                        item['prompt_tokens'], item['cached_tokens'],
+                        f"{item['cached_tokens'] / item['prompt_tokens']:.0%}" if item['prompt_tokens'] else '-',
+                        item['completion_tokens'], item['total_tokens'],
+                        f"{item['latency_p50']:.1f}", f"{item['latency_p90']:.1f}", f"{item['latency_p99']:.1f}"
+                    ]
+                    for item in summary
+                ]
+                print(f'\n按{titles[group_by]}汇总:')
+                print(format_table(
+                    [titles[group_by], '调用', '缓存命中', '失败', '输入token', '其中缓存token', '缓存命中率', '输出token', '总token',
+                     'P50(秒)', 'P90(秒)', 'P99(秒)'],
+                    rows
+                ))
+        elif args.command == 'benchmark_backends':
+            from utils.pdf_backends import benchmark_backends
+            from utils.markdown_utils import format_table
+            results = benchmark_backends(args.folder_path, backends=args.backends, max_pages=args.max_pages)
+            rows = [
+                [
+                    item['backend'], item['files'], item['pages'], f"{item['seconds']:.2f}",
+                    f"{item['pages_per_second']:.2f}",
+                    f"{item['agreement']:.2%}" if item['agreement'] is not None else '-'
+                ]
+                for item in results
+            ]
+            print(format_table(['后端', '文件数', '页数', '耗时(秒)', '页/秒', '字符一致性'], rows))
     except Exception as e:
         logger.error(f'执行命令时出错: {str(e)}')
         sys.exit(1)
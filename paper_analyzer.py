@@ -7,88 +7,237 @@
 1. 读取论文文件（PDF格式）
 2. 提取论文文本内容
 3. 调用DeepSeek API进行论文分析
-4. 将参考文献整理成表格
-5. 输出Markdown格式的分析报告，不要包含任何其他文字或解释
+4. 提交前规范化论文文本（删除页眉页脚、水印，合并断词），减少输入token
+5. 在本地解析参考文献并整理成表格
+6. 将PDF中的表格以CSV格式提交，并从正文中删除重复的表格文本
+7. 输出Markdown格式的分析报告，不要包含任何其他文字或解释
+8. 批量分析时多篇论文的API请求并发进行
+9. 超出模型上下文的长论文按章节分块并发提取要点，再汇总生成报告
+10. 可选流式生成，报告边生成边写入文件，并可同时输出到终端
 """
 
 import os
+import asyncio
 import logging
 import re
 from datetime import datetime
 
-from utils.pdf_utils import extract_text_from_pdf, extract_text_from_pdf_url  # 导入新函数
-from utils.markdown_utils import save_markdown_report
-from deepseek_api import deepseek_client
+from utils.pdf_utils import extract_text_from_pdf_url, open_document, close_document  # 导入新函数
+from utils.markdown_utils import save_markdown_report, StreamingMarkdownWriter
+from utils.text_utils import normalize_paper_text
+from utils.reference_parser import split_references, parse_references, format_references_table
+from utils.table_utils import format_tables_csv, remove_table_text
+from utils.section_parser import split_into_chunks
+from utils.text_utils import estimate_tokens
+from utils.usage_ledger import usage_scope
+from utils.prompt_templates import (
+    build_prompt, PAPER_ANALYSIS_INSTRUCTIONS, PAPER_ANALYSIS_REFERENCES_REQUIREMENT, PAPER_ANALYSIS_OUTPUT,
+    CHUNK_NOTES_INSTRUCTIONS
+)
+from deepseek_api import get_deepseek_client, DEEPSEEK_MAX_CONCURRENCY, DEEPSEEK_CONTEXT_TOKENS
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
-def analyze_paper(pdf_path, output_dir=None):
+# 分析报告的最大输出token数
+ANALYSIS_MAX_TOKENS = 6000
+
+# 分块模式下每块要点的最大输出token数
+CHUNK_NOTES_MAX_TOKENS = 2000
+
+# token数为估算值，只使用模型上下文的该比例，留出估算误差的余量
+CONTEXT_SAFETY_RATIO = 0.9
+
+def analyze_paper(pdf_path, output_dir=None, workers=None, backend=None, token_budget=None, stream=False, echo=False,
+                  use_cache=True):
     """
     分析论文并生成报告
     
     Args:
         pdf_path: 论文PDF文件路径
         output_dir: 报告保存目录，默认为outputs/论文标题
+        workers: PDF文本并行提取的进程数，None表示串行提取
+        backend: PDF文本解析后端名称，None表示使用默认后端
+        token_budget: 论文内容的输入token预算，None表示不限制；超出时优先保留摘要、方法、实验和结论
+        stream: 是否流式生成，报告边生成边写入文件，中途失败时保留已生成的部分
+        echo: 是否同时将生成的报告输出到终端（隐含stream）
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
     
     Returns:
         保存的报告文件路径
     """
     try:
-        # 检查文件是否存在
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f'论文文件不存在: {pdf_path}')
-        
-        # 提取论文文本内容
-        logger.info(f'开始提取论文内容: {pdf_path}')
-        paper_content = extract_text_from_pdf(pdf_path)
-        
-        # 提取论文标题
-        paper_title = extract_paper_title(paper_content)
-        logger.info(f'提取到论文标题: {paper_title}')
-        
-        # 清理标题中的特殊字符，无论是否提供了output_dir都需要定义clean_title
-        clean_title = re.sub(r'[\\/:*?"<>|]', '_', paper_title)[:50]
-        
-        # 确定输出目录
-        if not output_dir:
-            output_dir = os.path.join('outputs', clean_title)
-        else:
-            # 如果提供了output_dir，仍然创建以论文标题命名的子目录
-            output_dir = os.path.join(output_dir, clean_title)
+        paper_content, tables, output_dir, clean_title = _prepare_paper(
+            pdf_path, output_dir, workers=workers, backend=backend, token_budget=token_budget
+        )
         
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 调用DeepSeek API分析论文
+        # 调用DeepSeek API分析论文，用量台账按论文记录
         logger.info('调用DeepSeek API分析论文内容')
-        analysis_result = analyze_paper_content(paper_content)
+        with usage_scope(paper=clean_title):
+            if stream or echo:
+                return _stream_report(paper_content, tables, output_dir, clean_title, echo=echo, use_cache=use_cache)
+            analysis_result = analyze_paper_content(paper_content, tables=tables, use_cache=use_cache)
         
-        # 构建完整报告
-        full_report = analysis_result
+        return _save_report(analysis_result, output_dir, clean_title)
         
-        # 生成输出文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = os.path.join(output_dir, f'{clean_title}_{timestamp}_分析报告.md')
+    except Exception as e:
+        logger.error(f'分析论文时出错: {str(e)}')
+        raise
+    finally:
+        close_document(pdf_path)
+
+
+async def analyze_paper_async(pdf_path, output_dir=None, workers=None, backend=None, token_budget=None, extraction_lock=None,
+                              use_cache=True):
+    """
+    异步分析论文并生成报告，PDF提取在线程中执行，API请求不阻塞事件循环
+    
+    Args:
+        pdf_path: 论文PDF文件路径
+        output_dir: 报告保存目录，默认为outputs/论文标题
+        workers: PDF文本并行提取的进程数，None表示串行提取
+        backend: PDF文本解析后端名称，None表示使用默认后端
+        token_budget: 论文内容的输入token预算，None表示不限制
+        extraction_lock: 多篇论文共用的asyncio.Lock，提供时PDF提取逐篇进行
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+    
+    Returns:
+        保存的报告文件路径
+    """
+    def extract():
+        try:
+            return _prepare_paper(pdf_path, output_dir, workers=workers, backend=backend, token_budget=token_budget)
+        finally:
+            # 表格和文本都已提取，API请求期间不再占用文档会话
+            close_document(pdf_path)
+    
+    try:
+        if extraction_lock:
+            async with extraction_lock:
+                paper_content, tables, output_dir, clean_title = await asyncio.to_thread(extract)
+        else:
+            paper_content, tables, output_dir, clean_title = await asyncio.to_thread(extract)
         
-        # 保存报告
-        save_path = save_markdown_report(full_report, output_file)
+        logger.info(f'调用DeepSeek API分析论文内容: {clean_title}')
+        with usage_scope(paper=clean_title):
+            analysis_result = await analyze_paper_content_async(paper_content, tables=tables, use_cache=use_cache)
         
-        logger.info(f'论文分析完成，报告已保存至: {save_path}')
-        return save_path
+        return _save_report(analysis_result, output_dir, clean_title)
         
     except Exception as e:
         logger.error(f'分析论文时出错: {str(e)}')
         raise
 
 
-def batch_analyze_papers(folder_path, output_dir=None):
+def _prepare_paper(pdf_path, output_dir=None, workers=None, backend=None, token_budget=None):
+    """
+    提取论文文本、标题和表格，并创建报告目录
+    
+    Args:
+        pdf_path: 论文PDF文件路径
+        output_dir: 报告保存目录，默认为outputs/论文标题
+        workers: PDF文本并行提取的进程数，None表示串行提取
+        backend: PDF文本解析后端名称，None表示使用默认后端
+        token_budget: 论文内容的输入token预算，None表示不限制
+    
+    Returns:
+        (论文文本, 表格列表, 报告目录, 清理后的标题)
+    """
+    # 检查文件是否存在
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f'论文文件不存在: {pdf_path}')
+    
+    # 提取论文文本内容，复用下载阶段已打开的文档会话
+    logger.info(f'开始提取论文内容: {pdf_path}')
+    document = open_document(pdf_path, backend=backend)
+    paper_content = document.get_text(workers=workers, token_budget=token_budget)
+    
+    # 提取论文标题：优先根据第一页字号判断，失败时再从文本前几行猜测
+    paper_title = document.title or extract_paper_title(paper_content)
+    logger.info(f'提取到论文标题: {paper_title}')
+    
+    # 清理标题中的特殊字符，无论是否提供了output_dir都需要定义clean_title
+    clean_title = re.sub(r'[\\/:*?"<>|]', '_', paper_title)[:50]
+    
+    # 确定输出目录
+    if not output_dir:
+        output_dir = os.path.join('outputs', clean_title)
+    else:
+        # 如果提供了output_dir，仍然创建以论文标题命名的子目录
+        output_dir = os.path.join(output_dir, clean_title)
+    
+    # 确保输出目录存在
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # 提取表格，以CSV格式提交给大模型
+    tables = document.get_tables()
+    
+    return paper_content, tables, output_dir, clean_title
+
+
+def _report_path(output_dir, clean_title):
+    """生成带时间戳的报告文件路径"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(output_dir, f'{clean_title}_{timestamp}_分析报告.md')
+
+
+def _save_report(analysis_result, output_dir, clean_title):
+    """
+    保存分析报告
+    
+    Args:
+        analysis_result: 分析报告Markdown文本
+        output_dir: 报告保存目录
+        clean_title: 清理后的论文标题
+    
+    Returns:
+        保存的报告文件路径
+    """
+    save_path = save_markdown_report(analysis_result, _report_path(output_dir, clean_title))
+    
+    logger.info(f'论文分析完成，报告已保存至: {save_path}')
+    return save_path
+
+
+def _stream_report(paper_content, tables, output_dir, clean_title, echo=False, use_cache=True):
+    """
+    流式生成并保存分析报告，生成的内容逐段写入临时文件，完成后替换为清理后的最终报告
+    
+    Args:
+        paper_content: 论文文本内容
+        tables: 从PDF中提取的表格列表
+        output_dir: 报告保存目录
+        clean_title: 清理后的论文标题
+        echo: 是否同时输出到终端
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+    
+    Returns:
+        保存的报告文件路径
+    """
+    with StreamingMarkdownWriter(_report_path(output_dir, clean_title), echo=echo) as writer:
+        analysis_result = analyze_paper_content(paper_content, tables=tables, on_token=writer.write, use_cache=use_cache)
+        save_path = writer.commit(analysis_result)
+    
+    logger.info(f'论文分析完成，报告已保存至: {save_path}')
+    return save_path
+
+
+def batch_analyze_papers(folder_path, output_dir=None, workers=None, backend=None, token_budget=None, concurrency=None,
+                         use_cache=True):
     """
     批量分析文件夹中的所有PDF论文
     
+    PDF提取逐篇进行（CPU密集，且共享文档会话不是线程安全的），
+    一篇论文提取完成后即发起API请求，与后续论文的提取和其他请求重叠进行
+    
     Args:
         folder_path: 包含论文的文件夹路径
         output_dir: 报告保存根目录，默认为outputs
+        workers: 每篇论文PDF文本并行提取的进程数，None表示串行提取
+        backend: PDF文本解析后端名称，None表示使用默认后端
+        token_budget: 每篇论文内容的输入token预算，None表示不限制
+        concurrency: 同时处理的论文数，默认为DEEPSEEK_MAX_CONCURRENCY
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
     
     Returns:
         分析结果列表，包含每个论文的分析状态和保存路径
@@ -120,17 +269,16 @@ def batch_analyze_papers(folder_path, output_dir=None):
     total_papers = len(pdf_files)
     logger.info(f'找到 {total_papers} 个PDF文件待分析')
     
-    # 逐个分析论文
-    for i, pdf_path in enumerate(pdf_files, 1):
-        try:
-            logger.info(f'正在分析第 {i}/{total_papers} 个文件: {os.path.basename(pdf_path)}')
-            # 对每个论文使用独立的子目录
-            analyze_paper(pdf_path, output_dir=output_dir)
+    # 并发分析论文
+    results = asyncio.run(_analyze_papers_concurrently(
+        pdf_files, output_dir, workers=workers, backend=backend, token_budget=token_budget, concurrency=concurrency,
+        use_cache=use_cache
+    ))
+    for pdf_path, error in results:
+        if error is None:
             successful_papers += 1
-        except Exception as e:
-            error_msg = f'分析文件 {os.path.basename(pdf_path)} 时出错: {str(e)}'
-            logger.error(error_msg)
-            failed_papers.append((pdf_path, str(e)))
+        else:
+            failed_papers.append((pdf_path, error))
     
     # 输出统计结果
     logger.info(f'批量分析完成！成功: {successful_papers} 个，失败: {len(failed_papers)} 个')
@@ -149,37 +297,211 @@ def batch_analyze_papers(folder_path, output_dir=None):
     }
 
 
-def analyze_paper_content(paper_content):
+async def _analyze_papers_concurrently(pdf_files, output_dir, workers=None, backend=None, token_budget=None, concurrency=None,
+                                       use_cache=True):
     """
-    分析论文内容
+    并发分析多篇论文
+    
+    Args:
+        pdf_files: PDF文件路径列表
+        output_dir: 报告保存根目录
+        workers: 每篇论文PDF文本并行提取的进程数
+        backend: PDF文本解析后端名称
+        token_budget: 每篇论文内容的输入token预算
+        concurrency: 同时处理的论文数，默认为DEEPSEEK_MAX_CONCURRENCY
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+    
+    Returns:
+        (PDF文件路径, 错误信息)列表，成功时错误信息为None
+    """
+    total_papers = len(pdf_files)
+    # 限制同时处理的论文数，避免提取完成但等待API的论文文本全部堆积在内存中
+    paper_semaphore = asyncio.Semaphore(max(1, concurrency or DEEPSEEK_MAX_CONCURRENCY))
+    extraction_lock = asyncio.Lock()
+    
+    async def analyze_one(i, pdf_path):
+        async with paper_semaphore:
+            try:
+                logger.info(f'正在分析第 {i}/{total_papers} 个文件: {os.path.basename(pdf_path)}')
+                # 对每个论文使用独立的子目录
+                await analyze_paper_async(
+                    pdf_path, output_dir=output_dir, workers=workers, backend=backend,
+                    token_budget=token_budget, extraction_lock=extraction_lock, use_cache=use_cache
+                )
+                return pdf_path, None
+            except Exception as e:
+                error_msg = f'分析文件 {os.path.basename(pdf_path)} 时出错: {str(e)}'
+                logger.error(error_msg)
+                return pdf_path, str(e)
+    
+    return await asyncio.gather(*(analyze_one(i, pdf_path) for i, pdf_path in enumerate(pdf_files, 1)))
+
+
+def _prepare_analysis_input(paper_content, normalize=True, tables=None):
+    """
+    整理提交给大模型的论文内容：表格转为CSV、规范化文本、在本地解析参考文献
     
     Args:
         paper_content: 论文文本内容
-        
+        normalize: 是否在提交前删除页眉页脚、水印等冗余文本以减少输入token
+        tables: 从PDF中提取的表格列表，清理后以CSV格式提交，正文中重复的表格文本会被删除
+    
     Returns:
-        论文分析结果
+        (论文文本, 提示词中的表格部分, 本地解析的参考文献列表)
     """
+    # 表格以紧凑的CSV提交，模型无需从错乱的正文中还原单元格
+    tables_block = ''
+    if tables:
+        tables_block, cleaned_tables = format_tables_csv(tables, paper_content)
+        paper_content, removed_lines = remove_table_text(paper_content, cleaned_tables)
+        if cleaned_tables:
+            logger.info(f'{len(cleaned_tables)} 个表格以CSV格式提交，正文中删除 {removed_lines} 行表格文本')
+    
+    if normalize:
+        paper_content, stats = normalize_paper_text(paper_content)
+        saved_tokens = stats['tokens_before'] - stats['tokens_after']
+        logger.info(
+            f"文本规范化完成，预估输入token: {stats['tokens_before']} -> {stats['tokens_after']}，"
+            f"节省 {saved_tokens} ({saved_tokens / max(stats['tokens_before'], 1):.1%})，"
+            f"删除页眉页脚 {stats['header_footer_lines']} 行"
+        )
+    
+    # 参考文献在本地解析成表格，不再让大模型逐条改写，大幅减少输出token
+    body, references_text = split_references(paper_content)
+    references = parse_references(references_text)
+    if references:
+        paper_content = body
+        logger.info(f'本地解析到 {len(references)} 条参考文献，参考文献部分不再提交给大模型')
+    else:
+        # 本地无法识别时（如双栏交错的文本）仍交给大模型整理
+        logger.info('未能在本地解析参考文献，交由大模型整理')
+    
+    tables_section = f'论文表格（从PDF中提取，CSV格式）：\n{tables_block}' if tables_block else ''
+    return paper_content, tables_section, references
 
-    prompt = f"""请分析以下论文内容，并按照要求生成详细分析报告：
 
-论文内容：
-{paper_content}
+def _build_analysis_prompt(paper_content, tables_section, references, from_notes=False, references_text=''):
+    """
+    构造论文分析提示词
+    
+    Args:
+        paper_content: 论文文本，分块模式下为各块提取的要点
+        tables_section: 提示词中的表格部分
+        references: 本地解析的参考文献列表，为空时要求大模型整理参考文献
+        from_notes: paper_content是否为分块提取的要点
+        references_text: 分块模式下单独提交的参考文献原文，要点中不包含参考文献条目
+    
+    Returns:
+        提示词
+    """
+    # 分块模式下要点不含参考文献，只有提交了参考文献原文时才要求整理，避免模型编造条目
+    request_references = not references and (not from_notes or references_text)
+    
+    # 固定指令在前，论文内容和表格在后，使不同论文的请求共享相同的前缀
+    instructions = PAPER_ANALYSIS_INSTRUCTIONS
+    if request_references:
+        instructions += PAPER_ANALYSIS_REFERENCES_REQUIREMENT
+    instructions += PAPER_ANALYSIS_OUTPUT
+    if from_notes:
+        content_section = f"论文要点（由论文全文按章节分块提取，按原文顺序排列）：\n{paper_content}"
+    else:
+        content_section = f"论文内容：\n{paper_content}"
+    references_section = f"论文参考文献（原文）：\n{references_text}" if from_notes and request_references else ''
+    return build_prompt(instructions, content_section, tables_section, references_section)
 
-分析要求：
-1. 论文摘要：简明扼要地总结论文的主要内容和贡献
-2. 研究背景：介绍论文研究的背景和动机
-3. 研究方法：详细描述论文采用的研究方法和技术路线，给出具体的实现步骤和公式
-4. 实验设计：描述实验的设置、样本选择、数据采集和处理方法
-5. 实验结果：详细分析论文的实验结果，特别是表格中的数据，解释数据含义和趋势，将对应的表格也加入到分析报告中
-6. 核心结论：总结论文的主要发现和结论
-7. 创新点：分析论文的创新之处
-8. 局限性：指出论文的局限性和可能的改进方向
-9. 参考文献格式：请将论文中提到的所有参考文献整理成表格形式，包含作者、标题、发表年份、发表的会议/期刊，来源链接等信息
 
-请以Markdown格式输出分析报告，不要包含任何其他文字或解释。"""
+def _build_chunk_prompt(chunk_text, index, total, sections):
+    """
+    构造分块要点提取的提示词
+    
+    Args:
+        chunk_text: 文本块内容
+        index: 文本块序号，从1开始
+        total: 文本块总数
+        sections: 文本块包含的章节名称列表
     
-    result = deepseek_client.generate_text(prompt, max_tokens=6000)
+    Returns:
+        提示词
+    """
+    return build_prompt(
+        CHUNK_NOTES_INSTRUCTIONS,
+        f"以下是论文的第{index}/{total}部分（章节：{'、'.join(sections)}）：\n{chunk_text}"
+    )
+
+
+def _plan_chunks(paper_content, tables_section, references, chunked=None):
+    """
+    判断是否需要分块分析，需要时按章节边界切分论文文本
     
+    Args:
+        paper_content: 整理后的论文文本
+        tables_section: 提示词中的表格部分
+        references: 本地解析的参考文献列表
+        chunked: True强制分块，False不分块，None在超出模型上下文时自动分块
+    
+    Returns:
+        (文本块列表（见split_into_chunks）, 参考文献原文)，不分块时返回(None, '')；
+        本地未能解析参考文献时，参考文献原文从分块内容中拆出，单独提交给汇总步骤
+    """
+    if chunked is False:
+        return None, ''
+    
+    input_limit = int(DEEPSEEK_CONTEXT_TOKENS * CONTEXT_SAFETY_RATIO)
+    prompt_tokens = estimate_tokens(_build_analysis_prompt(paper_content, tables_section, references))
+    if chunked is None:
+        if prompt_tokens + ANALYSIS_MAX_TOKENS <= input_limit:
+            return None, ''
+        logger.info(
+            f'预估输入 {prompt_tokens} tokens，加上输出超出模型上下文 {DEEPSEEK_CONTEXT_TOKENS} tokens，改为分块分析'
+        )
+    
+    # 要点提取不保留参考文献条目，参考文献原文不参与分块
+    references_text = ''
+    if not references:
+        paper_content, references_text = split_references(paper_content)
+    
+    # 每块的提示词和要点输出都要放进模型上下文
+    chunk_tokens = input_limit - CHUNK_NOTES_MAX_TOKENS - estimate_tokens(_build_chunk_prompt('', 1, 1, []))
+    return split_into_chunks(paper_content, chunk_tokens), references_text
+
+
+async def _extract_chunk_notes(chunks, use_cache=True):
+    """
+    并发提取各文本块的要点
+    
+    Args:
+        chunks: 文本块列表
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+    
+    Returns:
+        汇总用的要点文本，各块要点按原文顺序排列
+    """
+    total = len(chunks)
+    notes = await asyncio.gather(*(
+        get_deepseek_client().generate_text_async(
+            _build_chunk_prompt(chunk['text'], i, total, chunk['sections']), max_tokens=CHUNK_NOTES_MAX_TOKENS,
+            use_cache=use_cache, caller='paper_analyzer.chunk_notes'
+        )
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    logger.info(f'{total} 个文本块的要点提取完成，开始汇总生成分析报告')
+    return '\n\n'.join(
+        f"### 第{i}部分（{'、'.join(chunk['sections'])}）\n{note}"
+        for i, (chunk, note) in enumerate(zip(chunks, notes), 1)
+    )
+
+
+def _finish_analysis(result, references):
+    """
+    清理模型输出的Markdown代码块标记，并追加本地生成的参考文献表格
+    
+    Args:
+        result: 模型输出的分析报告
+        references: 本地解析的参考文献列表
+    
+    Returns:
+        论文分析结果
+    """
     # 删除开头的```markdown标记
     if result.startswith('```markdown'):
         result = result[len('```markdown'):].lstrip()
@@ -188,9 +510,74 @@ def analyze_paper_content(paper_content):
     if result.endswith('```'):
         result = result[:-len('```')].rstrip()
     
+    if references:
+        result += f'\n\n## 9. 参考文献\n\n{format_references_table(references)}\n'
+    
     return result
 
 
+def analyze_paper_content(paper_content, normalize=True, tables=None, chunked=None, on_token=None, use_cache=True):
+    """
+    分析论文内容
+    
+    超出模型上下文的论文按章节分块，各块并发提取要点后再汇总生成报告
+    
+    Args:
+        paper_content: 论文文本内容
+        normalize: 是否在提交前删除页眉页脚、水印等冗余文本以减少输入token
+        tables: 从PDF中提取的表格列表，清理后以CSV格式提交，正文中重复的表格文本会被删除
+        chunked: True强制分块分析，False不分块，None在超出模型上下文时自动分块
+        on_token: 提供时流式生成报告，以每段新生成的文本调用该函数
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+    Returns:
+        论文分析结果
+    """
+    paper_content, tables_section, references = _prepare_analysis_input(paper_content, normalize=normalize, tables=tables)
+    chunks, references_text = _plan_chunks(paper_content, tables_section, references, chunked)
+    if chunks:
+        notes = asyncio.run(_extract_chunk_notes(chunks, use_cache=use_cache))
+        prompt = _build_analysis_prompt(
+            notes, tables_section, references, from_notes=True, references_text=references_text
+        )
+    else:
+        prompt = _build_analysis_prompt(paper_content, tables_section, references)
+    result = get_deepseek_client().generate_text(
+        prompt, max_tokens=ANALYSIS_MAX_TOKENS, stream=on_token is not None, on_token=on_token,
+        use_cache=use_cache, caller='paper_analyzer.analyze_paper_content'
+    )
+    return _finish_analysis(result, references)
+
+
+async def analyze_paper_content_async(paper_content, normalize=True, tables=None, chunked=None, use_cache=True):
+    """
+    异步分析论文内容，参数和返回值与analyze_paper_content相同
+    
+    Args:
+        paper_content: 论文文本内容
+        normalize: 是否在提交前删除页眉页脚、水印等冗余文本以减少输入token
+        tables: 从PDF中提取的表格列表
+        chunked: True强制分块分析，False不分块，None在超出模型上下文时自动分块
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+    Returns:
+        论文分析结果
+    """
+    paper_content, tables_section, references = _prepare_analysis_input(paper_content, normalize=normalize, tables=tables)
+    chunks, references_text = _plan_chunks(paper_content, tables_section, references, chunked)
+    if chunks:
+        notes = await _extract_chunk_notes(chunks, use_cache=use_cache)
+        prompt = _build_analysis_prompt(
+            notes, tables_section, references, from_notes=True, references_text=references_text
+        )
+    else:
+        prompt = _build_analysis_prompt(paper_content, tables_section, references)
+    result = await get_deepseek_client().generate_text_async(
+        prompt, max_tokens=ANALYSIS_MAX_TOKENS, use_cache=use_cache, caller='paper_analyzer.analyze_paper_content'
+    )
+    return _finish_analysis(result, references)
+
+
 def extract_paper_title(paper_content):
     """
     从论文内容中提取标题
@@ -227,13 +614,18 @@ def extract_paper_title(paper_content):
 
 
 # 添加新函数：从URL直接分析论文
-def analyze_paper_from_url(pdf_url, output_dir=None):
+def analyze_paper_from_url(pdf_url, output_dir=None, backend=None, token_budget=None, stream=False, echo=False, use_cache=True):
     """
     从URL直接分析论文并生成报告，无需下载PDF文件
     
     Args:
         pdf_url: 论文PDF的URL链接
         output_dir: 报告保存目录，默认为outputs/论文标题
+        backend: PDF文本解析后端名称，None表示使用默认后端
+        token_budget: 论文内容的输入token预算，None表示不限制
+        stream: 是否流式生成，报告边生成边写入文件
+        echo: 是否同时将生成的报告输出到终端（隐含stream）
+        use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
     
     Returns:
         保存的报告文件路径
@@ -241,11 +633,13 @@ def analyze_paper_from_url(pdf_url, output_dir=None):
     try:
         logger.info(f'开始分析论文URL: {pdf_url}')
         
-        # 直接从URL提取论文文本内容
-        paper_content = extract_text_from_pdf_url(pdf_url)
+        # 直接从URL提取论文文本内容和标题
+        paper_content, paper_title, tables = extract_text_from_pdf_url(
+            pdf_url, backend=backend, return_title=True, return_tables=True, token_budget=token_budget
+        )
         
-        # 提取论文标题
-        paper_title = extract_paper_title(paper_content)
+        # 提取论文标题：字号判断失败时再从文本前几行猜测
+        paper_title = paper_title or extract_paper_title(paper_content)
         logger.info(f'提取到论文标题: {paper_title}')
         
         # 清理标题中的特殊字符
@@ -261,22 +655,14 @@ def analyze_paper_from_url(pdf_url, output_dir=None):
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 调用DeepSeek API分析论文
+        # 调用DeepSeek API分析论文，用量台账按论文记录
         logger.info('调用DeepSeek API分析论文内容')
-        analysis_result = analyze_paper_content(paper_content)
-        
-        # 构建完整报告
-        full_report = analysis_result
-        
-        # 生成输出文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = os.path.join(output_dir, f'{clean_title}_{timestamp}_分析报告.md')
-        
-        # 保存报告
-        save_path = save_markdown_report(full_report, output_file)
+        with usage_scope(paper=clean_title):
+            if stream or echo:
+                return _stream_report(paper_content, tables, output_dir, clean_title, echo=echo, use_cache=use_cache)
+            analysis_result = analyze_paper_content(paper_content, tables=tables, use_cache=use_cache)
         
-        logger.info(f'论文分析完成，报告已保存至: {save_path}')
-        return save_path
+        return _save_report(analysis_result, output_dir, clean_title)
         
     except Exception as e:
         logger.error(f'分析论文URL时出错: {str(e)}')
@@ -17,7 +17,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from utils.pdf_utils import extract_paper_title  # 添加导入
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -166,6 +165,8 @@ class PaperDownloader:
         """
         尝试从PDF文件中提取标题并重命名文件
         
+        文档会话会被共享，后续分析同一文件时无需再次解析
+        
         Args:
             file_path: PDF文件路径
             
@@ -173,8 +174,10 @@ class PaperDownloader:
             str: 重命名后的文件路径，如果重命名失败则返回原路径
         """
         try:
-            # 提取论文标题
-            title = extract_paper_title(file_path)
+            # 提取论文标题，按需导入PDF解析模块，不重命名时无需加载
+            from utils.pdf_utils import open_document
+            document = open_document(file_path)
+            title = document.title
             
             if title:
                 # 生成新文件名
@@ -195,8 +198,8 @@ class PaperDownloader:
                         new_path = os.path.join(dir_path, new_filename)
                         counter += 1
                     
-                    # 执行重命名
-                    os.rename(file_path, new_path)
+                    # 执行重命名，文档会话随文件一起迁移
+                    document.move(new_path)
                     logger.info(f"文件已重命名为: {new_filename}")
                     return new_path
                 else:
@@ -10,6 +10,7 @@
 import os
 import re
 import time
+import asyncio
 import logging
 import requests
 from bs4 import BeautifulSoup
@@ -22,7 +23,9 @@ from selenium.common.exceptions import TimeoutException, WebDriverException
 # 修改导入语句
 from utils.web_utils import setup_webdriver, download_file, fetch_url_content
 # 导入大模型API模块
-from deepseek_api import DeepSeekAPI
+from deepseek_api import get_deepseek_client
+from utils.prompt_templates import build_prompt, SEARCH_ANALYSIS_INSTRUCTIONS
+from utils.section_parser import build_section_index, get_section_text
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -52,8 +55,6 @@ class PaperSearcher:
         # 初始化大模型客户端
         self.api_key = api_key
         self.api_base = api_base
-        self.deepseek_client = None
-        self._init_deepseek_client()
         
     def __del__(self):
         """析构函数，关闭WebDriver"""
@@ -69,17 +70,17 @@ class PaperSearcher:
         if not self.driver:
             self.driver = setup_webdriver()  # 从get_webdriver改为setup_webdriver
     
-    def _init_deepseek_client(self):
-        """初始化DeepSeek API客户端"""
+    @property
+    def deepseek_client(self):
+        """共享的DeepSeek API客户端，首次访问时创建，未设置API密钥或创建失败时为None"""
+        if not (self.api_key or os.getenv('DEEPSEEK_API_KEY')):
+            logger.warning("未设置DeepSeek API密钥，无法使用大模型功能")
+            return None
         try:
-            # 如果提供了API密钥，则使用提供的密钥，否则从环境变量获取
-            if self.api_key or os.getenv('DEEPSEEK_API_KEY'):
-                self.deepseek_client = DeepSeekAPI()
-                logger.info("DeepSeek API客户端初始化成功")
-            else:
-                logger.warning("未设置DeepSeek API密钥，无法使用大模型功能")
+            return get_deepseek_client()
         except Exception as e:
             logger.error(f"DeepSeek API客户端初始化失败: {str(e)}")
+            return None
     
     def search_semantic_scholar(self, query, max_results=20, sort_by="citations"):
         """
@@ -378,13 +379,95 @@ class PaperSearcher:
             logger.error(f"获取论文详细信息失败: {str(e)}")
             return paper_info
     
-    def analyze_search_results(self, papers, analysis_type="summary"):
+    def _get_pdf_link(self, paper_info):
+        """
+        推断论文的PDF直链
+        
+        Args:
+            paper_info: 论文基本信息
+        
+        Returns:
+            str: PDF链接，无法推断时返回None
+        """
+        link = paper_info.get("pdf_link") or paper_info.get("link", "")
+        if link.lower().endswith(".pdf"):
+            return link
+        
+        # arXiv摘要页链接转换为PDF链接
+        arxiv_match = re.search(r'arxiv\.org/abs/([\w.\-/]+?)(?:v\d+)?/?$', link)
+        if arxiv_match:
+            return f"{self.arxiv_url}/pdf/{arxiv_match.group(1)}"
+        
+        return None
+    
+    def preview_paper(self, paper_info, max_pages=1, max_chars=1500):
+        """
+        通过HTTP Range请求只获取PDF前几页，生成摘要预览
+        
+        Args:
+            paper_info: 论文基本信息
+            max_pages: 读取的页数
+            max_chars: 预览文本的最大长度
+        
+        Returns:
+            str: 摘要预览文本，无法获取时返回None
+        """
+        try:
+            pdf_link = self._get_pdf_link(paper_info)
+            if not pdf_link:
+                logger.warning(f"无法确定PDF链接，跳过预览: {paper_info.get('title', 'Unknown')}")
+                return None
+            
+            # 按需导入PDF解析模块（pdfplumber、pdfminer、PIL），不做预览的搜索无需加载
+            from utils.pdf_utils import extract_text_from_pdf_url
+            text = extract_text_from_pdf_url(pdf_link, max_pages=max_pages, partial=True)
+            if not text:
+                return None
+            
+            # 优先使用章节索引中的摘要，双栏混排导致摘要标题未单独成行时再用正则截取Abstract到Introduction之间的内容
+            abstract = get_section_text(text, build_section_index([(1, text)]), 'abstract')
+            abstract = re.sub(r'^(?:Abstract|ABSTRACT|摘\s*要)[\s.:：—-]*', '', abstract)
+            if not abstract:
+                abstract_match = re.search(
+                    r'(?:Abstract|ABSTRACT|摘\s*要)[\s.:：—-]*(.*?)(?:\n\s*(?:\d+\.?|I\.)?\s*(?:Introduction|INTRODUCTION)|\n\s*(?:Keywords|Index Terms|关键词)|$)',
+                    text, re.DOTALL
+                )
+                abstract = abstract_match.group(1) if abstract_match else ''
+            preview = abstract if abstract.strip() else text
+            preview = re.sub(r'\s+', ' ', preview).strip()
+            return preview[:max_chars]
+            
+        except Exception as e:
+            logger.error(f"生成论文预览失败: {str(e)}")
+            return None
+    
+    def _build_analysis_prompt(self, papers, analysis_type):
+        """
+        构造搜索结果分析的提示词
+        
+        Args:
+            papers: 论文列表
+            analysis_type: 分析类型，支持'summary'(总结)、'topics'(主题分析)、'trends'(趋势分析)
+        
+        Returns:
+            str: 提示词，不支持的分析类型返回None
+        """
+        # 准备论文信息文本
+        papers_text = "\n".join([f"标题: {paper.get('title', '未知')}\n摘要: {paper.get('abstract', '未知')}\n作者: {paper.get('authors', paper.get('authors_year', '未知'))}\n来源: {paper.get('source', '未知')}\n" for paper in papers[:10]])  # 限制分析论文数量
+        
+        # 固定指令在前，论文列表在后
+        if analysis_type not in SEARCH_ANALYSIS_INSTRUCTIONS:
+            return None
+        return build_prompt(SEARCH_ANALYSIS_INSTRUCTIONS[analysis_type], f"论文列表：\n{papers_text}")
+    
+    def analyze_search_results(self, papers, analysis_type="summary", use_cache=True):
         """
         使用大模型分析搜索结果
         
         Args:
             papers: 论文列表
             analysis_type: 分析类型，支持'summary'(总结)、'topics'(主题分析)、'trends'(趋势分析)
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 分析结果文本
@@ -395,55 +478,13 @@ class PaperSearcher:
                 logger.error("DeepSeek API客户端未初始化，无法分析搜索结果")
                 return "错误：DeepSeek API客户端未初始化，无法分析搜索结果"
             
-            # 准备论文信息文本
-            papers_text = "\n".join([f"标题: {paper.get('title', '未知')}\n摘要: {paper.get('abstract', '未知')}\n作者: {paper.get('authors', paper.get('authors_year', '未知'))}\n来源: {paper.get('source', '未知')}\n" for paper in papers[:10]])  # 限制分析论文数量
-            
-            # 根据分析类型构建不同的提示词
-            if analysis_type == "summary":
-                prompt = f"""请分析以下学术论文搜索结果，生成一份综合总结：
-
-论文列表：
-{papers_text}
-
-总结要求：
-1. 概述：简要总结搜索结果的整体内容和主题分布
-2. 主要研究方向：归纳出主要的研究方向和每个方向的核心观点
-3. 热点话题：指出搜索结果中出现的热点话题和研究趋势
-4. 推荐阅读：基于引用量、相关性或创新性，推荐2-3篇值得深入阅读的论文
-
-请以Markdown格式输出总结报告。"""
-            elif analysis_type == "topics":
-                prompt = f"""请分析以下学术论文搜索结果，进行主题分析：
-
-论文列表：
-{papers_text}
-
-分析要求：
-1. 识别主要研究主题：从搜索结果中识别出3-5个主要研究主题
-2. 主题描述：对每个主题进行简要描述，说明其核心内容
-3. 主题分布：分析每个主题在搜索结果中的分布情况
-4. 主题间关系：简要分析不同主题之间的关联和区别
-
-请以Markdown格式输出主题分析报告。"""
-            elif analysis_type == "trends":
-                prompt = f"""请分析以下学术论文搜索结果，进行研究趋势分析：
-
-论文列表：
-{papers_text}
-
-分析要求：
-1. 时间分布：分析论文的发表时间分布，识别研究活跃度变化
-2. 研究重点演变：分析研究重点的变化和发展趋势
-3. 新兴方向：识别可能的新兴研究方向和增长点
-4. 未来展望：基于当前趋势，对未来研究方向进行简要展望
-
-请以Markdown格式输出趋势分析报告。"""
-            else:
+            prompt = self._build_analysis_prompt(papers, analysis_type)
+            if prompt is None:
                 logger.warning(f"不支持的分析类型: {analysis_type}")
                 return f"错误：不支持的分析类型 '{analysis_type}'"
             
             logger.info(f"使用大模型进行搜索结果分析，类型: {analysis_type}")
-            result = self.deepseek_client.generate_text(prompt, max_tokens=3000)
+            result = self.deepseek_client.generate_text(prompt, max_tokens=3000, use_cache=use_cache)
             
             return result
             
@@ -451,12 +492,61 @@ class PaperSearcher:
             logger.error(f"分析搜索结果时出错: {str(e)}")
             return f"分析失败: {str(e)}"
     
-    def refine_search_query(self, initial_query):
+    async def analyze_search_results_async(self, papers, analysis_type="summary", use_cache=True):
+        """
+        异步使用大模型分析搜索结果，可与其他请求并发进行
+        
+        Args:
+            papers: 论文列表
+            analysis_type: 分析类型，支持'summary'(总结)、'topics'(主题分析)、'trends'(趋势分析)
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+        Returns:
+            str: 分析结果文本
+        """
+        try:
+            if not self.deepseek_client:
+                logger.error("DeepSeek API客户端未初始化，无法分析搜索结果")
+                return "错误：DeepSeek API客户端未初始化，无法分析搜索结果"
+            
+            prompt = self._build_analysis_prompt(papers, analysis_type)
+            if prompt is None:
+                logger.warning(f"不支持的分析类型: {analysis_type}")
+                return f"错误：不支持的分析类型 '{analysis_type}'"
+            
+            logger.info(f"使用大模型进行搜索结果分析，类型: {analysis_type}")
+            return await self.deepseek_client.generate_text_async(
+                prompt, max_tokens=3000, use_cache=use_cache, caller='paper_searcher.analyze_search_results'
+            )
+            
+        except Exception as e:
+            logger.error(f"分析搜索结果时出错: {str(e)}")
+            return f"分析失败: {str(e)}"
+    
+    def analyze_search_results_all(self, papers, analysis_types=("summary", "topics", "trends"), use_cache=True):
+        """
+        并发执行多种搜索结果分析
+        
+        Args:
+            papers: 论文列表
+            analysis_types: 分析类型列表
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+        Returns:
+            dict: 分析类型到分析结果文本的映射
+        """
+        async def run_all():
+            return await asyncio.gather(*(self.analyze_search_results_async(papers, t, use_cache=use_cache) for t in analysis_types))
+        
+        return dict(zip(analysis_types, asyncio.run(run_all())))
+    
+    def refine_search_query(self, initial_query, use_cache=True):
         """
         使用大模型优化搜索查询
         
         Args:
             initial_query: 初始搜索查询
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 优化后的搜索查询
@@ -484,7 +574,7 @@ class PaperSearcher:
 """
             
             logger.info(f"使用大模型优化搜索查询")
-            result = self.deepseek_client.generate_text(prompt, max_tokens=200)
+            result = self.deepseek_client.generate_text(prompt, max_tokens=200, use_cache=use_cache)
             
             return result.strip() if result else initial_query
             
@@ -2,10 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 定时报告调度模块
-用于定时检索指定领域最新论文并生成进展报告
+用于定时检索指定领域最新论文并生成进展报告，多个主题的报告可并发生成
 """
 import os
 import time
+import asyncio
 import logging
 import smtplib
 import json
@@ -20,10 +21,11 @@ import dotenv
 
 # 导入项目模块
 dotenv.load_dotenv()
-from deepseek_api import deepseek_api
+from deepseek_api import get_deepseek_client
 from paper_searcher import paper_searcher
 from paper_downloader import paper_downloader
-from utils.markdown_utils import save_markdown_report, format_table, generate_report_title
+from utils.markdown_utils import save_markdown_report, format_table
+from utils.prompt_templates import build_prompt, SCHEDULED_REPORT_INSTRUCTIONS
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -67,7 +69,7 @@ class ReportScheduler:
             self.scheduler.shutdown()
             logger.info("调度器已关闭")
     
-    def create_research_report(self, research_topic, max_papers=10, time_window_days=7):
+    def create_research_report(self, research_topic, max_papers=10, time_window_days=7, use_cache=True):
         """
         创建研究进展报告
         
@@ -75,6 +77,81 @@ class ReportScheduler:
             research_topic: 研究主题
             max_papers: 最多包含的论文数量
             time_window_days: 时间窗口（天）
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+        Returns:
+            dict: 报告信息
+        """
+        return asyncio.run(self.create_research_report_async(
+            research_topic, max_papers, time_window_days, use_cache=use_cache
+        ))
+    
+    def create_research_reports(self, research_topics, max_papers=10, time_window_days=7, use_cache=True):
+        """
+        并发创建多个主题的研究进展报告
+        
+        Args:
+            research_topics: 研究主题列表
+            max_papers: 每个报告最多包含的论文数量
+            time_window_days: 时间窗口（天）
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
+        
+        Returns:
+            list: 报告信息列表，与主题一一对应，失败的主题为None
+        """
+        async def create_all():
+            # 检索共用同一个浏览器驱动，多个主题的检索逐个进行，总结请求并发进行
+            search_lock = asyncio.Lock()
+            return await asyncio.gather(*(
+                self.create_research_report_async(
+                    topic, max_papers, time_window_days, search_lock=search_lock, use_cache=use_cache
+                )
+                for topic in research_topics
+            ))
+        
+        return asyncio.run(create_all())
+    
+    def _search_recent_papers(self, research_topic, max_papers):
+        """
+        搜索论文并获取详细信息
+        
+        Args:
+            research_topic: 研究主题
+            max_papers: 最多返回的论文数量
+        
+        Returns:
+            list: 论文详细信息列表
+        """
+        # 构建搜索查询
+        search_query = research_topic
+        # 可以根据需要添加时间范围限制到查询中
+        
+        # 搜索最新论文
+        papers = paper_searcher.search_papers(
+            query=search_query,
+            platforms=["arxiv", "google_scholar", "dblp"],
+            max_results=max_papers,
+            sort_by="relevance"
+        )
+        
+        # 为每篇论文获取详细信息
+        detailed_papers = []
+        for paper in papers or []:
+            detailed = paper_searcher.get_paper_details(paper)
+            detailed_papers.append(detailed)
+        return detailed_papers
+    
+    async def create_research_report_async(self, research_topic, max_papers=10, time_window_days=7, search_lock=None,
+                                           use_cache=True):
+        """
+        异步创建研究进展报告，论文检索在线程中执行，总结请求与其他报告的请求并发进行
+        
+        Args:
+            research_topic: 研究主题
+            max_papers: 最多包含的论文数量
+            time_window_days: 时间窗口（天）
+            search_lock: 多个报告共用的asyncio.Lock，提供时论文检索逐个进行
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             dict: 报告信息
@@ -86,28 +163,16 @@ class ReportScheduler:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=time_window_days)
             
-            # 构建搜索查询
-            search_query = research_topic
-            # 可以根据需要添加时间范围限制到查询中
-            
-            # 搜索最新论文
-            papers = paper_searcher.search_papers(
-                query=search_query,
-                platforms=["arxiv", "google_scholar", "dblp"],
-                max_results=max_papers,
-                sort_by="relevance"
-            )
+            if search_lock:
+                async with search_lock:
+                    detailed_papers = await asyncio.to_thread(self._search_recent_papers, research_topic, max_papers)
+            else:
+                detailed_papers = await asyncio.to_thread(self._search_recent_papers, research_topic, max_papers)
             
-            if not papers:
+            if not detailed_papers:
                 logger.warning(f"未找到关于 '{research_topic}' 的论文")
                 return None
             
-            # 为每篇论文获取详细信息
-            detailed_papers = []
-            for paper in papers:
-                detailed = paper_searcher.get_paper_details(paper)
-                detailed_papers.append(detailed)
-            
             # 准备发送给DeepSeek API的摘要信息
             papers_summary = []
             for i, paper in enumerate(detailed_papers[:5], 1):  # 只取前5篇用于生成总结
@@ -122,38 +187,42 @@ class ReportScheduler:
             
             # 调用DeepSeek API生成研究进展总结
             prompt = self._generate_summary_prompt(research_topic, papers_summary, start_date, end_date)
-            summary = deepseek_api.generate_research_summary(prompt)
+            try:
+                summary = await get_deepseek_client().generate_text_async(
+                    prompt, max_tokens=4000, use_cache=use_cache, caller='report_scheduler.create_research_report'
+                )
+            except Exception as e:
+                logger.error(f"生成研究进展总结失败: {str(e)}")
+                summary = None
             
             if not summary:
                 logger.warning("无法生成研究进展总结")
                 # 使用默认总结
-                summary = f"在过去{time_window_days}天内，关于'{research_topic}'主题有{len(papers)}篇新论文发表。\n"\
+                summary = f"在过去{time_window_days}天内，关于'{research_topic}'主题有{len(detailed_papers)}篇新论文发表。\n"\
                           f"由于API限制，无法生成详细总结。请查看下方论文列表了解更多信息。"
             
             # 生成报告标题
-            title = generate_report_title(research_topic, start_date, end_date)
+            title = f"研究进展报告：{research_topic}（{start_date.strftime('%Y-%m-%d')}至{end_date.strftime('%Y-%m-%d')}）"
             
             # 准备论文列表表格数据
-            table_data = []
+            table_rows = []
             for paper in detailed_papers:
                 # 提取论文信息
-                title = paper.get("title", "Unknown Title")
+                paper_title = paper.get("title", "Unknown Title")
                 authors = paper.get("authors", paper.get("authors_year", "Unknown Authors"))
+                if isinstance(authors, list):
+                    authors = ", ".join(authors)
                 source = paper.get("source", "Unknown Source")
                 link = paper.get("link", "")
                 citations = paper.get("citations", 0)
                 
                 # 构建表格行
-                table_data.append({
-                    "标题": title,
-                    "作者": authors,
-                    "来源": source,
-                    "引用量": citations,
-                    "链接": link
-                })
+                table_rows.append([
+                    str(value).replace("|", "\\|") for value in (paper_title, authors, source, citations, link)
+                ])
             
             # 生成Markdown表格
-            paper_table = format_table(table_data)
+            paper_table = format_table(["标题", "作者", "来源", "引用量", "链接"], table_rows)
             
             # 构建完整报告内容
             report_content = f"# {title}\n\n"\
@@ -201,22 +270,19 @@ class ReportScheduler:
         Returns:
             str: 完整的提示文本
         """
-        prompt = f"你是一名专业的研究助手。请基于以下论文信息，为'{topic}'领域创建一份{start_date.strftime('%Y-%m-%d')}至{end_date.strftime('%Y-%m-%d')}期间的研究进展报告。\n\n"
-        prompt += "请按照以下结构撰写报告：\n"
-        prompt += "1. 总体趋势概述：总结该领域的最新研究动向和热点\n"
-        prompt += "2. 重要founded发现：列出几项最具创新性或影响力的研究成果\n"
-        prompt += "3. 技术进展：分析相关技术的最新发展\n"
-        prompt += "4. 未来研究方向：基于现有研究，提出可能的未来研究方向\n\n"
-        prompt += "请确保报告内容专业、客观，并基于提供的论文信息。\n\n"
-        prompt += "论文信息如下：\n"
-        
+        # 固定指令在前，主题、日期和论文信息在后
+        papers_text = ""
         for i, paper in enumerate(papers, 1):
-            prompt += f"\n{i}. 标题：{paper['title']}\n"
-            prompt += f"   作者：{paper['authors']}\n"
-            prompt += f"   摘要：{paper['abstract'][:300]}...\n"  # 限制摘要长度
-            prompt += f"   来源：{paper['source']}\n"  
-        
-        return prompt
+            papers_text += f"\n{i}. 标题：{paper['title']}\n"
+            papers_text += f"   作者：{paper['authors']}\n"
+            papers_text += f"   摘要：{paper['abstract'][:300]}...\n"  # 限制摘要长度
+            papers_text += f"   来源：{paper['source']}\n"
+        
+        return build_prompt(
+            SCHEDULED_REPORT_INSTRUCTIONS,
+            f"研究主题：{topic}\n时间范围：{start_date.strftime('%Y-%m-%d')}至{end_date.strftime('%Y-%m-%d')}",
+            f"论文信息如下：\n{papers_text}"
+        )
     
     def send_email_report(self, report_info, recipients=None):
         """
@@ -261,9 +327,10 @@ class ReportScheduler:
             
             # 添加报告附件
             if 'path' in report_info and os.path.exists(report_info['path']):
+                filename = os.path.basename(report_info['path'])
                 with open(report_info['path'], 'rb') as file:
-                    attachment = MIMEApplication(file.read(), Name=os.path.basename(report_info['path']))
-                    attachment['Content-Disposition'] = f'attachment; filename="{os.path.basename(report_info['path'])}"'  
+                    attachment = MIMEApplication(file.read(), Name=filename)
+                    attachment['Content-Disposition'] = f'attachment; filename="{filename}"'
                     msg.attach(attachment)
             
             # 发送邮件
@@ -279,7 +346,7 @@ class ReportScheduler:
             logger.error(f"发送邮件失败: {str(e)}")
             return False
     
-    def add_daily_report_job(self, job_id, research_topic, max_papers=10, time_window_days=7, hour=9, minute=0, recipients=None):
+    def add_daily_report_job(self, job_id, research_topic, max_papers=10, time_window_days=7, hour=9, minute=0, recipients=None, use_cache=True):
         """
         添加每日报告任务
         
@@ -291,6 +358,7 @@ class ReportScheduler:
             hour: 执行小时
             minute: 执行分钟
             recipients: 收件人列表
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 任务ID
@@ -298,7 +366,7 @@ class ReportScheduler:
         # 定义任务函数
         def daily_report_task():
             logger.info(f"执行每日报告任务: {job_id} - {research_topic}")
-            report = self.create_research_report(research_topic, max_papers, time_window_days)
+            report = self.create_research_report(research_topic, max_papers, time_window_days, use_cache=use_cache)
             if report:
                 self.send_email_report(report, recipients)
         
@@ -318,7 +386,7 @@ class ReportScheduler:
         logger.info(f"已添加每日报告任务 '{job_id}'，将在每天 {hour:02d}:{minute:02d} 执行")
         return job_id
     
-    def add_weekly_report_job(self, job_id, research_topic, max_papers=20, time_window_days=7, day_of_week='monday', hour=9, minute=0, recipients=None):
+    def add_weekly_report_job(self, job_id, research_topic, max_papers=20, time_window_days=7, day_of_week='monday', hour=9, minute=0, recipients=None, use_cache=True):
         """
         添加每周报告任务
         
@@ -331,6 +399,7 @@ class ReportScheduler:
             hour: 执行小时
             minute: 执行分钟
             recipients: 收件人列表
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 任务ID
@@ -338,7 +407,7 @@ class ReportScheduler:
         # 定义任务函数
         def weekly_report_task():
             logger.info(f"执行每周报告任务: {job_id} - {research_topic}")
-            report = self.create_research_report(research_topic, max_papers, time_window_days)
+            report = self.create_research_report(research_topic, max_papers, time_window_days, use_cache=use_cache)
             if report:
                 self.send_email_report(report, recipients)
         
@@ -358,7 +427,7 @@ class ReportScheduler:
         logger.info(f"已添加每周报告任务 '{job_id}'，将在每周 {day_of_week} {hour:02d}:{minute:02d} 执行")
         return job_id
     
-    def add_monthly_report_job(self, job_id, research_topic, max_papers=30, time_window_days=30, day=1, hour=9, minute=0, recipients=None):
+    def add_monthly_report_job(self, job_id, research_topic, max_papers=30, time_window_days=30, day=1, hour=9, minute=0, recipients=None, use_cache=True):
         """
         添加每月报告任务
         
@@ -371,6 +440,7 @@ class ReportScheduler:
             hour: 执行小时
             minute: 执行分钟
             recipients: 收件人列表
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 任务ID
@@ -378,7 +448,7 @@ class ReportScheduler:
         # 定义任务函数
         def monthly_report_task():
             logger.info(f"执行每月报告任务: {job_id} - {research_topic}")
-            report = self.create_research_report(research_topic, max_papers, time_window_days)
+            report = self.create_research_report(research_topic, max_papers, time_window_days, use_cache=use_cache)
             if report:
                 self.send_email_report(report, recipients)
         
@@ -398,7 +468,7 @@ class ReportScheduler:
         logger.info(f"已添加每月报告任务 '{job_id}'，将在每月 {day}日 {hour:02d}:{minute:02d} 执行")
         return job_id
     
-    def add_interval_report_job(self, job_id, research_topic, seconds=0, minutes=0, hours=0, days=0, weeks=0, max_papers=10, time_window_days=7, recipients=None):
+    def add_interval_report_job(self, job_id, research_topic, seconds=0, minutes=0, hours=0, days=0, weeks=0, max_papers=10, time_window_days=7, recipients=None, use_cache=True):
         """
         添加间隔执行的报告任务
         
@@ -413,6 +483,7 @@ class ReportScheduler:
             max_papers: 最多包含的论文数量
             time_window_days: 时间窗口（天）
             recipients: 收件人列表
+            use_cache: 是否使用大模型响应缓存，False时重新调用API并刷新缓存
         
         Returns:
             str: 任务ID
@@ -420,7 +491,7 @@ class ReportScheduler:
         # 定义任务函数
         def interval_report_task():
             logger.info(f"执行间隔报告任务: {job_id} - {research_topic}")
-            report = self.create_research_report(research_topic, max_papers, time_window_days)
+            report = self.create_research_report(research_topic, max_papers, time_window_days, use_cache=use_cache)
             if report:
                 self.send_email_report(report, recipients)
         
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+导入耗时测试
+检查不调用大模型的命令（search、download等）依赖的模块能在未配置API密钥时快速导入，
+且导入时不会加载openai、PDF解析库或创建DeepSeek客户端
+
+运行方式：python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+# 项目根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入耗时上限（秒），较慢的机器上可通过环境变量IMPORT_TIME_BUDGET放宽
+IMPORT_TIME_BUDGET = float(os.getenv('IMPORT_TIME_BUDGET', '1.5'))
+
+# 只在解析PDF时才需要的模块
+PDF_MODULES = ['pdfplumber', 'pdfminer', 'PIL']
+
+# 在新的解释器中导入模块并输出耗时和状态
+IMPORT_SCRIPT = """
+import sys, json, time
+started = time.perf_counter()
+import deepseek_api, paper_searcher, paper_downloader
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'elapsed': elapsed,
+    'openai_loaded': 'openai' in sys.modules,
+    'client_created': deepseek_api._deepseek_client is not None,
+    'loaded_modules': sorted({name.split('.')[0] for name in sys.modules}),
+}))
+"""
+
+
+class ImportTimeTest(unittest.TestCase):
+    """非大模型命令的导入耗时测试"""
+    
+    def _run_import(self):
+        """在未设置API密钥的子进程中导入模块，返回输出的状态字典"""
+        env = dict(os.environ)
+        # 设置为空字符串而不是删除，避免load_dotenv从.env文件中读入密钥
+        env['DEEPSEEK_API_KEY'] = ''
+        env['PYTHONPATH'] = ROOT_DIR
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    
+    def test_imports_without_api_key(self):
+        """未设置API密钥时导入不报错，不加载openai，不创建客户端"""
+        status = self._run_import()
+        self.assertFalse(status['openai_loaded'], '导入时加载了openai')
+        self.assertFalse(status['client_created'], '导入时创建了DeepSeek客户端')
+    
+    def test_pdf_modules_not_loaded(self):
+        """导入时不加载PDF解析库"""
+        status = self._run_import()
+        for module in PDF_MODULES:
+            with self.subTest(module=module):
+                self.assertFalse(module in status['loaded_modules'], f'导入时加载了{module}')
+    
+    def test_import_time_budget(self):
+        """导入耗时不超过预算"""
+        status = self._run_import()
+        self.assertLess(
+            status['elapsed'], IMPORT_TIME_BUDGET,
+            f"导入耗时 {status['elapsed']:.2f} 秒，超过预算 {IMPORT_TIME_BUDGET} 秒"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
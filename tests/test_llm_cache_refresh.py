@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM响应缓存刷新测试
+命令行的--refresh_cache经论文分析函数传递到generate_text(use_cache=False)，跳过缓存查询但仍刷新缓存
+
+运行方式：python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 请求由假客户端处理，不需要真实的API密钥
+os.environ.setdefault('DEEPSEEK_API_KEY', 'test')
+
+from deepseek_api import get_deepseek_client
+from paper_analyzer import analyze_paper_content, analyze_paper_content_async
+from utils.llm_cache import LLMCache
+from utils.usage_ledger import usage_ledger
+
+PAPER_CONTENT = 'Abstract\nWe study caching of model responses.\n\n1 Introduction\nResponses are reused.'
+
+
+class LLMCacheRefreshTest(unittest.TestCase):
+    """use_cache参数在论文分析流程中的传递测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.saved_ledger = usage_ledger.enabled
+        usage_ledger.enabled = False
+        # 每个测试使用独立的缓存数据库
+        cache = LLMCache(db_path=os.path.join(self.temp_dir, 'llm_cache.sqlite3'))
+        cache.enabled = True
+        self.cache_patch = mock.patch('deepseek_api.llm_cache', cache)
+        self.cache_patch.start()
+        
+        # 用计数的假客户端代替DeepSeek API，每次调用返回不同的内容
+        self.calls = 0
+        client = get_deepseek_client()
+        self.saved_client = (client.client, client._get_async_client)
+        
+        def create(**kwargs):
+            self.calls += 1
+            return self._response(f'report {self.calls}')
+        
+        async def create_async(**kwargs):
+            return create(**kwargs)
+        
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create_async)))
+        client._get_async_client = lambda: async_client
+    
+    def tearDown(self):
+        client = get_deepseek_client()
+        client.client, client._get_async_client = self.saved_client
+        self.cache_patch.stop()
+        usage_ledger.enabled = self.saved_ledger
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _response(text):
+        """构造非流式响应"""
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=10, total_tokens=110)
+        choice = SimpleNamespace(message=SimpleNamespace(content=text), finish_reason='stop')
+        return SimpleNamespace(choices=[choice], usage=usage)
+    
+    def test_refresh_bypasses_and_updates_cache(self):
+        """use_cache=False时重新调用API，新的响应写回缓存"""
+        self.assertEqual(analyze_paper_content(PAPER_CONTENT), 'report 1')
+        self.assertEqual(analyze_paper_content(PAPER_CONTENT), 'report 1')
+        self.assertEqual(self.calls, 1)
+        
+        self.assertEqual(analyze_paper_content(PAPER_CONTENT, use_cache=False), 'report 2')
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(analyze_paper_content(PAPER_CONTENT), 'report 2')
+        self.assertEqual(self.calls, 2)
+    
+    def test_refresh_async(self):
+        """异步分析同样传递use_cache"""
+        self.assertEqual(asyncio.run(analyze_paper_content_async(PAPER_CONTENT)), 'report 1')
+        self.assertEqual(asyncio.run(analyze_paper_content_async(PAPER_CONTENT, use_cache=False)), 'report 2')
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+参考文献解析测试
+作者字段保留完整的作者列表，超出长度上限时在作者之间截断并加“等”
+
+运行方式：python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reference_parser import parse_reference, AUTHORS_MAX_CHARS
+
+
+class ReferenceAuthorsTest(unittest.TestCase):
+    """参考文献作者字段测试"""
+    
+    def test_ieee_authors_kept(self):
+        """IEEE风格条目保留全部作者"""
+        reference = parse_reference(
+            'Y. Li, R. Yu, C. Shahabi, and Y. Liu, “Diffusion convolutional recurrent neural network,” in ICLR, 2018.'
+        )
+        self.assertEqual(reference['authors'], 'Y. Li, R. Yu, C. Shahabi, and Y. Liu')
+    
+    def test_author_year_authors_kept(self):
+        """作者-年份风格条目保留全部作者"""
+        reference = parse_reference(
+            'Zonghan Wu, Shirui Pan, Guodong Long, Jing Jiang, and Chengqi Zhang. '
+            'Graph WaveNet for deep spatial-temporal graph modeling. In IJCAI, 2019.'
+        )
+        self.assertEqual(reference['authors'], 'Zonghan Wu, Shirui Pan, Guodong Long, Jing Jiang, and Chengqi Zhang')
+        self.assertEqual(reference['title'], 'Graph WaveNet for deep spatial-temporal graph modeling')
+    
+    def test_et_al_kept(self):
+        """原文中的et al.保留"""
+        reference = parse_reference('A. Vaswani et al., “Attention is all you need,” in NeurIPS, 2017.')
+        self.assertEqual(reference['authors'], 'A. Vaswani et al.')
+    
+    def test_long_author_list_truncated(self):
+        """作者过多时在作者之间截断"""
+        names = [f'Author{i} Surname{i}' for i in range(20)]
+        reference = parse_reference(', '.join(names) + '. A very long paper. In Conf, 2020.')
+        authors = reference['authors']
+        self.assertTrue(authors.startswith(', '.join(names[:3])))
+        self.assertTrue(authors.endswith('等'))
+        self.assertLessEqual(len(authors), AUTHORS_MAX_CHARS + 1)
+        self.assertIn(authors[:-1].split(', ')[-1], names)
+
+
+if __name__ == '__main__':
+    unittest.main()
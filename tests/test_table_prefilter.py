@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+表格预筛选测试
+边框线段较少、依靠表格标题判断的页面，无论是否命中提取缓存都应提取到表格
+
+运行方式：python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.extraction_cache import extraction_cache
+from utils.pdf_utils import PDFDocument, extract_tables_from_pdf, _count_rulings, TABLE_MIN_RULINGS
+
+
+def _build_table_pdf(path):
+    """
+    生成一页带标题的简单表格PDF：3条横线和4条竖线围成2行3列，线段数少于TABLE_MIN_RULINGS
+    
+    Args:
+        path: 保存路径
+    """
+    xs, ys = [72, 172, 272, 372], [700, 680, 660]
+    lines = [f'{xs[0]} {y} m {xs[-1]} {y} l S' for y in ys] + [f'{x} {ys[0]} m {x} {ys[-1]} l S' for x in xs]
+    cells = [['Method', 'MAE', 'RMSE'], ['Ours', '1.23', '2.34']]
+    texts = [
+        f'BT /F1 10 Tf {xs[j] + 5} {ys[i + 1] + 6} Td ({cell}) Tj ET'
+        for i, row in enumerate(cells) for j, cell in enumerate(row)
+    ]
+    content = '\n'.join(['BT /F1 12 Tf 72 720 Td (Table 1: Results on the benchmark) Tj ET'] + lines + texts).encode()
+    
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class TablePrefilterTest(unittest.TestCase):
+    """表格预筛选与提取缓存的一致性测试"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.temp_dir, 'table.pdf')
+        _build_table_pdf(self.pdf_path)
+        # 使用独立的缓存目录
+        self.saved_cache = (extraction_cache.cache_dir, extraction_cache.enabled)
+        extraction_cache.cache_dir = os.path.join(self.temp_dir, 'cache')
+        extraction_cache.enabled = True
+    
+    def tearDown(self):
+        extraction_cache.cache_dir, extraction_cache.enabled = self.saved_cache
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _assert_table(self, tables):
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(tables[0][0], ['Method', 'MAE', 'RMSE'])
+    
+    def test_fixture_below_ruling_threshold(self):
+        """测试PDF的线段数少于阈值，只能依靠表格标题通过预筛选"""
+        with PDFDocument(self.pdf_path) as document:
+            self.assertLess(_count_rulings(document.pdf.pages[0]), TABLE_MIN_RULINGS)
+    
+    def test_cold_cache(self):
+        """未提取文本、缓存为空时直接提取表格"""
+        self._assert_table(extract_tables_from_pdf(self.pdf_path))
+    
+    def test_warm_cache(self):
+        """全文命中提取缓存（会话中没有逐页文本）后提取表格"""
+        with PDFDocument(self.pdf_path) as document:
+            document.get_text()
+        with PDFDocument(self.pdf_path) as document:
+            document.get_text()
+            self.assertFalse(document._page_texts)
+            self._assert_table(document.get_tables())
+
+
+if __name__ == '__main__':
+    unittest.main()
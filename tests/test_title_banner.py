@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+标题识别测试
+期刊、会议横幅应被排除，含Volume、Doing、Letters等普通单词的真实论文标题不应被误判
+
+运行方式：python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_utils import _is_plausible_title
+
+# 真实论文标题
+REAL_TITLES = [
+    'Learning by Doing: Embodied Agents in Interactive Environments',
+    'Neural Volume Rendering for Dynamic Scenes',
+    'Volumetric Occupancy Networks',
+    'Journey to the Center of the Knowledge Neurons',
+    'Workshopping Prompts: Iterative Refinement with Language Models',
+    'Conferencing Systems for Remote Collaboration',
+    'Doubly Robust Off-Policy Evaluation',
+    'Attention Is All You Need',
+    'Graph Neural Networks for Traffic Forecasting',
+]
+
+# 期刊、会议横幅和版权信息
+BANNERS = [
+    'IEEE TRANSACTIONS ON PATTERN ANALYSIS AND MACHINE INTELLIGENCE',
+    'Proceedings of the AAAI Conference on Artificial Intelligence',
+    'Journal of Machine Learning Research 21 (2020) 1-67',
+    'Published as a conference paper at ICLR 2021',
+    'arXiv:2101.00001v1 [cs.LG] 1 Jan 2021',
+    'Physical Review Letters',
+    'Vol. 35, No. 4, April 2023',
+    'doi: 10.1109/TPAMI.2021.3059968',
+    'Workshop on Graph Learning Benchmarks',
+    'Copyright 2022 by the authors',
+    'Preprint. Under review.',
+    'Microsoft Word - paper_final.docx',
+]
+
+
+class TitleBannerTest(unittest.TestCase):
+    """标题候选文本判断测试"""
+    
+    def test_real_titles_accepted(self):
+        """真实论文标题不被当作横幅"""
+        for title in REAL_TITLES:
+            with self.subTest(title=title):
+                self.assertTrue(_is_plausible_title(title))
+    
+    def test_banners_rejected(self):
+        """期刊、会议横幅被排除"""
+        for banner in BANNERS:
+            with self.subTest(banner=banner):
+                self.assertFalse(_is_plausible_title(banner))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PDF提取结果缓存
+功能：
+1. 以PDF内容的SHA-256和提取参数作为键，缓存提取结果到磁盘
+2. 按总大小上限进行LRU淘汰
+3. 查看和清空缓存
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    计算文件内容的SHA-256
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+    
+    Returns:
+        十六进制摘要字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data):
+    """
+    计算字节内容的SHA-256
+    
+    Args:
+        data: 字节内容
+    
+    Returns:
+        十六进制摘要字符串
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """基于内容寻址的磁盘缓存，每个条目保存为一个JSON文件，按访问时间进行LRU淘汰"""
+    
+    def __init__(self, cache_dir=None, max_size_mb=None):
+        """
+        初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录，默认从环境变量EXTRACTION_CACHE_DIR获取
+            max_size_mb: 缓存总大小上限（MB），默认从环境变量EXTRACTION_CACHE_MAX_MB获取
+        """
+        self.cache_dir = os.path.abspath(cache_dir or os.getenv('EXTRACTION_CACHE_DIR', './.cache/extraction'))
+        self.max_size = int(float(max_size_mb or os.getenv('EXTRACTION_CACHE_MAX_MB', '200')) * 1024 * 1024)
+        self.enabled = os.getenv('EXTRACTION_CACHE', '1') != '0'
+        self._lock = threading.Lock()
+        # 当前缓存总大小，首次写入时才扫描目录
+        self._size = None
+    
+    def make_key(self, content_hash, kind, **params):
+        """
+        生成缓存键
+        
+        Args:
+            content_hash: PDF内容的SHA-256
+            kind: 缓存内容类型，如text、title
+            **params: 影响提取结果的参数（页数限制、后端版本等）
+        
+        Returns:
+            缓存键字符串
+        """
+        payload = json.dumps({'content': content_hash, 'kind': kind, 'params': params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _entry_path(self, key):
+        """按键的前两位分目录存放，避免单个目录文件过多"""
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+    
+    def get(self, key):
+        """
+        读取缓存条目
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的值，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                value = json.load(f)['value']
+            # 更新修改时间，作为LRU淘汰的访问时间
+            os.utime(entry_path, None)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f'读取提取缓存失败，忽略该条目: {str(e)}')
+            return None
+    
+    def set(self, key, value):
+        """
+        写入缓存条目，超过大小上限时淘汰最久未访问的条目
+        
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的值
+        """
+        if not self.enabled:
+            return
+        
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            data = json.dumps({'value': value}, ensure_ascii=False).encode('utf-8')
+            
+            with self._lock:
+                if self._size is None:
+                    self._size = sum(size for _, size, _ in self._iter_entries())
+                old_size = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+                
+                # 先写临时文件再替换，避免并发读取到不完整的条目
+                tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, entry_path)
+                
+                self._size += len(data) - old_size
+                if self._size > self.max_size:
+                    self._evict()
+        except Exception as e:
+            logger.warning(f'写入提取缓存失败: {str(e)}')
+    
+    def _iter_entries(self):
+        """遍历缓存条目，返回(路径, 大小, 访问时间)"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith('.json'):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+    
+    def _evict(self):
+        """淘汰最久未访问的条目，直到总大小降到上限的90%以下"""
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        target_size = self.max_size * 0.9
+        removed = 0
+        
+        for path, size, _ in entries:
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        
+        self._size = total_size
+        logger.info(f'提取缓存超过上限，已淘汰 {removed} 个条目，当前大小: {total_size/1024/1024:.2f}MB')
+    
+    def stats(self):
+        """
+        获取缓存统计信息
+        
+        Returns:
+            包含目录、条目数、总大小和上限的字典
+        """
+        entries = list(self._iter_entries())
+        return {
+            'cache_dir': self.cache_dir,
+            'entries': len(entries),
+            'size_mb': sum(size for _, size, _ in entries) / 1024 / 1024,
+            'max_size_mb': self.max_size / 1024 / 1024,
+            'enabled': self.enabled
+        }
+    
+    def clear(self):
+        """
+        清空缓存
+        
+        Returns:
+            删除的条目数
+        """
+        removed = 0
+        with self._lock:
+            for path, _, _ in list(self._iter_entries()):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+            self._size = 0
+        logger.info(f'已清空提取缓存，删除 {removed} 个条目')
+        return removed
+
+
+# 创建全局实例，方便其他模块直接导入使用
+extraction_cache = ExtractionCache()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于NumPy的版面分析
+功能：
+1. 将页面字符读入NumPy数组，用覆盖直方图检测分栏
+2. 识别跨栏的标题、摘要、图表等通栏内容
+3. 按阅读顺序（先左栏后右栏）输出文本行
+"""
+
+import logging
+from operator import attrgetter, methodcaller
+
+import numpy as np
+from pdfminer.layout import LTChar, LTContainer
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 版面算法版本，修改算法后递增，使旧的提取缓存失效
+LAYOUT_VERSION = 1
+
+# 栏间空白：覆盖度低于文本区域覆盖度（90分位）的该比例视为空白
+COLUMN_GAP_RATIO = 0.1
+
+# 栏间空白的最小宽度（pt）
+MIN_GUTTER_WIDTH = 5
+
+# 字符数少于该值的页面不做分栏检测
+MIN_COLUMN_CHARS = 200
+
+_char_fields = attrgetter('x0', 'x1', 'y0', 'y1', 'size', 'upright')
+_char_text = methodcaller('get_text')
+
+
+def _layout_chars(layout_objects):
+    """
+    收集版面对象中的字符（包括嵌套在LTFigure中的字符）
+    
+    直接读取pdfminer的LTChar，跳过pdfplumber为每个字符构建属性字典的开销
+    
+    Args:
+        layout_objects: pdfminer版面对象列表
+    
+    Returns:
+        LTChar列表
+    """
+    chars = [obj for obj in layout_objects if isinstance(obj, LTChar)]
+    for obj in layout_objects:
+        if isinstance(obj, LTContainer):
+            chars.extend(_layout_chars(obj._objs))
+    return chars
+
+
+def detect_columns(x0, x1, page_left, page_width):
+    """
+    根据字符横向覆盖直方图检测栏间空白
+    
+    Args:
+        x0: 字符左边界数组
+        x1: 字符右边界数组
+        page_left: 页面左边界坐标
+        page_width: 页面宽度
+    
+    Returns:
+        栏间空白区间列表[(左边界, 右边界), ...]，单栏页面返回空列表
+    """
+    if len(x0) < MIN_COLUMN_CHARS:
+        return []
+    
+    # 差分数组累加得到每1pt宽度上覆盖的字符数
+    num_bins = int(np.ceil(page_width)) + 1
+    start_bins = np.clip(np.floor(x0 - page_left).astype(int), 0, num_bins - 1)
+    end_bins = np.clip(np.ceil(x1 - page_left).astype(int), 0, num_bins - 1)
+    coverage = np.cumsum(
+        np.bincount(start_bins, minlength=num_bins + 1) - np.bincount(end_bins, minlength=num_bins + 1)
+    )[:num_bins]
+    
+    covered = np.flatnonzero(coverage)
+    if not len(covered):
+        return []
+    text_left, text_right = covered[0], covered[-1]
+    
+    # 只在文本区域中部寻找空白，避免把页边距当成栏间距
+    margin = int((text_right - text_left) * 0.15)
+    inner_left, inner_right = text_left + margin, text_right - margin
+    if inner_right <= inner_left:
+        return []
+    threshold = COLUMN_GAP_RATIO * np.percentile(coverage[text_left:text_right + 1], 90)
+    
+    low = np.zeros(num_bins + 2, dtype=np.int8)
+    low[inner_left + 1:inner_right + 1] = coverage[inner_left:inner_right] <= threshold
+    edges = np.diff(low)
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    keep = run_ends - run_starts >= MIN_GUTTER_WIDTH
+    
+    return [
+        (page_left + start, page_left + end)
+        for start, end in zip(run_starts[keep], run_ends[keep])
+    ]
+
+
+def _merge_intervals(starts, ends):
+    """
+    合并重叠的纵向区间
+    
+    Args:
+        starts: 区间起点数组
+        ends: 区间终点数组
+    
+    Returns:
+        (合并后起点数组, 合并后终点数组)，按起点排序
+    """
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    new_band = np.empty(len(starts), dtype=bool)
+    new_band[0] = True
+    new_band[1:] = starts[1:] > running_end[:-1]
+    band_ids = np.cumsum(new_band) - 1
+    band_ends = np.full(band_ids[-1] + 1, -np.inf)
+    np.maximum.at(band_ends, band_ids, ends)
+    return starts[new_band], band_ends
+
+
+def extract_page_text(page, x_tolerance=None, y_tolerance=None):
+    """
+    按阅读顺序提取单页文本
+    
+    Args:
+        page: pdfplumber页面对象
+        x_tolerance: 同一行相邻字符间距超过该值时插入空格，None表示取字号的0.15倍
+        y_tolerance: 字符纵向中心相差不超过该值时视为同一行（上下标并入所在行），
+                     None表示取页面字号中位数的0.45倍
+    
+    Returns:
+        页面文本字符串，各行以换行符分隔
+    """
+    chars = _layout_chars(page.layout._objs)
+    if not chars:
+        return ''
+    
+    fields = np.array(list(map(_char_fields, chars)), dtype=float)
+    upright = fields[:, 5].astype(bool)
+    if not upright.any():
+        return ''
+    fields = fields[upright]
+    texts = np.array(list(map(_char_text, chars)), dtype=object)[upright]
+    x0, x1, sizes = fields[:, 0], fields[:, 1], fields[:, 4]
+    # 转换为以页面顶部为原点的坐标
+    top, bottom = page.height - fields[:, 3], page.height - fields[:, 2]
+    
+    page_left = page.bbox[0]
+    gutters = detect_columns(x0, x1, page_left, page.width)
+    
+    # 列号：通栏内容为-1，其余按字符中心落在哪一栏
+    columns = np.zeros(len(texts), dtype=int)
+    if gutters:
+        gutter_left = np.array([left for left, _ in gutters])
+        gutter_right = np.array([right for _, right in gutters])
+        columns = np.searchsorted(gutter_left, (x0 + x1) / 2)
+        
+        # 侵入栏间空白的字符所在的纵向区间都是通栏内容
+        in_gutter = ((x1[:, None] > gutter_left + 0.5) & (x0[:, None] < gutter_right - 0.5)).any(axis=1)
+        if in_gutter.any():
+            band_starts, band_ends = _merge_intervals(top[in_gutter], bottom[in_gutter])
+            centers = (top + bottom) / 2
+            band_index = np.searchsorted(band_starts, centers, side='right') - 1
+            spanning = (band_index >= 0) & (centers <= band_ends[np.maximum(band_index, 0)])
+            columns[spanning] = -1
+    
+    if y_tolerance is None:
+        y_tolerance = 0.45 * np.median(sizes)
+    
+    # 按(列, 纵向中心, 横坐标)排序后，列号变化或纵向中心跳变处即为换行
+    middle = (top + bottom) / 2
+    order = np.lexsort((x0, middle, columns))
+    x0, x1, middle, texts, columns, sizes = (
+        x0[order], x1[order], middle[order], texts[order], columns[order], sizes[order]
+    )
+    
+    line_break = np.empty(len(texts), dtype=bool)
+    line_break[0] = True
+    line_break[1:] = (np.diff(middle) > y_tolerance) | (np.diff(columns) != 0)
+    line_ids = np.cumsum(line_break) - 1
+    line_starts = np.flatnonzero(line_break)
+    line_ends = np.append(line_starts[1:], len(texts))
+    
+    # 同一行内按横坐标排序，间距超过阈值处插入空格
+    order = np.lexsort((x0, line_ids))
+    x0, x1, texts, sizes = x0[order], x1[order], texts[order], sizes[order]
+    gaps = np.empty(len(texts))
+    gaps[0] = 0
+    gaps[1:] = x0[1:] - x1[:-1]
+    needs_space = gaps > (sizes * 0.15 if x_tolerance is None else x_tolerance)
+    needs_space[line_starts] = False
+    texts = np.where(needs_space, ' ', '').astype(object) + texts
+    
+    # 阅读顺序：通栏行把页面分成若干段，每段内先输出左栏再输出右栏
+    line_tops = middle[line_starts]
+    line_columns = columns[line_starts]
+    spanning_tops = line_tops[line_columns == -1]
+    segments = 2 * np.searchsorted(spanning_tops, line_tops, side='right')
+    segments[line_columns == -1] -= 1
+    reading_order = np.lexsort((line_tops, line_columns, segments))
+    
+    lines = [''.join(texts[line_starts[i]:line_ends[i]]) for i in reading_order]
+    return '\n'.join(line for line in lines if line.strip())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大模型响应缓存
+功能：
+1. 以模型、系统消息、提示词哈希、温度和最大token数作为键，将响应持久化到SQLite
+2. 条目过期（TTL）和按总大小上限的LRU淘汰
+3. 统计命中和未命中次数，查看和清空缓存
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """基于SQLite的大模型响应缓存，默认关闭，设置环境变量LLM_CACHE=1启用"""
+    
+    def __init__(self, db_path=None, max_size_mb=None, ttl_hours=None):
+        """
+        初始化缓存（此时不会创建数据库）
+        
+        Args:
+            db_path: 数据库文件路径，默认从环境变量LLM_CACHE_PATH获取
+            max_size_mb: 响应总大小上限（MB），默认从环境变量LLM_CACHE_MAX_MB获取
+            ttl_hours: 条目有效期（小时），默认从环境变量LLM_CACHE_TTL_HOURS获取，0表示永不过期
+        """
+        self.db_path = os.path.abspath(db_path or os.getenv('LLM_CACHE_PATH', './.cache/llm_cache.sqlite3'))
+        self.max_size = int(float(max_size_mb or os.getenv('LLM_CACHE_MAX_MB', '100')) * 1024 * 1024)
+        self.ttl = float(ttl_hours if ttl_hours is not None else os.getenv('LLM_CACHE_TTL_HOURS', '168')) * 3600
+        self.enabled = os.getenv('LLM_CACHE', '0') == '1'
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+    
+    def _connect(self):
+        """打开数据库连接，首次使用时建表"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            conn.commit()
+            self._initialized = True
+        return conn
+    
+    def make_key(self, model, system, prompt, temperature, max_tokens):
+        """
+        生成缓存键
+        
+        Args:
+            model: 模型名称
+            system: 系统消息
+            prompt: 提示词
+            temperature: 生成温度
+            max_tokens: 最大生成token数
+        
+        Returns:
+            缓存键字符串
+        """
+        payload = json.dumps({
+            'model': model,
+            'system': system,
+            'prompt': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """
+        读取缓存条目，过期的条目视为未命中并删除
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的响应文本，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        value = None
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute('SELECT value, created FROM responses WHERE key = ?', (key,)).fetchone()
+                    now = time.time()
+                    if row and self.ttl and now - row[1] > self.ttl:
+                        conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    elif row:
+                        value = row[0]
+                        conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f'读取LLM响应缓存失败，忽略该条目: {str(e)}')
+        
+        if value is None:
+            self.misses += 1
+            logger.info(f'LLM响应缓存未命中（累计命中 {self.hits} 次，未命中 {self.misses} 次）')
+        else:
+            self.hits += 1
+            logger.info(f'命中LLM响应缓存，跳过API调用（累计命中 {self.hits} 次，未命中 {self.misses} 次）')
+        return value
+    
+    def set(self, key, value):
+        """
+        写入缓存条目，超过大小上限时淘汰过期和最久未访问的条目
+        
+        Args:
+            key: 缓存键
+            value: 响应文本
+        """
+        if not self.enabled:
+            return
+        
+        try:
+            now = time.time()
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                        (key, value, len(value.encode('utf-8')), now, now)
+                    )
+                    total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                    if total_size > self.max_size:
+                        self._evict(conn, total_size)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            logger.warning(f'写入LLM响应缓存失败: {str(e)}')
+    
+    def _evict(self, conn, total_size):
+        """先删除过期条目，再按访问时间删除最久未访问的条目，直到总大小降到上限的90%以下"""
+        removed = 0
+        if self.ttl:
+            removed += conn.execute('DELETE FROM responses WHERE created < ?', (time.time() - self.ttl,)).rowcount
+            total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        
+        target_size = self.max_size * 0.9
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+            if total_size <= target_size:
+                break
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total_size -= size
+            removed += 1
+        
+        logger.info(f'LLM响应缓存超过上限，已淘汰 {removed} 个条目，当前大小: {total_size/1024/1024:.2f}MB')
+    
+    def stats(self):
+        """
+        获取缓存统计信息
+        
+        Returns:
+            包含数据库路径、条目数、总大小、上限、有效期和本进程命中统计的字典
+        """
+        entries, size = 0, 0
+        if os.path.exists(self.db_path):
+            with self._lock:
+                conn = self._connect()
+                try:
+                    entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+                finally:
+                    conn.close()
+        return {
+            'db_path': self.db_path,
+            'entries': entries,
+            'size_mb': size / 1024 / 1024,
+            'max_size_mb': self.max_size / 1024 / 1024,
+            'ttl_hours': self.ttl / 3600,
+            'hits': self.hits,
+            'misses': self.misses,
+            'enabled': self.enabled
+        }
+    
+    def clear(self):
+        """
+        清空缓存
+        
+        Returns:
+            删除的条目数
+        """
+        removed = 0
+        if os.path.exists(self.db_path):
+            with self._lock:
+                conn = self._connect()
+                try:
+                    removed = conn.execute('DELETE FROM responses').rowcount
+                    conn.commit()
+                    conn.execute('VACUUM')
+                finally:
+                    conn.close()
+        logger.info(f'已清空LLM响应缓存，删除 {removed} 个条目')
+        return removed
+
+
+# 创建全局实例，方便其他模块直接导入使用
+llm_cache = LLMCache()
@@ -5,11 +5,13 @@
 Markdown处理工具
 功能：
 1. 生成和格式化Markdown内容
-2. 保存Markdown文件
+2. 保存Markdown文件，写入临时文件后原子替换
 3. 处理表格、列表等Markdown元素
+4. 流式写入大模型逐步生成的报告
 """
 
 import os
+import sys
 import logging
 
 # 设置日志
@@ -38,9 +40,11 @@ def save_markdown_report(content, file_path):
             os.makedirs(save_dir)
             logger.info(f'创建保存目录: {save_dir}')
         
-        # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as f:
+        # 先写入临时文件再替换，中途出错不会留下不完整的报告
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        os.replace(temp_path, file_path)
         
         logger.info(f'Markdown报告已保存至: {file_path}')
         return file_path
@@ -50,6 +54,87 @@ def save_markdown_report(content, file_path):
         raise
 
 
+class StreamingMarkdownWriter:
+    """
+    流式写入Markdown报告
+    
+    生成过程中逐段写入同目录下的.partial临时文件，完成后原子替换为正式文件；
+    生成中途出错时临时文件保留已生成的部分内容
+    """
+    
+    def __init__(self, file_path, echo=False):
+        """
+        初始化写入器
+        
+        Args:
+            file_path: 报告保存路径
+            echo: 是否同时将生成的内容输出到终端
+        """
+        if not file_path.lower().endswith('.md'):
+            file_path += '.md'
+        self.file_path = file_path
+        self.partial_path = file_path + '.partial'
+        self.echo = echo
+        self.committed = False
+        self._file = None
+    
+    def __enter__(self):
+        save_dir = os.path.dirname(self.file_path)
+        if save_dir and not os.path.exists(save_dir):
+            os.makedirs(save_dir)
+            logger.info(f'创建保存目录: {save_dir}')
+        self._file = open(self.partial_path, 'w', encoding='utf-8')
+        return self
+    
+    def write(self, text):
+        """
+        追加生成的内容并立即刷新到磁盘
+        
+        Args:
+            text: 新生成的文本片段
+        """
+        self._file.write(text)
+        self._file.flush()
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    def commit(self, content=None):
+        """
+        完成写入，将临时文件原子替换为正式报告
+        
+        Args:
+            content: 最终报告内容（如清理代码块标记、追加参考文献后的内容），None表示使用已写入的内容
+        
+        Returns:
+            保存的文件路径
+        """
+        if content is not None:
+            self._file.seek(0)
+            self._file.write(content)
+            self._file.truncate()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial_path, self.file_path)
+        self.committed = True
+        if self.echo:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+        logger.info(f'Markdown报告已保存至: {self.file_path}')
+        return self.file_path
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.committed:
+            return False
+        if exc_type is None:
+            self.commit()
+            return False
+        self._file.close()
+        logger.warning(f'报告生成中断，已生成的部分内容保存在: {self.partial_path}')
+        return False
+
+
 def format_table(headers, rows):
     """
     格式化表格为Markdown格式
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PDF解析后端
+功能：
+1. 为pdfplumber、NumPy分栏版面分析、PyPDF2和pypdfium2（可选）提供统一的文本、元数据接口
+2. 对比各后端的解析速度和文本一致性
+"""
+
+import os
+import time
+import logging
+import importlib
+import importlib.util
+from abc import ABC, abstractmethod
+from collections import Counter
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 默认解析后端
+DEFAULT_BACKEND = os.getenv('PDF_BACKEND', 'pdfplumber')
+
+
+def release_page(page):
+    """
+    释放pdfplumber页面缓存的字符、线条等版面对象
+    
+    Args:
+        page: pdfplumber页面对象
+    """
+    # 新版本pdfplumber提供page.close()，旧版本只能清空缓存属性
+    close = getattr(page, 'close', None)
+    if callable(close):
+        close()
+    else:
+        page.flush_cache()
+
+
+class PDFBackend(ABC):
+    """
+    解析后端基类，子类负责打开文档并逐页提取文本和元数据
+    
+    后端只提供正文文本和元数据，标题（字号）、表格、图片和页面指纹依赖字符和版面对象，始终使用pdfplumber
+    """
+    
+    name = None
+    module_name = None
+    
+    @classmethod
+    def is_available(cls):
+        """后端依赖是否已安装"""
+        return importlib.util.find_spec(cls.module_name) is not None
+    
+    @property
+    def version(self):
+        """后端库版本，作为提取缓存键的一部分"""
+        return getattr(importlib.import_module(self.module_name), '__version__', 'unknown')
+    
+    @abstractmethod
+    def open(self, source):
+        """
+        打开文档
+        
+        Args:
+            source: PDF文件路径或可读取的二进制文件对象
+        
+        Returns:
+            后端自己的文档对象
+        """
+    
+    @abstractmethod
+    def page_count(self, doc):
+        """文档总页数"""
+    
+    @abstractmethod
+    def page_text(self, doc, index):
+        """
+        提取单页文本
+        
+        Args:
+            doc: open()返回的文档对象
+            index: 页索引（从0开始）
+        
+        Returns:
+            页面文本字符串
+        """
+    
+    @abstractmethod
+    def metadata(self, doc):
+        """文档信息字典中的元数据，键名不带前缀斜杠"""
+    
+    def close(self, doc):
+        """关闭文档"""
+        doc.close()
+
+
+class PdfplumberBackend(PDFBackend):
+    """pdfplumber后端：基于字符版面分析，准确但较慢"""
+    
+    name = 'pdfplumber'
+    module_name = 'pdfplumber'
+    
+    def open(self, source):
+        import pdfplumber
+        return pdfplumber.open(source)
+    
+    def page_count(self, doc):
+        return len(doc.pages)
+    
+    def page_text(self, doc, index):
+        page = doc.pages[index]
+        page_text = page.extract_text() or ''
+        release_page(page)
+        return page_text
+    
+    def metadata(self, doc):
+        return dict(doc.metadata or {})
+
+
+class LayoutBackend(PdfplumberBackend):
+    """分栏版面分析后端：基于pdfplumber字符和NumPy向量化计算，双栏论文按阅读顺序输出"""
+    
+    name = 'layout'
+    module_name = 'numpy'
+    
+    @classmethod
+    def is_available(cls):
+        return super().is_available() and importlib.util.find_spec('pdfplumber') is not None
+    
+    @property
+    def version(self):
+        from utils.layout import LAYOUT_VERSION
+        return f'pdfplumber-{PdfplumberBackend().version}+numpy-{super().version}+layout-{LAYOUT_VERSION}'
+    
+    def page_text(self, doc, index):
+        from utils.layout import extract_page_text
+        page = doc.pages[index]
+        page_text = extract_page_text(page)
+        release_page(page)
+        return page_text
+
+
+class PyPDF2Backend(PDFBackend):
+    """PyPDF2后端：直接解析内容流，适合大批量纯文本提取"""
+    
+    name = 'pypdf2'
+    module_name = 'PyPDF2'
+    
+    def open(self, source):
+        from PyPDF2 import PdfReader
+        return PdfReader(source)
+    
+    def page_count(self, doc):
+        return len(doc.pages)
+    
+    def page_text(self, doc, index):
+        return doc.pages[index].extract_text() or ''
+    
+    def metadata(self, doc):
+        return {key.lstrip('/'): str(value) for key, value in (doc.metadata or {}).items()}
+    
+    def close(self, doc):
+        # PdfReader没有close方法，由调用方管理文件对象
+        pass
+
+
+class PypdfiumBackend(PDFBackend):
+    """pypdfium2后端（可选依赖）：基于PDFium，速度最快"""
+    
+    name = 'pypdfium2'
+    module_name = 'pypdfium2'
+    
+    @property
+    def version(self):
+        try:
+            from pypdfium2.version import PYPDFIUM_INFO
+            return str(PYPDFIUM_INFO)
+        except ImportError:
+            return str(getattr(importlib.import_module(self.module_name), 'V_PYPDFIUM2', 'unknown'))
+    
+    def open(self, source):
+        import pypdfium2
+        return pypdfium2.PdfDocument(source)
+    
+    def page_count(self, doc):
+        return len(doc)
+    
+    def page_text(self, doc, index):
+        page = doc[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range().replace('\r\n', '\n')
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+    
+    def metadata(self, doc):
+        return {key: value for key, value in doc.get_metadata_dict().items() if value}
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PdfplumberBackend, LayoutBackend, PyPDF2Backend, PypdfiumBackend)
+}
+
+
+def available_backends():
+    """
+    获取已安装的后端名称
+    
+    Returns:
+        后端名称列表
+    """
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def get_backend(name=None):
+    """
+    获取解析后端实例
+    
+    Args:
+        name: 后端名称，None表示使用默认后端
+    
+    Returns:
+        PDFBackend实例
+    """
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f'不支持的PDF解析后端: {name}，可选值: {", ".join(BACKENDS)}')
+    if not BACKENDS[name].is_available():
+        raise ValueError(f'PDF解析后端 {name} 未安装，请先安装 {BACKENDS[name].module_name}')
+    return BACKENDS[name]()
+
+
+def _char_agreement(reference, text):
+    """
+    字符级一致性：忽略空白后两段文本字符多重集合的F1值
+    
+    Args:
+        reference: 参考文本
+        text: 待比较文本
+    
+    Returns:
+        0到1之间的一致性分数
+    """
+    reference_chars = Counter(''.join(reference.split()))
+    text_chars = Counter(''.join(text.split()))
+    total = sum(reference_chars.values()) + sum(text_chars.values())
+    if not total:
+        return 1.0
+    overlap = sum((reference_chars & text_chars).values())
+    return 2 * overlap / total
+
+
+def benchmark_backends(folder_path, backends=None, max_pages=None, reference='pdfplumber'):
+    """
+    在文件夹中的PDF上对比各解析后端
+    
+    Args:
+        folder_path: 包含PDF的文件夹路径
+        backends: 要对比的后端名称列表，None表示所有已安装的后端
+        max_pages: 每个文件最多处理的页数，None表示全部
+        reference: 计算字符一致性时作为参考的后端
+    
+    Returns:
+        每个后端的统计结果列表，包含页数、耗时、每秒页数和平均字符一致性
+    """
+    if not os.path.exists(folder_path):
+        raise FileNotFoundError(f'文件夹不存在: {folder_path}')
+    
+    backends = backends or available_backends()
+    pdf_files = sorted(
+        os.path.join(root, file)
+        for root, _, files in os.walk(folder_path)
+        for file in files if file.lower().endswith('.pdf')
+    )
+    logger.info(f'找到 {len(pdf_files)} 个PDF文件，对比后端: {", ".join(backends)}')
+    
+    stats = {name: {'pages': 0, 'seconds': 0.0, 'agreements': []} for name in backends}
+    for pdf_path in pdf_files:
+        texts = {}
+        for name in backends:
+            backend = get_backend(name)
+            start = time.perf_counter()
+            doc = backend.open(pdf_path)
+            try:
+                num_pages = backend.page_count(doc)
+                if max_pages:
+                    num_pages = min(num_pages, max_pages)
+                texts[name] = '\n'.join(backend.page_text(doc, i) for i in range(num_pages))
+            finally:
+                backend.close(doc)
+            stats[name]['seconds'] += time.perf_counter() - start
+            stats[name]['pages'] += num_pages
+        
+        if reference in texts:
+            for name, text in texts.items():
+                stats[name]['agreements'].append(_char_agreement(texts[reference], text))
+        logger.info(f'已完成: {os.path.basename(pdf_path)}')
+    
+    results = []
+    for name in backends:
+        item = stats[name]
+        agreements = item['agreements']
+        results.append({
+            'backend': name,
+            'files': len(pdf_files),
+            'pages': item['pages'],
+            'seconds': item['seconds'],
+            'pages_per_second': item['pages'] / item['seconds'] if item['seconds'] else 0.0,
+            'agreement': sum(agreements) / len(agreements) if agreements else None
+        })
+    return results
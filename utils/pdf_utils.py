@@ -7,69 +7,1461 @@ PDF处理工具
 1. 从PDF文件中提取文本内容
 2. 解析PDF结构
 3. 提取PDF中的表格（可选）
+4. 文档会话：同一PDF只打开一次，按需提取文本、标题、元数据、表格和图片
+5. 可切换的文本解析后端（pdfplumber、分栏版面分析layout、PyPDF2、pypdfium2）
+6. 章节索引：按章节类型获取文本和页码范围
 """
 
 import os
+import hashlib
 import logging
 import pdfplumber
-import io
 import re
 import requests  # 添加requests库导入
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
-from utils.web_utils import DEFAULT_HEADERS  # 导入默认请求头
+from pdfminer.pdftypes import resolve1, PDFStream, PDFObjRef
+from utils.web_utils import fetch_pdf_to_spool, open_pdf_range, HTTPRangeFile
+from utils.extraction_cache import extraction_cache, hash_file, hash_bytes
+from utils.pdf_backends import get_backend, release_page, PdfplumberBackend
+from utils.section_parser import (
+    SECTION_INDEX_VERSION, build_section_index, find_font_headings, get_section_text, match_heading, select_sections
+)
+from utils.text_utils import PAGE_SEPARATOR, estimate_tokens
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
-# 添加新函数：从URL直接提取PDF内容
-def extract_text_from_pdf_url(pdf_url, max_pages=None):
+# 页数少于该值的文档始终串行提取，避免进程启动开销超过收益
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+
+# 表格预筛选：没有表格标题的页面至少需要这么多条边框线段才进行完整的表格提取
+TABLE_MIN_RULINGS = int(os.getenv('PDF_TABLE_MIN_RULINGS', '24'))
+
+# 内容流的词法单元：注释、字符串（允许一层嵌套括号）、十六进制字符串、字典和数组分隔符、名称、操作数和操作符，
+# 字符串和注释整体匹配，其中出现的re、l等字样不会被当作操作符
+CONTENT_TOKEN_PATTERN = re.compile(
+    rb'%[^\r\n]*|\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|<<|>>|<[^<>]*>|[\[\]{}]|/[^\s/\[\]()<>{}%]*|[^\s/\[\]()<>{}%]+',
+    re.DOTALL
+)
+
+# 内嵌图像数据的结束标记
+INLINE_IMAGE_END_PATTERN = re.compile(rb'\sEI(?=\s|$)')
+
+# 描边或填充路径的操作符，路径只有以这些操作符结束时才会画出线段
+PATH_PAINT_OPERATORS = {b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*'}
+
+# 表格标题模式
+TABLE_CAPTION_PATTERN = re.compile(r'(?:\bTable|\bTAB\.?|表)\s*\d+|\bTABLE\s+[IVX\d]+')
+
+# token预算模式下最多提取预算该倍数的文本，超出部分按章节优先级取舍
+TOKEN_BUDGET_OVERSCAN = float(os.getenv('TOKEN_BUDGET_OVERSCAN', '2'))
+
+# 按文本识别到的已知类型章节少于该数量时，读取页面字体重新识别章节标题
+SECTION_MIN_KNOWN = 4
+
+# 标题提取只读取第一页顶部该比例的区域
+TITLE_REGION_RATIO = 0.45
+
+# 期刊、会议横幅和版权信息，这类大字号文本不是论文标题
+# 只匹配完整单词和横幅的固定写法（如"Transactions on"、"doi:"、"Vol. 3"），避免误判含Volume、Doing等词的标题
+TITLE_BANNER_PATTERN = re.compile(
+    r'\btransactions\s+on\b|\bproceedings\b|\bjournal\s+of\b|\bjournal\b.*\d|\bconference\s+on\b|'
+    r'\bconference\b.*\d{4}|\bmagazine\b|\bletters\b|\bworkshops?\s+on\b|\bworkshop\b.*\d{4}|\bsymposium\b|'
+    r'\bpreprint\b|\barxiv\s*:|\barxiv\b.*\d{4}|\bvol(?:ume)?\.?\s*\d|\bissn\b|\bdoi\s*:|\bdoi\.org\b|'
+    r'\b10\.\d{4,}/|\bcopyright\b|©|\bopen access\b|\boriginal research\b|\bresearch article\b|'
+    r'\b(?:accepted|published|submitted)\s+(?:to|at|in|by|for|as|on)\b|\bunder review\b|\bmicrosoft word\b|'
+    r'\buntitled\b|\.(pdf|dvi|docx?|tex)$',
+    re.IGNORECASE
+)
+
+
+def _cache_key(content_hash, kind, backend, **params):
     """
-    从URL直接提取PDF文本内容，无需下载保存文件
+    生成提取缓存键，包含解析后端及其版本，切换或升级后端后旧结果自动失效
     
     Args:
-        pdf_url: PDF文件的URL链接
-        max_pages: 最大处理页数，None表示处理所有页面
-        
+        content_hash: PDF内容的SHA-256
+        kind: 缓存内容类型
+        backend: PDFBackend实例
+        **params: 影响提取结果的参数
+    
     Returns:
-        提取的文本内容字符串
+        缓存键字符串
+    """
+    return extraction_cache.make_key(
+        content_hash, kind,
+        backend=backend.name, backend_version=backend.version,
+        **params
+    )
+
+
+def _extract_page_range(pdf_path, pages, backend_name=None):
     """
+    在独立进程中打开PDF并提取指定页面的文本（供进程池调用）
+    
+    Args:
+        pdf_path: PDF文件路径
+        pages: 页索引列表
+        backend_name: 解析后端名称
+    
+    Returns:
+        每一页的文本列表，顺序与pages一致
+    """
+    backend = get_backend(backend_name)
+    doc = backend.open(pdf_path)
     try:
-        logger.info(f'开始从URL获取PDF内容: {pdf_url}')
+        return [backend.page_text(doc, i) for i in pages]
+    finally:
+        backend.close(doc)
+
+
+def _extract_pages_parallel(pdf_path, pages, workers, backend_name=None):
+    """
+    使用进程池按页面分组并行提取PDF文本
+    
+    Args:
+        pdf_path: PDF文件路径
+        pages: 需要处理的页索引列表
+        workers: 工作进程数
+        backend_name: 解析后端名称
+    
+    Returns:
+        每页文本列表，顺序与pages一致
+    """
+    # 每个进程分到若干组连续页面，组数略多于进程数以平衡各页耗时差异
+    pages = list(pages)
+    chunk_count = min(len(pages), workers * 2)
+    chunk_size = -(-len(pages) // chunk_count)
+    chunks = [pages[start:start + chunk_size] for start in range(0, len(pages), chunk_size)]
+    
+    page_texts = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map按提交顺序返回结果，保证合并后的页码顺序
+        results = executor.map(
+            _extract_page_range,
+            [pdf_path] * len(chunks),
+            chunks,
+            [backend_name] * len(chunks)
+        )
+        for chunk_texts in results:
+            page_texts.extend(chunk_texts)
+            logger.info(f'已处理 {len(page_texts)}/{len(pages)} 页')
+    
+    return page_texts
+
+
+def _fingerprint_object(obj, digest, memo, depth=0):
+    """
+    将PDF对象的内容写入摘要，用于计算页面指纹
+    
+    数据流按解码后的内容计入；嵌入字体程序和图片数据不影响文本与表格，只计入尺寸信息；
+    子集字体名称的随机前缀（如ABCDEF+）会被去掉，避免重新编译的PDF整页失配
+    
+    Args:
+        obj: PDF对象
+        digest: hashlib摘要对象
+        memo: 已计算过的间接对象摘要，{objid: 摘要}
+        depth: 递归深度，防止异常文档无限递归
+    """
+    if depth > 32:
+        return
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in memo:
+            # 先占位，防止循环引用
+            memo[obj.objid] = ''
+            sub_digest = hashlib.sha256()
+            _fingerprint_object(resolve1(obj), sub_digest, memo, depth + 1)
+            memo[obj.objid] = sub_digest.hexdigest()
+        digest.update(memo[obj.objid].encode())
+    elif isinstance(obj, PDFStream):
+        if getattr(obj.get('Subtype'), 'name', None) == 'Image':
+            digest.update(f'image:{obj.get("Width")}x{obj.get("Height")}'.encode())
+            return
+        _fingerprint_object(obj.attrs, digest, memo, depth + 1)
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            if key in ('FontFile', 'FontFile2', 'FontFile3'):
+                continue
+            digest.update(f'/{key}'.encode())
+            _fingerprint_object(obj[key], digest, memo, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _fingerprint_object(item, digest, memo, depth + 1)
+        digest.update(b']')
+    elif isinstance(obj, (int, float)):
+        # 不同工具写出的PDF中同一数值可能是整数或浮点数
+        digest.update(f'{obj:.3f}'.encode())
+    else:
+        value = getattr(obj, 'name', obj)
+        if isinstance(value, bytes):
+            value = value.decode('latin-1')
+        digest.update(re.sub(r'^[A-Z]{6}\+', '', str(value)).encode('utf-8', 'replace'))
+
+
+def _is_plausible_title(text):
+    """
+    判断文本是否像论文标题：长度适中、以字母为主、不是期刊横幅或文件名
+    
+    Args:
+        text: 候选标题
+    
+    Returns:
+        是否可作为标题
+    """
+    if not text or not 10 <= len(text) <= 300:
+        return False
+    if TITLE_BANNER_PATTERN.search(text):
+        return False
+    letters = sum(1 for char in text if char.isalpha())
+    return letters / len(text) > 0.6
+
+
+def _title_from_font_size(page, region_ratio=TITLE_REGION_RATIO):
+    """
+    从第一页顶部区域中字号最大的连续文本中提取标题
+    
+    按字号从大到小依次尝试，跳过单个大号字母（首字下沉、徽标）和期刊横幅
+    
+    Args:
+        page: 第一页的pdfplumber页面对象
+        region_ratio: 只读取页面顶部该比例范围内的字符
+    
+    Returns:
+        标题字符串，找不到合适的文本时返回None
+    """
+    region_bottom = page.height * region_ratio
+    chars = [
+        char for char in page.chars
+        if char['upright'] and char['top'] < region_bottom and char['text'].strip()
+    ]
+    
+    sizes = sorted({round(char['size'], 1) for char in chars}, reverse=True)
+    for size in sizes[:5]:
+        size_chars = sorted(
+            (char for char in chars if round(char['size'], 1) == size),
+            key=lambda char: (char['top'], char['x0'])
+        )
         
-        # 发送请求获取PDF内容
-        session = requests.Session()
-        session.headers.update(DEFAULT_HEADERS)
-        response = session.get(pdf_url, stream=True)
-        response.raise_for_status()  # 如果状态码不是200，抛出异常
-        
-        # 将响应内容转换为字节流
-        pdf_bytes = io.BytesIO(response.content)
-        logger.info(f'成功获取PDF内容，大小: {len(response.content)/1024/1024:.2f}MB')
-        
-        text = []
-        with pdfplumber.open(pdf_bytes) as pdf:
-            # 确定要处理的页面范围
-            pages_to_process = pdf.pages
-            if max_pages and max_pages < len(pages_to_process):
-                pages_to_process = pages_to_process[:max_pages]
-                logger.info(f'限制处理页数为: {max_pages}')
-            
-            # 提取每一页的文本
-            for i, page in enumerate(pages_to_process):
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
+        # 按行距把同字号文字分成若干块，标题通常是其中一个连续的块
+        blocks = [[size_chars[0]]]
+        for previous, char in zip(size_chars, size_chars[1:]):
+            if char['top'] - previous['top'] > size * 2:
+                blocks.append([])
+            blocks[-1].append(char)
+        
+        for block in blocks:
+            if len(block) < 8:
+                continue
+            text = pdfplumber.utils.extract_text(block, x_tolerance=size * 0.15)
+            text = ' '.join(line.strip() for line in text.split('\n') if line.strip())
+            if _is_plausible_title(text):
+                return text
+    
+    return None
+
+
+def _guess_title_from_text(page_text, max_lines=10):
+    """
+    根据第一页文本的前几行猜测论文标题
+    
+    Args:
+        page_text: 第一页文本
+        max_lines: 检查前几行来寻找标题
+    
+    Returns:
+        标题字符串，如果无法判断则返回None
+    """
+    # 分割文本为行
+    lines = page_text.strip().split('\n')
+    # 过滤空行
+    lines = [line.strip() for line in lines if line.strip()]
+    
+    # 检查前几行，尝试找到标题
+    # 标题通常是第一页中较长且格式特殊的行
+    title_candidates = []
+    for i, line in enumerate(lines[:max_lines]):
+        # 标题特征：长度适中，包含多个单词，不包含数字或年份
+        # 跳过明显是作者信息的行（通常包含and或多个逗号）
+        if ' and ' in line.lower() or line.count(',') > 2:
+            continue
+        
+        # 跳过太短或太长的行
+        words = line.split()
+        if 2 <= len(words) <= 50:
+            # 检查是否可能是标题（通常首字母大写）
+            if sum(1 for word in words if word[0].isupper()) / len(words) > 0.5:
+                title_candidates.append((i, line))
+    
+    # 如果找到候选标题，返回最前面的一个
+    if title_candidates:
+        # 按位置排序，选择最前面的候选标题
+        title_candidates.sort(key=lambda x: x[0])
+        title = title_candidates[0][1]
+        logger.info(f'成功提取论文标题: {title}')
+        return title
+    
+    # 如果没有找到明显的标题，返回第一行非空行
+    elif lines:
+        logger.info(f'未找到明确的标题，使用第一行: {lines[0]}')
+        return lines[0]
+    
+    return None
+
+
+def _figure_description(page_text, fig_patterns, page_num, img_idx):
+    """
+    查找与图片相关的描述，使用页面中第一个图注编号
+    
+    Args:
+        page_text: 页面文本
+        fig_patterns: 用于识别图片的关键词模式列表
+        page_num: 页索引（从0开始）
+        img_idx: 图片在页面中的序号（从0开始）
+    
+    Returns:
+        描述字符串
+    """
+    for pattern in fig_patterns:
+        match = re.search(pattern, page_text)
+        if match:
+            return match.group()
+    return "图{}_{}".format(page_num+1, img_idx+1)
+
+
+def _iter_image_xobjects(resources, visited=None):
+    """
+    遍历页面资源中的图片XObject，包括嵌套在Form XObject中的图片
+    
+    Args:
+        resources: 页面或Form XObject的资源字典
+        visited: 已访问的Form XObject编号，防止循环引用
+    
+    Yields:
+        (名称, 图片数据流)元组
+    """
+    visited = visited if visited is not None else set()
+    xobjects = resolve1((resources or {}).get('XObject')) or {}
+    for name, ref in xobjects.items():
+        xobject = resolve1(ref)
+        if not isinstance(xobject, PDFStream):
+            continue
+        subtype = getattr(xobject.get('Subtype'), 'name', None)
+        if subtype == 'Image':
+            yield name, xobject
+        elif subtype == 'Form' and id(xobject) not in visited:
+            visited.add(id(xobject))
+            yield from _iter_image_xobjects(resolve1(xobject.get('Resources')), visited)
+
+
+def _log_page_cache_hits(kind, hits, total):
+    """
+    记录单个文档的页面缓存命中率
+    
+    Args:
+        kind: 提取内容类型，用于日志
+        hits: 命中页数
+        total: 查询页数
+    """
+    if total:
+        logger.info(f'页面{kind}缓存命中 {hits}/{total} 页，命中率: {hits/total:.0%}')
+
+
+def _iter_form_streams(resources, visited=None):
+    """
+    遍历资源中的Form XObject（递归），用于统计其中绘制的线段
+    
+    Args:
+        resources: 页面或Form XObject的资源字典
+        visited: 已访问的Form XObject编号，防止循环引用
+    
+    Yields:
+        Form XObject数据流
+    """
+    visited = visited if visited is not None else set()
+    xobjects = resolve1((resources or {}).get('XObject')) or {}
+    for ref in xobjects.values():
+        xobject = resolve1(ref)
+        if isinstance(xobject, PDFStream) and getattr(xobject.get('Subtype'), 'name', None) == 'Form' and id(xobject) not in visited:
+            visited.add(id(xobject))
+            yield xobject
+            yield from _iter_form_streams(resolve1(xobject.get('Resources')), visited)
+
+
+def _count_stream_rulings(data, limit=None):
+    """
+    统计内容流中被描边或填充的线段数量
+    
+    每个re（矩形）计4条边，每个l（直线）计1条边；路径以n（仅用作裁剪区域）结束时不计入，
+    字符串、注释和内嵌图像数据中的字节不会被当作操作符
+    
+    Args:
+        data: 解码后的内容流字节串
+        limit: 达到该数量后停止扫描，None表示扫描整个数据流
+    
+    Returns:
+        线段数量，提供limit时可能在达到limit后提前返回
+    """
+    rulings = 0
+    path_segments = 0
+    pos = 0
+    while pos < len(data):
+        next_pos = len(data)
+        for match in CONTENT_TOKEN_PATTERN.finditer(data, pos):
+            token = match.group()
+            if token == b're':
+                path_segments += 4
+            elif token == b'l':
+                path_segments += 1
+            elif token in PATH_PAINT_OPERATORS:
+                rulings += path_segments
+                path_segments = 0
+                if limit is not None and rulings >= limit:
+                    return rulings
+            elif token == b'n':
+                path_segments = 0
+            elif token == b'ID':
+                # 跳过内嵌图像的二进制数据，从结束标记之后继续扫描
+                end = INLINE_IMAGE_END_PATTERN.search(data, match.end())
+                next_pos = end.end() if end else len(data)
+                break
+        pos = next_pos
+    return rulings
+
+
+def _count_rulings(page, limit=None):
+    """
+    直接扫描页面内容流，估算可作为表格边框的线段数量
+    
+    不做版面解析，只统计被描边或填充的re和l路径（LaTeX的表格横线是填充的细矩形）。
+    这是启发式估计：图表、坐标轴和下划线同样会被计入，误差主要偏向多做完整提取；
+    漏判（跳过实际含表格的页面）只发生在表格没有用re/l画出的边框线（无框线表格、
+    以图片或曲线绘制的边框）且页面文本中也没有表格标题时
+    
+    Args:
+        page: pdfplumber页面对象
+        limit: 达到该数量后停止扫描，None表示扫描所有内容流
+    
+    Returns:
+        线段数量估计值
+    """
+    contents = resolve1(page.page_obj.contents) or []
+    if not isinstance(contents, list):
+        contents = [contents]
+    streams = [resolve1(stream) for stream in contents]
+    streams.extend(_iter_form_streams(page.page_obj.resources))
+    
+    rulings = 0
+    for stream in streams:
+        if isinstance(stream, PDFStream):
+            rulings += _count_stream_rulings(stream.get_data(), None if limit is None else limit - rulings)
+            if limit is not None and rulings >= limit:
+                break
+    return rulings
+
+
+def _is_table_candidate(page, page_text=None):
+    """
+    判断页面是否可能包含表格（廉价预筛选，避免对每页做完整的表格提取）
+    
+    Args:
+        page: pdfplumber页面对象
+        page_text: 页面文本或返回页面文本的函数，用于查找表格标题，函数只在线段数量不足以判断时调用；
+                   None表示不检查标题
+    
+    Returns:
+        是否需要对该页做完整的表格提取
+    """
+    rulings = _count_rulings(page, limit=TABLE_MIN_RULINGS)
+    # 少于4条边无法围成单元格
+    if rulings < 4:
+        return False
+    if rulings >= TABLE_MIN_RULINGS:
+        return True
+    if callable(page_text):
+        page_text = page_text()
+    return bool(page_text and TABLE_CAPTION_PATTERN.search(page_text))
+
+
+def _image_mode(stream):
+    """
+    根据颜色空间确定PIL图像模式
+    
+    Args:
+        stream: 图片数据流
+    
+    Returns:
+        (PIL模式, 调色板字节)元组，不支持的颜色空间返回(None, None)
+    """
+    bits = stream.get('BitsPerComponent', 8)
+    if stream.get('ImageMask'):
+        return ('1', None) if bits == 1 else (None, None)
+    
+    colorspace = resolve1(stream.get('ColorSpace'))
+    if isinstance(colorspace, list) and colorspace:
+        family = getattr(colorspace[0], 'name', None)
+        if family == 'ICCBased':
+            components = resolve1(colorspace[1]).get('N', 3)
+            mode = {1: 'L', 3: 'RGB', 4: 'CMYK'}.get(components)
+            return (mode, None) if bits == 8 else (None, None)
+        if family == 'Indexed' and bits == 8:
+            base = resolve1(colorspace[1])
+            base_name = getattr(base, 'name', None)
+            if isinstance(base, list):
+                base_name = getattr(base[0], 'name', None)
+                if base_name == 'ICCBased' and resolve1(base[1]).get('N') == 3:
+                    base_name = 'DeviceRGB'
+            lookup = resolve1(colorspace[3])
+            lookup = lookup.get_data() if isinstance(lookup, PDFStream) else lookup
+            if base_name == 'DeviceRGB' and isinstance(lookup, bytes):
+                return 'P', lookup
+        return None, None
+    
+    name = getattr(colorspace, 'name', None)
+    if name == 'DeviceGray':
+        return {1: '1', 8: 'L'}.get(bits), None
+    if name == 'DeviceRGB' and bits == 8:
+        return 'RGB', None
+    if name == 'DeviceCMYK' and bits == 8:
+        return 'CMYK', None
+    return None, None
+
+
+def _decode_array(stream, mode):
+    """
+    读取图片的/Decode数组
+    
+    Args:
+        stream: 图片数据流
+        mode: _image_mode返回的PIL模式
+    
+    Returns:
+        与默认映射不同的Decode数组（浮点数列表），未设置或等于默认值时返回None
+    """
+    decode = resolve1(stream.get('Decode'))
+    if not decode:
+        return None
+    decode = [float(resolve1(value)) for value in decode]
+    # 索引颜色的默认映射为[0 2^bits-1]，其他颜色空间和图像掩码每个分量为[0 1]
+    default = [0.0, 255.0] if mode == 'P' else [0.0, 1.0] * (len(decode) // 2)
+    return None if decode == default else decode
+
+
+def _apply_decode(image, decode):
+    """
+    按/Decode数组重新映射各通道的取值，如 [1 0] 表示反相（常见于图像掩码和CMYK图片）
+    
+    Args:
+        image: 按原始采样值解码的PIL图像
+        decode: 非默认的Decode数组
+    
+    Returns:
+        重新映射后的图像，无法处理时（索引颜色、分量数不符）返回None
+    """
+    if image.mode == 'P':
+        return None
+    if image.mode == '1':
+        # 1位图像转为灰度后按8位映射，采样值0/1对应0/255
+        image = image.convert('L')
+    bands = image.split()
+    if len(decode) != 2 * len(bands):
+        return None
+    bands = [
+        band.point([max(0, min(255, round((low + (high - low) * value / 255) * 255))) for value in range(256)])
+        for band, (low, high) in zip(bands, zip(decode[::2], decode[1::2]))
+    ]
+    return Image.merge(image.mode, bands)
+
+
+def _save_image_stream(stream, base_path):
+    """
+    直接导出图片数据流，不经过页面渲染
+    
+    JPEG和JPEG2000数据原样写出，其他图片解码后保存为PNG；
+    设置了/Decode的图片（如反相的图像掩码）按Decode数组映射颜色，
+    CMYK或设置了/Decode的JPEG无法原样写出正确颜色，返回None回退为渲染
+    
+    Args:
+        stream: 图片数据流
+        base_path: 不含扩展名的保存路径
+    
+    Returns:
+        保存的文件路径，无法解码时返回None
+    """
+    filters = [getattr(f, 'name', str(f)) for f, _ in stream.get_filters()]
+    mode, palette = _image_mode(stream)
+    decode = _decode_array(stream, mode)
+    if filters in (['DCTDecode'], ['JPXDecode']):
+        # CMYK的JPEG常以反相存储并依赖/Decode还原，原样写出会颜色错误
+        if decode is not None or mode == 'CMYK':
+            return None
+        img_path = base_path + ('.jpg' if filters[0] == 'DCTDecode' else '.jp2')
+        with open(img_path, 'wb') as f:
+            # get_data不解码JPEG数据，只在加密文档中解密，原始数据在加密文档中仍是密文
+            f.write(stream.get_data())
+        return img_path
+    
+    if mode is None or any(f not in ('FlateDecode', 'LZWDecode', 'RunLengthDecode', 'ASCIIHexDecode', 'ASCII85Decode') for f in filters):
+        return None
+    
+    image = Image.frombytes(mode, (stream['Width'], stream['Height']), stream.get_data())
+    if palette:
+        image.putpalette(palette)
+    if decode is not None:
+        image = _apply_decode(image, decode)
+        if image is None:
+            return None
+    if mode == 'CMYK':
+        # PNG不支持CMYK
+        image = image.convert('RGB')
+    img_path = base_path + '.png'
+    image.save(img_path)
+    return img_path
+
+
+def _render_image(page, name, base_path):
+    """
+    渲染裁剪图片所在区域（无法直接导出时的回退方式）
+    
+    Args:
+        page: pdfplumber页面对象
+        name: 图片XObject名称
+        base_path: 不含扩展名的保存路径
+    
+    Returns:
+        保存的文件路径，页面中找不到该图片时返回None
+    """
+    for img in page.images:
+        if img.get('name') == name:
+            img_path = base_path + '.png'
+            page.crop((img['x0'], img['top'], img['x1'], img['bottom'])).to_image(resolution=300).save(img_path)
+            return img_path
+    return None
+
+
+def _extract_embedded_images(document, page_indices, output_dir, fig_patterns):
+    """
+    导出指定页面中嵌入的图片，按内容哈希去重
+    
+    Args:
+        document: PDFDocument实例
+        page_indices: 要处理的页索引
+        output_dir: 图片保存目录
+        fig_patterns: 用于识别图片的关键词模式列表
+    
+    Returns:
+        图片信息列表，每项额外包含图片数据的哈希值
+    """
+    extracted_images = []
+    seen_hashes = set()
+    duplicates = 0
+    fallbacks = 0
+    
+    for page_num in page_indices:
+        page = document.pdf.pages[page_num]
+        image_streams = list(_iter_image_xobjects(page.page_obj.resources))
+        if not image_streams:
+            continue
+        page_text = document.page_text(page_num)
+        
+        for img_idx, (name, stream) in enumerate(image_streams):
+            try:
+                # 跨页重复出现的图片（如logo、页眉）只保存一次；按解码后的数据计算哈希，
+                # pdfminer解码后会清空原始数据，同一对象在后续页面再次出现时无法读取原始数据
+                digest = hash_bytes(stream.get_data())
+                if digest in seen_hashes:
+                    duplicates += 1
+                    continue
                 
-                # 记录进度
-                if (i + 1) % 10 == 0 or (i + 1) == len(pages_to_process):
-                    logger.info(f'已处理第 {i+1}/{len(pages_to_process)} 页')
+                base_path = os.path.join(output_dir, f"fig_page_{page_num+1}_img_{img_idx+1}")
+                img_path = _save_image_stream(stream, base_path)
+                if img_path is None:
+                    img_path = _render_image(page, name, base_path)
+                    fallbacks += 1
+                if img_path is None:
+                    continue
+                
+                seen_hashes.add(digest)
+                extracted_images.append({
+                    'path': img_path,
+                    # 获取相对路径，用于markdown引用
+                    'relative_path': os.path.relpath(img_path),
+                    'page': page_num + 1,
+                    'description': _figure_description(page_text, fig_patterns, page_num, img_idx),
+                    'hash': digest
+                })
+            except Exception as e:
+                logger.warning(f'提取第{page_num+1}页第{img_idx+1}张图片时出错: {str(e)}')
+        release_page(page)
+    
+    if duplicates or fallbacks:
+        logger.info(f'跳过 {duplicates} 张重复图片，{fallbacks} 张图片回退为渲染裁剪')
+    return extracted_images
+
+
+def _extract_images_range(pdf_path, start, end, output_dir, fig_patterns, backend_name=None):
+    """在独立进程中导出指定页码范围内的图片（供进程池调用）"""
+    with PDFDocument(pdf_path, backend=backend_name) as document:
+        return _extract_embedded_images(document, range(start, end), output_dir, fig_patterns)
+
+
+def _extract_images_parallel(pdf_path, num_pages, output_dir, fig_patterns, workers, backend_name=None):
+    """
+    使用进程池按页码区间并行导出图片，合并时按页码顺序去除跨区间的重复图片
+    
+    Args:
+        pdf_path: PDF文件路径
+        num_pages: 文档页数
+        output_dir: 图片保存目录
+        fig_patterns: 用于识别图片的关键词模式列表
+        workers: 工作进程数
+        backend_name: 查找图注时使用的文本解析后端名称
+    
+    Returns:
+        按页码顺序排列的图片信息列表
+    """
+    chunk_count = min(num_pages, workers * 2)
+    chunk_size = -(-num_pages // chunk_count)
+    ranges = [(start, min(start + chunk_size, num_pages)) for start in range(0, num_pages, chunk_size)]
+    
+    extracted_images = []
+    seen_hashes = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _extract_images_range,
+            [pdf_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [output_dir] * len(ranges),
+            [fig_patterns] * len(ranges),
+            [backend_name] * len(ranges)
+        )
+        for chunk_images in results:
+            for image in chunk_images:
+                if image['hash'] in seen_hashes:
+                    os.remove(image['path'])
+                    continue
+                seen_hashes.add(image['hash'])
+                extracted_images.append(image)
+    
+    return extracted_images
+
+
+class PDFDocument:
+    """
+    PDF文档会话
+    
+    同一个PDF只打开一次，文本、标题、元数据、表格和图片都基于同一份解析结果按需计算，
+    已提取的页面文本会保留下来供后续调用复用。
+    正文文本和元数据由可选的解析后端提供；标题（按字号识别）、表格、图片和页面指纹依赖字符和版面对象，
+    始终使用pdfplumber，只有字号和元数据都找不到标题时才根据后端提取的首页文本猜测。
+    """
+    
+    def __init__(self, source, content_hash=None, backend=None):
+        """
+        初始化文档会话（此时不会打开文件）
+        
+        Args:
+            source: PDF文件路径或可读取的二进制文件对象
+            content_hash: PDF内容的SHA-256，None表示需要时再计算
+            backend: 文本解析后端名称，None表示使用默认后端（环境变量PDF_BACKEND）
+        """
+        self.source = source
+        self.pdf_path = source if isinstance(source, (str, os.PathLike)) else None
+        self.backend = get_backend(backend)
+        self._content_hash = content_hash
+        self._doc = None
+        self._pdf = None
+        self._page_texts = {}
+        self._page_fingerprints = {}
+        self._fingerprint_memo = {}
+        self._title = None
+        self._metadata = None
+        self._tables = None
+        self._sections = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def doc(self):
+        """解析后端的文档对象，首次访问时打开"""
+        if self._doc is None:
+            if isinstance(self.backend, PdfplumberBackend):
+                self._doc = self.pdf
+            else:
+                self._doc = self.backend.open(self.pdf_path or self.source)
+        return self._doc
+    
+    @property
+    def pdf(self):
+        """底层的pdfplumber文档对象，首次访问时打开；后端为pdfplumber时与doc是同一个对象"""
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path or self.source)
+        return self._pdf
+    
+    @property
+    def content_hash(self):
+        """PDF内容的SHA-256，用于提取缓存"""
+        if self._content_hash is None:
+            if self.pdf_path:
+                self._content_hash = hash_file(self.pdf_path)
+            else:
+                position = self.source.tell()
+                self.source.seek(0)
+                self._content_hash = hash_bytes(self.source.read())
+                self.source.seek(position)
+        return self._content_hash
+    
+    @property
+    def num_pages(self):
+        """文档总页数"""
+        return self.backend.page_count(self.doc)
+    
+    def page_fingerprint(self, index):
+        """
+        页面指纹：页面内容流、资源和页面尺寸的SHA-256
+        
+        同一论文的不同版本中未改动的页面指纹相同，可以复用页面级提取缓存
+        
+        Args:
+            index: 页索引（从0开始）
+        
+        Returns:
+            十六进制摘要字符串
+        """
+        if index not in self._page_fingerprints:
+            page_obj = self.pdf.pages[index].page_obj
+            digest = hashlib.sha256()
+            _fingerprint_object(
+                [page_obj.mediabox, page_obj.cropbox, page_obj.rotate, page_obj.resources, page_obj.contents],
+                digest, self._fingerprint_memo
+            )
+            self._page_fingerprints[index] = digest.hexdigest()
+        return self._page_fingerprints[index]
+    
+    def page_text(self, index, retain=True):
+        """
+        获取单页文本，同一页只解析一次
+        
+        解析完成后立即释放该页的版面对象缓存，避免大文档的字符和线条对象一直占用内存
+        
+        Args:
+            index: 页索引（从0开始）
+            retain: 是否在会话中保留该页文本供后续复用
+        
+        Returns:
+            页面文本字符串，没有文本时返回空字符串
+        """
+        if index in self._page_texts:
+            return self._page_texts[index]
+        
+        page_text = self.backend.page_text(self.doc, index)
+        if retain:
+            self._page_texts[index] = page_text
+        return page_text
+    
+    def iter_pages(self, max_pages=None, retain=False):
+        """
+        逐页生成文本，每页解析后即释放版面对象缓存
+        
+        Args:
+            max_pages: 最大处理页数，None表示处理所有页面
+            retain: 是否在会话中保留已生成的页面文本
+        
+        Yields:
+            (页索引, 页面文本)元组，页索引从0开始
+        """
+        num_pages = self.num_pages
+        if max_pages and max_pages < num_pages:
+            num_pages = max_pages
+        
+        for i in range(num_pages):
+            yield i, self.page_text(i, retain=retain)
+            
+            # 记录进度
+            if (i + 1) % 10 == 0 or (i + 1) == num_pages:
+                logger.info(f'已处理第 {i+1}/{num_pages} 页')
+    
+    def load_pages(self, max_pages=None, workers=None, use_cache=True, token_budget=None):
+        """
+        提取各页文本并保留在会话中，已提取或命中页面缓存的页面不再解析
+        
+        Args:
+            max_pages: 最大处理页数，None表示处理所有页面
+            workers: 并行提取的进程数，None或1表示串行处理
+            use_cache: 是否使用页面级提取缓存
+            token_budget: 输入token预算，设置后逐页串行提取并在预算用完后提前停止
+        
+        Returns:
+            已加载的页数（从第一页开始连续的页数）
+        """
+        # 确定要处理的页面范围
+        num_pages = self.num_pages
+        if max_pages and max_pages < num_pages:
+            num_pages = max_pages
+            logger.info(f'限制处理页数为: {max_pages}')
+        
+        pending = [i for i in range(num_pages) if i not in self._page_texts]
+        
+        # 按页面指纹查找页面缓存，修订版PDF只需要解析改动过的页面
+        page_keys = {}
+        if use_cache and extraction_cache.enabled:
+            page_keys = {i: _cache_key(self.page_fingerprint(i), 'page_text', self.backend) for i in pending}
+            for i, page_key in page_keys.items():
+                cached_page = extraction_cache.get(page_key)
+                if cached_page is not None:
+                    self._page_texts[i] = cached_page
+            pending = [i for i in pending if i not in self._page_texts]
+            _log_page_cache_hits('文本', len(page_keys) - len(pending), len(page_keys))
+        
+        use_parallel = bool(
+            self.pdf_path and workers and workers > 1
+            and len(pending) >= PARALLEL_MIN_PAGES
+        )
+        if token_budget:
+            num_pages = self._load_pages_within_budget(num_pages, token_budget)
+        elif use_parallel:
+            # 每个工作进程独立打开文档，结果按页码顺序合并
+            logger.info(f'使用 {workers} 个进程并行提取 {len(pending)} 页文本')
+            page_texts = _extract_pages_parallel(self.pdf_path, pending, workers, self.backend.name)
+            self._page_texts.update(zip(pending, page_texts))
+        else:
+            # 逐页提取文本，只保留文本本身
+            for _ in self.iter_pages(num_pages, retain=True):
+                pass
+        
+        for i in pending:
+            if i in page_keys and i in self._page_texts:
+                extraction_cache.set(page_keys[i], self._page_texts[i])
+        
+        return num_pages
+    
+    def _load_pages_within_budget(self, num_pages, token_budget):
+        """
+        逐页提取文本并累计估算token数，满足以下任一条件时停止：
+        已提取的文本超过预算的TOKEN_BUDGET_OVERSCAN倍；或预算已用完且已经读到附录
+        
+        Args:
+            num_pages: 最大处理页数
+            token_budget: 输入token预算
+        
+        Returns:
+            已加载的页数
+        """
+        tokens = 0
+        appendix_seen = False
+        for i in range(num_pages):
+            page_text = self.page_text(i)
+            tokens += estimate_tokens(page_text)
+            appendix_seen = appendix_seen or any(
+                (match_heading(line.strip()) or ('',))[0] == 'appendix' for line in page_text.split('\n')
+            )
+            
+            if tokens >= token_budget * TOKEN_BUDGET_OVERSCAN or (tokens >= token_budget and appendix_seen):
+                if i + 1 < num_pages:
+                    logger.info(f'已提取 {i+1}/{num_pages} 页，预估 {tokens} token，超出token预算 {token_budget}，停止提取')
+                return i + 1
+        
+        logger.info(f'已提取全部 {num_pages} 页，预估 {tokens} token')
+        return num_pages
+    
+    def get_text(self, max_pages=None, workers=None, use_cache=True, token_budget=None):
+        """
+        提取文档文本
+        
+        Args:
+            max_pages: 最大处理页数，None表示处理所有页面
+            workers: 并行提取的进程数，None或1表示串行处理；
+                     页数少于PARALLEL_MIN_PAGES的小文档始终串行处理
+            use_cache: 是否使用提取缓存
+            token_budget: 输入token预算（不含参考文献），None表示不限制；
+                          设置后逐页串行提取，预算用完后提前停止，
+                          超出预算时优先保留摘要、方法、实验和结论，附录最先舍弃
+        
+        Returns:
+            提取的文本内容字符串
+        """
+        # 相同内容的PDF直接使用缓存结果
+        cache_key = None
+        if use_cache and extraction_cache.enabled:
+            params = {'max_pages': max_pages}
+            if token_budget:
+                params.update(token_budget=token_budget, version=SECTION_INDEX_VERSION)
+            cache_key = _cache_key(self.content_hash, 'text', self.backend, **params)
+            cached_text = extraction_cache.get(cache_key)
+            if cached_text is not None:
+                logger.info(f'命中提取缓存，跳过PDF解析: {self.pdf_path or "内存文档"}')
+                return cached_text
+        
+        num_pages = self.load_pages(max_pages=max_pages, workers=workers, use_cache=use_cache, token_budget=token_budget)
         
         # 将所有页面的文本合并
-        full_text = '\n\n'.join(text)
-        logger.info(f'从PDF URL中提取文本完成，总字符数: {len(full_text)}')
+        text = [self._page_texts[i] for i in range(num_pages) if self._page_texts[i]]
+        full_text = PAGE_SEPARATOR.join(text)
+        if token_budget:
+            sections = self.get_sections(max_pages=num_pages, use_cache=use_cache)
+            full_text = select_sections(full_text, sections, token_budget)
+        logger.info(f'从PDF中提取文本完成，总字符数: {len(full_text)}')
+        
+        if cache_key:
+            extraction_cache.set(cache_key, full_text)
         
         return full_text
+    
+    @property
+    def text(self):
+        """全文文本"""
+        return self.get_text()
+    
+    def get_sections(self, max_pages=None, use_cache=True):
+        """
+        生成章节索引，字符偏移与get_text返回的全文一致
+        
+        先按文本中的标题编号和关键词识别；识别到的章节少于SECTION_MIN_KNOWN个时（双栏标题与正文混排），
+        再读取页面字体，用粗体或大字号短语作为标题线索重新识别
+        
+        Args:
+            max_pages: 最大处理页数，None表示处理所有页面
+            use_cache: 是否使用提取缓存
+        
+        Returns:
+            章节列表，每项包含name、title、start、end、page_start、page_end
+        """
+        if max_pages in self._sections:
+            return self._sections[max_pages]
         
+        cache_key = None
+        if use_cache and extraction_cache.enabled:
+            cache_key = _cache_key(
+                self.content_hash, 'sections', self.backend, max_pages=max_pages, version=SECTION_INDEX_VERSION
+            )
+            cached_sections = extraction_cache.get(cache_key)
+            if cached_sections is not None:
+                logger.info(f'命中提取缓存，章节数: {len(cached_sections)}')
+                self._sections[max_pages] = cached_sections
+                return cached_sections
+        
+        num_pages = self.load_pages(max_pages=max_pages, use_cache=use_cache)
+        pages = [(i + 1, self._page_texts[i]) for i in range(num_pages) if self._page_texts[i]]
+        sections = build_section_index(pages)
+        
+        if sum(section['name'] not in ('front', 'other') for section in sections) < SECTION_MIN_KNOWN:
+            logger.info('按文本识别到的章节过少，使用字体线索重新识别')
+            font_headings = {}
+            for page_number, _ in pages:
+                page = self.pdf.pages[page_number - 1]
+                font_headings[page_number] = find_font_headings(page)
+                release_page(page)
+            sections = build_section_index(pages, font_headings)
+        
+        if cache_key:
+            extraction_cache.set(cache_key, sections)
+        self._sections[max_pages] = sections
+        return sections
+    
+    @property
+    def sections(self):
+        """全文章节索引"""
+        return self.get_sections()
+    
+    def get_section(self, names, max_pages=None):
+        """
+        按章节类型截取文本
+        
+        Args:
+            names: 章节类型名称或名称列表，如'abstract'、['method', 'experiments']
+            max_pages: 最大处理页数，None表示处理所有页面
+        
+        Returns:
+            章节文本，没有匹配的章节时返回空字符串
+        """
+        sections = self.get_sections(max_pages=max_pages)
+        return get_section_text(self.get_text(max_pages=max_pages), sections, names)
+    
+    def get_title(self, max_lines=10, use_cache=True):
+        """
+        提取论文标题
+        
+        Args:
+            max_lines: 检查前几行来寻找标题
+            use_cache: 是否使用提取缓存
+        
+        Returns:
+            提取的论文标题字符串，如果无法提取则返回None
+        """
+        if self._title is not None:
+            return self._title
+        
+        # 相同内容的PDF直接使用缓存结果
+        cache_key = None
+        if use_cache and extraction_cache.enabled:
+            cache_key = _cache_key(self.content_hash, 'title', self.backend, max_lines=max_lines, method='font-size')
+            cached_title = extraction_cache.get(cache_key)
+            if cached_title is not None:
+                logger.info(f'命中提取缓存，论文标题: {cached_title}')
+                self._title = cached_title
+                return cached_title
+        
+        if not self.num_pages:
+            logger.warning(f'PDF文件没有页面: {self.pdf_path}')
+            return None
+        
+        # 优先使用第一页顶部字号最大的文本，其次使用元数据中的标题
+        page = self.pdf.pages[0]
+        title = _title_from_font_size(page)
+        release_page(page)
+        if title:
+            logger.info(f'根据字号提取到论文标题: {title}')
+        else:
+            metadata_title = str((self.pdf.metadata or {}).get('Title') or '').strip()
+            if _is_plausible_title(metadata_title):
+                title = metadata_title
+                logger.info(f'使用PDF元数据中的论文标题: {title}')
+        
+        # 最后根据第一页文本的前几行猜测
+        if not title:
+            page_text = self.page_text(0)
+            if not page_text:
+                logger.warning(f'无法从PDF中提取文本: {self.pdf_path}')
+                return None
+            title = _guess_title_from_text(page_text, max_lines)
+        
+        self._title = title
+        if self._title and cache_key:
+            extraction_cache.set(cache_key, self._title)
+        return self._title
+    
+    @property
+    def title(self):
+        """论文标题"""
+        return self.get_title()
+    
+    @property
+    def metadata(self):
+        """PDF元数据，附加页数和文件大小"""
+        if self._metadata is None:
+            metadata = self.backend.metadata(self.doc)
+            # 添加一些基本信息
+            metadata['num_pages'] = self.num_pages
+            if self.pdf_path:
+                metadata['file_size'] = os.path.getsize(self.pdf_path) / 1024 / 1024  # MB
+            self._metadata = metadata
+        return self._metadata
+    
+    def get_tables(self, pages=None, prefilter=True, use_cache=True):
+        """
+        提取表格
+        
+        Args:
+            pages: 要提取表格的页面索引列表，None表示所有页面
+            prefilter: 是否先根据边框线段数量和表格标题跳过不可能包含表格的页面
+            use_cache: 是否使用页面级提取缓存
+        
+        Returns:
+            提取的表格列表，每个表格是二维列表
+        """
+        if pages is None and prefilter and self._tables is not None:
+            return self._tables
+        
+        tables = []
+        # 确定要处理的页面
+        page_indices = range(self.num_pages)
+        if pages:
+            page_indices = [i for i in pages if i < self.num_pages]
+        
+        # 提取每一页的表格
+        skipped = 0
+        cache_hits = 0
+        cache_lookups = 0
+        for i in page_indices:
+            page = self.pdf.pages[i]
+            # 线段较少的页面需要用文本查找表格标题，文本未提取时（如全文命中缓存）按需解析该页，
+            # 保证预筛选结果与是否命中缓存无关
+            if prefilter and not _is_table_candidate(page, lambda: self.page_text(i)):
+                skipped += 1
+                continue
+            
+            page_key = None
+            page_tables = None
+            if use_cache and extraction_cache.enabled:
+                # 表格始终由pdfplumber提取，与文本解析后端无关
+                page_key = extraction_cache.make_key(
+                    self.page_fingerprint(i), 'page_tables', pdfplumber_version=pdfplumber.__version__
+                )
+                page_tables = extraction_cache.get(page_key)
+                cache_lookups += 1
+            if page_tables is not None:
+                cache_hits += 1
+            else:
+                page_tables = page.extract_tables()
+                release_page(page)
+                if page_key:
+                    extraction_cache.set(page_key, page_tables)
+            
+            if page_tables:
+                tables.extend(page_tables)
+                logger.info(f'从第 {i+1} 页提取到 {len(page_tables)} 个表格')
+        
+        if prefilter:
+            logger.info(f'表格预筛选跳过 {skipped}/{len(page_indices)} 页')
+        if cache_lookups:
+            _log_page_cache_hits('表格', cache_hits, cache_lookups)
+        logger.info(f'总共提取到 {len(tables)} 个表格')
+        if pages is None and prefilter:
+            self._tables = tables
+        return tables
+    
+    @property
+    def tables(self):
+        """全部表格"""
+        return self.get_tables()
+    
+    def extract_images(self, output_dir=None, fig_patterns=None, mode='embedded', workers=None):
+        """
+        提取图片，特别是Fig和Figure字段的图片
+        
+        Args:
+            output_dir: 图片保存目录
+            fig_patterns: 用于识别图片的关键词模式列表
+            mode: 提取方式，'embedded'直接导出嵌入的图片数据流，不渲染页面，
+                  无法解码的图片回退为渲染裁剪；'render'按图片区域裁剪页面并以300 DPI渲染
+            workers: embedded模式下并行处理页面的进程数，None或1表示串行处理
+        
+        Returns:
+            提取的图片信息列表，包含图片路径和相关描述
+        """
+        # 默认关键词模式
+        if fig_patterns is None:
+            fig_patterns = [r'Fig\.?\s+\d+', r'Figure\s+\d+', r'图\s*\d+']
+        
+        # 确保输出目录存在
+        if not output_dir:
+            # 默认保存在当前目录的images文件夹
+            output_dir = 'images'
+        
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        
+        if mode == 'render':
+            extracted_images = self._extract_rendered_images(output_dir, fig_patterns)
+        elif mode == 'embedded':
+            num_pages = self.num_pages
+            if self.pdf_path and workers and workers > 1 and num_pages >= PARALLEL_MIN_PAGES:
+                logger.info(f'使用 {workers} 个进程并行提取 {num_pages} 页中的图片')
+                extracted_images = _extract_images_parallel(
+                    self.pdf_path, num_pages, output_dir, fig_patterns, workers, self.backend.name
+                )
+            else:
+                extracted_images = _extract_embedded_images(self, range(num_pages), output_dir, fig_patterns)
+        else:
+            raise ValueError(f'不支持的图片提取方式: {mode}')
+        
+        logger.info(f'从PDF中提取完成，共提取到{len(extracted_images)}张图片')
+        return extracted_images
+    
+    def _extract_rendered_images(self, output_dir, fig_patterns):
+        """按图片区域裁剪页面并渲染保存"""
+        extracted_images = []
+        
+        for page_num, page in enumerate(self.pdf.pages):
+            # 复用已提取的页面文本查找图片描述
+            page_text = self.page_text(page_num)
+            
+            # 提取页面中的图片
+            images = page.images
+            for img_idx, img in enumerate(images):
+                try:
+                    # 获取图片对象
+                    x0, y0, x1, y1 = img['x0'], img['y0'], img['x1'], img['y1']
+                    # 裁剪页面以获取图片区域
+                    img_cropped = page.crop((x0, y0, x1, y1))
+                    
+                    # 获取图片数据
+                    img_obj = img_cropped.to_image(resolution=300)
+                    
+                    # 保存图片
+                    img_filename = f"fig_page_{page_num+1}_img_{img_idx+1}.png"
+                    img_path = os.path.join(output_dir, img_filename)
+                    img_obj.save(img_path)
+                    
+                    extracted_images.append({
+                        'path': img_path,
+                        # 获取相对路径，用于markdown引用
+                        'relative_path': os.path.relpath(img_path),
+                        'page': page_num + 1,
+                        'description': _figure_description(page_text, fig_patterns, page_num, img_idx)
+                    })
+                except Exception as e:
+                    logger.warning(f'提取第{page_num+1}页第{img_idx+1}张图片时出错: {str(e)}')
+        
+        return extracted_images
+    
+    def move(self, new_path):
+        """
+        重命名文档文件，已解析的结果继续保留
+        
+        Args:
+            new_path: 新的文件路径
+        """
+        old_path = self.pdf_path
+        # Windows上不能重命名已打开的文件，先释放文件句柄，需要时再重新打开
+        if os.name == 'nt':
+            self.close()
+        os.rename(old_path, new_path)
+        self.pdf_path = self.source = new_path
+        
+        # 同步更新共享会话的登记
+        old_key = os.path.abspath(old_path)
+        if _shared_documents.get(old_key) is self:
+            del _shared_documents[old_key]
+            _shared_documents[os.path.abspath(new_path)] = self
+    
+    def close(self):
+        """关闭底层文件，已提取的结果仍可使用"""
+        if self._doc is not None and self._doc is not self._pdf:
+            self.backend.close(self._doc)
+        self._doc = None
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+
+# 下载器和分析器共享的文档会话，按最近使用顺序保留少量文档
+_shared_documents = OrderedDict()
+MAX_SHARED_DOCUMENTS = 4
+
+
+def open_document(pdf_path, backend=None):
+    """
+    获取PDF文件的共享文档会话，同一文件在下载、重命名和分析之间只解析一次
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: 文本解析后端名称，None表示使用默认后端
+    
+    Returns:
+        PDFDocument实例
+    """
+    key = os.path.abspath(pdf_path)
+    document = _shared_documents.get(key)
+    # 已登记的会话使用了其他后端时重新创建
+    if document is not None and backend and document.backend.name != backend.lower():
+        close_document(pdf_path)
+        document = None
+    if document is None:
+        document = PDFDocument(pdf_path, backend=backend)
+        _shared_documents[key] = document
+        # 超出数量上限时关闭最久未使用的文档
+        while len(_shared_documents) > MAX_SHARED_DOCUMENTS:
+            _, evicted = _shared_documents.popitem(last=False)
+            evicted.close()
+    else:
+        _shared_documents.move_to_end(key)
+    return document
+
+
+def close_document(pdf_path):
+    """
+    关闭并释放共享文档会话
+    
+    Args:
+        pdf_path: PDF文件路径
+    """
+    document = _shared_documents.pop(os.path.abspath(pdf_path), None)
+    if document is not None:
+        document.close()
+
+
+def _open_pdf_url(pdf_url, partial=False, fallback=True, timeout=None, max_size_mb=None):
+    """
+    打开远程PDF
+    
+    Args:
+        pdf_url: PDF文件的URL链接
+        partial: 是否优先使用Range请求只获取需要的部分
+        fallback: Range请求不可用时是否回退到完整下载
+        timeout: 请求超时时间（秒）
+        max_size_mb: 完整下载时允许的最大文件大小（MB）
+    
+    Returns:
+        (文件对象, 内容哈希)元组；内容哈希为None表示无法确定内容，不应使用缓存。
+        不回退且Range请求不可用时返回(None, None)
+    """
+    if partial:
+        range_file = open_pdf_range(pdf_url, timeout=timeout)
+        if range_file is not None:
+            # 部分获取拿不到完整内容，只有服务器提供ETag时才用URL+ETag标识内容
+            content_hash = None
+            if range_file.etag:
+                content_hash = hash_bytes(f'{range_file.url}|{range_file.etag}|{range_file.size}'.encode('utf-8'))
+            return range_file, content_hash
+        if not fallback:
+            return None, None
+        logger.info('服务器不支持Range请求，回退到完整下载')
+    
+    # 流式获取PDF内容，同时计算内容哈希用于提取缓存
+    return fetch_pdf_to_spool(pdf_url, timeout=timeout, max_size_mb=max_size_mb)
+
+
+def _log_range_usage(pdf_file):
+    """记录Range请求实际下载的数据量"""
+    if isinstance(pdf_file, HTTPRangeFile):
+        logger.info(
+            f'部分获取完成，共 {pdf_file.request_count} 次请求，下载 {pdf_file.bytes_fetched/1024:.1f}KB'
+            f'（文件大小 {pdf_file.size/1024:.1f}KB）'
+        )
+
+
+# 添加新函数：从URL直接提取PDF内容
+def extract_text_from_pdf_url(pdf_url, max_pages=None, use_cache=True, timeout=None, max_size_mb=None, partial=False,
+                              backend=None, return_title=False, token_budget=None, return_tables=False):
+    """
+    从URL直接提取PDF文本内容，无需下载保存文件
+    
+    响应正文以流的方式写入临时缓冲区（较大的文件自动转存到磁盘），
+    并直接交给pdfplumber解析，不在内存中保留额外副本
+    
+    Args:
+        pdf_url: PDF文件的URL链接
+        max_pages: 最大处理页数，None表示处理所有页面
+        use_cache: 是否使用提取缓存
+        timeout: 请求超时时间（秒），None表示使用默认值
+        max_size_mb: 允许的最大文件大小（MB），None表示使用默认值
+        partial: 是否使用HTTP Range请求只获取前max_pages页所需的数据，
+                 服务器不支持时回退到完整下载
+        backend: 文本解析后端名称，None表示使用默认后端
+        return_title: 是否同时返回论文标题（复用同一次下载）
+        token_budget: 输入token预算（不含参考文献），None表示不限制
+        return_tables: 是否同时返回表格列表（复用同一次下载）
+    
+    Returns:
+        提取的文本内容字符串；return_title或return_tables为True时返回元组，
+        依次为文本、标题（return_title）和表格列表（return_tables）
+    """
+    try:
+        logger.info(f'开始从URL获取PDF内容: {pdf_url}')
+        
+        pdf_file, content_hash = _open_pdf_url(pdf_url, partial=partial, timeout=timeout, max_size_mb=max_size_mb)
+        
+        with pdf_file, PDFDocument(pdf_file, content_hash=content_hash, backend=backend) as document:
+            text = document.get_text(
+                max_pages=max_pages, use_cache=use_cache and content_hash is not None, token_budget=token_budget
+            )
+            results = [text]
+            if return_title:
+                results.append(document.get_title(use_cache=use_cache and content_hash is not None))
+            if return_tables:
+                results.append(document.get_tables(use_cache=use_cache and content_hash is not None))
+        _log_range_usage(pdf_file)
+        return tuple(results) if len(results) > 1 else text
+    
     except requests.exceptions.RequestException as e:
         logger.error(f'获取PDF URL内容失败: {str(e)}')
         raise
@@ -78,107 +1470,132 @@ def extract_text_from_pdf_url(pdf_url, max_pages=None):
         raise
 
 
-def extract_text_from_pdf(pdf_path, max_pages=None):
+def extract_title_from_pdf_url(pdf_url, use_cache=True, timeout=None, fallback=True, backend=None):
+    """
+    通过HTTP Range请求只获取第一页所需的数据，从远程PDF中提取论文标题
+    
+    Args:
+        pdf_url: PDF文件的URL链接
+        use_cache: 是否使用提取缓存
+        timeout: 请求超时时间（秒），None表示使用默认值
+        fallback: 服务器不支持Range请求时是否回退到完整下载
+        backend: 文本解析后端名称，None表示使用默认后端
+    
+    Returns:
+        提取的论文标题字符串，如果无法提取则返回None
+    """
+    try:
+        pdf_file, content_hash = _open_pdf_url(pdf_url, partial=True, fallback=fallback, timeout=timeout)
+        if pdf_file is None:
+            return None
+        
+        with pdf_file, PDFDocument(pdf_file, content_hash=content_hash, backend=backend) as document:
+            title = document.get_title(use_cache=use_cache and content_hash is not None)
+        _log_range_usage(pdf_file)
+        return title
+    
+    except Exception as e:
+        logger.error(f'从PDF URL提取标题时出错: {str(e)}')
+        return None
+
+
+def extract_text_from_pdf(pdf_path, max_pages=None, workers=None, use_cache=True, backend=None, token_budget=None):
     """
     从PDF文件中提取文本内容
     
     Args:
         pdf_path: PDF文件路径
         max_pages: 最大处理页数，None表示处理所有页面
-        
+        workers: 并行提取的进程数，None或1表示串行处理；
+                 页数少于PARALLEL_MIN_PAGES的小文档始终串行处理
+        use_cache: 是否使用提取缓存
+        backend: 文本解析后端名称，None表示使用默认后端
+        token_budget: 输入token预算（不含参考文献），None表示不限制
+    
     Returns:
         提取的文本内容字符串
     """
     try:
-        text = []
-        with pdfplumber.open(pdf_path) as pdf:
-            # 确定要处理的页面范围
-            pages_to_process = pdf.pages
-            if max_pages and max_pages < len(pages_to_process):
-                pages_to_process = pages_to_process[:max_pages]
-                logger.info(f'限制处理页数为: {max_pages}')
-            
-            # 提取每一页的文本
-            for i, page in enumerate(pages_to_process):
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
-                
-                # 记录进度
-                if (i + 1) % 10 == 0 or (i + 1) == len(pages_to_process):
-                    logger.info(f'已处理第 {i+1}/{len(pages_to_process)} 页')
-        
-        # 将所有页面的文本合并
-        full_text = '\n\n'.join(text)
-        logger.info(f'从PDF中提取文本完成，总字符数: {len(full_text)}')
-        
-        return full_text
-        
+        with PDFDocument(pdf_path, backend=backend) as document:
+            return document.get_text(
+                max_pages=max_pages, workers=workers, use_cache=use_cache, token_budget=token_budget
+            )
+    
     except Exception as e:
         logger.error(f'提取PDF文本时出错: {str(e)}')
         raise
 
 
-def extract_tables_from_pdf(pdf_path, pages=None):
+def extract_tables_from_pdf(pdf_path, pages=None, prefilter=True, use_cache=True):
     """
     从PDF文件中提取表格
     
     Args:
         pdf_path: PDF文件路径
         pages: 要提取表格的页面列表，None表示所有页面
-        
+        prefilter: 是否跳过没有边框线段和表格标题的页面
+        use_cache: 是否使用页面级提取缓存
+    
     Returns:
         提取的表格列表，每个表格是二维列表
     """
     try:
-        tables = []
-        with pdfplumber.open(pdf_path) as pdf:
-            # 确定要处理的页面
-            pages_to_process = pdf.pages
-            if pages:
-                pages_to_process = [pdf.pages[i] for i in pages if i < len(pdf.pages)]
-            
-            # 提取每一页的表格
-            for i, page in enumerate(pages_to_process):
-                page_tables = page.extract_tables()
-                if page_tables:
-                    tables.extend(page_tables)
-                    logger.info(f'从第 {i+1} 页提取到 {len(page_tables)} 个表格')
-        
-        logger.info(f'总共提取到 {len(tables)} 个表格')
-        return tables
-        
+        with PDFDocument(pdf_path) as document:
+            return document.get_tables(pages, prefilter=prefilter, use_cache=use_cache)
+    
     except Exception as e:
         logger.error(f'提取PDF表格时出错: {str(e)}')
         raise
 
 
-def get_pdf_metadata(pdf_path):
+def extract_sections_from_pdf(pdf_path, names=None, backend=None, use_cache=True):
+    """
+    从PDF文件中提取章节索引或指定章节的文本
+    
+    Args:
+        pdf_path: PDF文件路径
+        names: 章节类型名称或名称列表，None表示只返回章节索引
+        backend: 文本解析后端名称，None表示使用默认后端
+        use_cache: 是否使用提取缓存
+    
+    Returns:
+        names为None时返回章节索引列表，否则返回对应章节的文本
+    """
+    try:
+        with PDFDocument(pdf_path, backend=backend) as document:
+            sections = document.get_sections(use_cache=use_cache)
+            if names is None:
+                return sections
+            return get_section_text(document.get_text(use_cache=use_cache), sections, names)
+    
+    except Exception as e:
+        logger.error(f'提取PDF章节时出错: {str(e)}')
+        raise
+
+def get_pdf_metadata(pdf_path, backend=None):
     """
     获取PDF文件的元数据
     
     Args:
         pdf_path: PDF文件路径
-        
+        backend: 文本解析后端名称，None表示使用默认后端
+    
     Returns:
         包含元数据的字典
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            metadata = pdf.metadata or {}
-            # 添加一些基本信息
-            metadata['num_pages'] = len(pdf.pages)
-            metadata['file_size'] = os.path.getsize(pdf_path) / 1024 / 1024  # MB
-            
+        with PDFDocument(pdf_path, backend=backend) as document:
+            metadata = document.metadata
+        
         logger.info(f'获取PDF元数据完成: {metadata}')
         return metadata
-        
+    
     except Exception as e:
         logger.error(f'获取PDF元数据时出错: {str(e)}')
         return {}
 
 
-def extract_images_from_pdf(pdf_path, output_dir=None, fig_patterns=None):
+def extract_images_from_pdf(pdf_path, output_dir=None, fig_patterns=None, mode='embedded', workers=None):
     """
     从PDF文件中提取图片，特别是Fig和Figure字段的图片
     
@@ -186,140 +1603,38 @@ def extract_images_from_pdf(pdf_path, output_dir=None, fig_patterns=None):
         pdf_path: PDF文件路径
         output_dir: 图片保存目录
         fig_patterns: 用于识别图片的关键词模式列表
-        
+        mode: 提取方式，'embedded'直接导出嵌入的图片数据流（默认），'render'裁剪并渲染图片区域
+        workers: embedded模式下并行处理页面的进程数，None或1表示串行处理
+    
     Returns:
         提取的图片信息列表，包含图片路径和相关描述
     """
     try:
-        # 默认关键词模式
-        if fig_patterns is None:
-            fig_patterns = [r'Fig\.?\s+\d+', r'Figure\s+\d+', r'图\s*\d+']
-        
-        # 确保输出目录存在
-        if not output_dir:
-            # 默认保存在当前目录的images文件夹
-            output_dir = 'images'
-        
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir, exist_ok=True)
-            
-        extracted_images = []
-        
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                # 提取页面文本以查找图片描述
-                page_text = page.extract_text() or ''
-                
-                # 查找页面中的图片描述
-                fig_matches = []
-                for pattern in fig_patterns:
-                    matches = re.finditer(pattern, page_text)
-                    for match in matches:
-                        fig_matches.append(match.group())
-                
-                # 提取页面中的图片
-                images = page.images
-                for img_idx, img in enumerate(images):
-                    try:
-                        # 获取图片对象
-                        x0, y0, x1, y1 = img['x0'], img['y0'], img['x1'], img['y1']
-                        # 裁剪页面以获取图片区域
-                        img_cropped = page.crop((x0, y0, x1, y1))
-                        
-                        # 获取图片数据
-                        img_obj = img_cropped.to_image(resolution=300)
-                        
-                        # 保存图片
-                        img_filename = f"fig_page_{page_num+1}_img_{img_idx+1}.png"
-                        img_path = os.path.join(output_dir, img_filename)
-                        img_obj.save(img_path)
-                        
-                        # 获取相对路径，用于markdown引用
-                        relative_path = os.path.relpath(img_path)
-                        
-                        # 查找与图片相关的描述
-                        description = "图{}_{}".format(page_num+1, img_idx+1)
-                        if fig_matches:
-                            description = f"{fig_matches[0]}" if fig_matches else description
-                        
-                        extracted_images.append({
-                            'path': img_path,
-                            'relative_path': relative_path,
-                            'page': page_num + 1,
-                            'description': description
-                        })
-                    except Exception as e:
-                        logger.warning(f'提取第{page_num+1}页第{img_idx+1}张图片时出错: {str(e)}')
-        
-        logger.info(f'从PDF中提取完成，共提取到{len(extracted_images)}张图片')
-        return extracted_images
-        
+        with PDFDocument(pdf_path) as document:
+            return document.extract_images(output_dir, fig_patterns, mode=mode, workers=workers)
+    
     except Exception as e:
         logger.error(f'提取PDF图片时出错: {str(e)}')
         raise
 
 
-def extract_paper_title(pdf_path, max_lines=10):
+def extract_paper_title(pdf_path, max_lines=10, use_cache=True, backend=None):
     """
     从PDF文件中提取论文标题
     
     Args:
         pdf_path: PDF文件路径
         max_lines: 检查前几行来寻找标题
-        
+        use_cache: 是否使用提取缓存
+        backend: 文本解析后端名称，None表示使用默认后端
+    
     Returns:
         提取的论文标题字符串，如果无法提取则返回None
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if not pdf.pages:
-                logger.warning(f'PDF文件没有页面: {pdf_path}')
-                return None
-            
-            # 获取第一页文本
-            first_page = pdf.pages[0]
-            page_text = first_page.extract_text()
-            
-            if not page_text:
-                logger.warning(f'无法从PDF中提取文本: {pdf_path}')
-                return None
-            
-            # 分割文本为行
-            lines = page_text.strip().split('\n')
-            # 过滤空行
-            lines = [line.strip() for line in lines if line.strip()]
-            
-            # 检查前几行，尝试找到标题
-            # 标题通常是第一页中较长且格式特殊的行
-            title_candidates = []
-            for i, line in enumerate(lines[:max_lines]):
-                # 标题特征：长度适中，包含多个单词，不包含数字或年份
-                # 跳过明显是作者信息的行（通常包含and或多个逗号）
-                if ' and ' in line.lower() or line.count(',') > 2:
-                    continue
-                
-                # 跳过太短或太长的行
-                words = line.split()
-                if 2 <= len(words) <= 50:
-                    # 检查是否可能是标题（通常首字母大写）
-                    if sum(1 for word in words if word[0].isupper()) / len(words) > 0.5:
-                        title_candidates.append((i, line))
-            
-            # 如果找到候选标题，返回最前面的一个
-            if title_candidates:
-                # 按位置排序，选择最前面的候选标题
-                title_candidates.sort(key=lambda x: x[0])
-                title = title_candidates[0][1]
-                logger.info(f'成功提取论文标题: {title}')
-                return title
-            
-            # 如果没有找到明显的标题，返回第一行非空行
-            elif lines:
-                logger.info(f'未找到明确的标题，使用第一行: {lines[0]}')
-                return lines[0]
-            
-            return None
-            
+        with PDFDocument(pdf_path, backend=backend) as document:
+            return document.get_title(max_lines=max_lines, use_cache=use_cache)
+    
     except Exception as e:
         logger.error(f'提取PDF标题时出错: {str(e)}')
-        return None
\ No newline at end of file
+        return None
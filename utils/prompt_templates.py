@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词模板
+功能：
+1. 集中存放各类请求的固定指令，指令放在提示词开头，论文等可变内容放在末尾，
+   使同类请求共享字节完全相同的前缀，命中DeepSeek的上下文硬盘缓存
+2. 通过PROMPT_VERSION标记模板版本，修改任何模板文字时必须同时递增版本号
+"""
+
+# 模板版本，写入响应缓存键和用量台账，修改模板后旧的缓存响应不再使用，并可按版本对比缓存命中率
+PROMPT_VERSION = '2'
+
+# 系统消息
+SYSTEM_PROMPT = "你是一个专业的学术论文助手，擅长分析和总结学术论文。"
+
+# 论文分析指令，参考文献项只在本地未能解析参考文献时加入
+PAPER_ANALYSIS_INSTRUCTIONS = """请按照以下要求为论文生成详细分析报告，论文内容附在要求之后。
+
+分析要求：
+1. 论文摘要：简明扼要地总结论文的主要内容和贡献
+2. 研究背景：介绍论文研究的背景和动机
+3. 研究方法：详细描述论文采用的研究方法和技术路线，给出具体的实现步骤和公式
+4. 实验设计：描述实验的设置、样本选择、数据采集和处理方法
+5. 实验结果：详细分析论文的实验结果，特别是表格中的数据，解释数据含义和趋势，将对应的表格也加入到分析报告中
+6. 核心结论：总结论文的主要发现和结论
+7. 创新点：分析论文的创新之处
+8. 局限性：指出论文的局限性和可能的改进方向"""
+
+PAPER_ANALYSIS_REFERENCES_REQUIREMENT = """
+9. 参考文献格式：请将论文中提到的所有参考文献整理成表格形式，包含作者、标题、发表年份、发表的会议/期刊，来源链接等信息"""
+
+PAPER_ANALYSIS_OUTPUT = """
+
+请以Markdown格式输出分析报告，不要包含任何其他文字或解释。"""
+
+# 分块要点提取指令
+CHUNK_NOTES_INSTRUCTIONS = """请从论文的一部分内容中提取与以下方面相关的要点：
+研究背景与动机、研究方法（保留关键公式和实现步骤）、实验设置与数据、实验结果（保留具体数值）、结论、创新点、局限性。
+
+要求：只使用简洁的Markdown列表输出要点，这部分没有涉及的方面直接省略，不要编造内容，不要包含任何其他文字或解释。"""
+
+# 研究进展报告指令
+RESEARCH_PROGRESS_INSTRUCTIONS = """请根据最近发表的论文生成一份研究领域最新进展报告，论文列表附在要求之后。
+
+报告要求：
+1. 概述：总结该领域的最新研究动态和趋势
+2. 主要研究方向：分类整理主要的研究方向和每个方向的进展
+3. 关键技术进展：分析最新的技术突破和创新点
+4. 未来研究展望：预测该领域未来的研究方向和可能的发展趋势
+
+请以Markdown格式输出报告。"""
+
+# 定时研究报告指令
+SCHEDULED_REPORT_INSTRUCTIONS = """你是一名专业的研究助手。请基于论文信息，为指定领域创建指定时间范围内的研究进展报告，研究主题、时间范围和论文信息附在要求之后。
+
+请按照以下结构撰写报告：
+1. 总体趋势概述：总结该领域的最新研究动向和热点
+2. 重要发现：列出几项最具创新性或影响力的研究成果
+3. 技术进展：分析相关技术的最新发展
+4. 未来研究方向：基于现有研究，提出可能的未来研究方向
+
+请确保报告内容专业、客观，并基于提供的论文信息。"""
+
+# 搜索结果分析指令，按分析类型区分
+SEARCH_ANALYSIS_INSTRUCTIONS = {
+    'summary': """请分析学术论文搜索结果，生成一份综合总结，论文列表附在要求之后。
+
+总结要求：
+1. 概述：简要总结搜索结果的整体内容和主题分布
+2. 主要研究方向：归纳出主要的研究方向和每个方向的核心观点
+3. 热点话题：指出搜索结果中出现的热点话题和研究趋势
+4. 推荐阅读：基于引用量、相关性或创新性，推荐2-3篇值得深入阅读的论文
+
+请以Markdown格式输出总结报告。""",
+    'topics': """请分析学术论文搜索结果，进行主题分析，论文列表附在要求之后。
+
+分析要求：
+1. 识别主要研究主题：从搜索结果中识别出3-5个主要研究主题
+2. 主题描述：对每个主题进行简要描述，说明其核心内容
+3. 主题分布：分析每个主题在搜索结果中的分布情况
+4. 主题间关系：简要分析不同主题之间的关联和区别
+
+请以Markdown格式输出主题分析报告。""",
+    'trends': """请分析学术论文搜索结果，进行研究趋势分析，论文列表附在要求之后。
+
+分析要求：
+1. 时间分布：分析论文的发表时间分布，识别研究活跃度变化
+2. 研究重点演变：分析研究重点的变化和发展趋势
+3. 新兴方向：识别可能的新兴研究方向和增长点
+4. 未来展望：基于当前趋势，对未来研究方向进行简要展望
+
+请以Markdown格式输出趋势分析报告。""",
+}
+
+
+def build_prompt(instructions, *sections):
+    """
+    拼接提示词：固定指令在前，可变内容在后
+    
+    Args:
+        instructions: 固定指令，应为本模块中的常量
+        sections: 可变内容段落，空段落会被忽略
+    
+    Returns:
+        提示词
+    """
+    return '\n\n'.join([instructions] + [section.strip('\n') for section in sections if section])
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大模型请求限流工具
+功能：
+1. 令牌桶限制每分钟请求数和每分钟token数
+2. AIMD自适应并发：被限流时并发上限减半，请求成功时逐步恢复
+3. 带随机抖动的指数退避，遵循服务端返回的Retry-After
+4. 同步和异步调用方共用同一个限流器，等待配额和并发名额的时间计入调用的截止时间
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 指数退避的初始等待和最长等待（秒）
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+class TokenBucket:
+    """令牌桶，按每分钟配额匀速补充，允许预留超出当前余量的令牌并返回需要等待的时间"""
+    
+    def __init__(self, per_minute):
+        """
+        初始化令牌桶
+        
+        Args:
+            per_minute: 每分钟配额，0表示不限制
+        """
+        self.capacity = float(per_minute or 0)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount):
+        """
+        预留令牌
+        
+        Args:
+            amount: 需要的令牌数，超过桶容量时按容量计算
+        
+        Returns:
+            预留的令牌可用前需要等待的秒数
+        """
+        if not self.capacity:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+    
+    def refund(self, amount):
+        """
+        归还多预留的令牌
+        
+        Args:
+            amount: 归还的令牌数
+        """
+        if not self.capacity or amount <= 0:
+            return
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD并发限制：被限流时上限乘性减半，每次成功加性增加1/上限（约每轮请求加1）"""
+    
+    def __init__(self, max_limit, min_limit=1):
+        """
+        初始化并发限制
+        
+        Args:
+            max_limit: 并发上限的最大值
+            min_limit: 并发上限的最小值
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        # 等待名额的异步调用方(事件循环, future)，释放名额时跨线程唤醒，调用方可能属于不同的事件循环
+        self._async_waiters = deque()
+    
+    def try_acquire(self):
+        """
+        尝试占用一个并发名额
+        
+        Returns:
+            是否占用成功
+        """
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+    
+    def acquire(self, timeout=None):
+        """
+        阻塞等待并占用一个并发名额
+        
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+        
+        Returns:
+            是否在超时前占用成功
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                return False
+            self.in_flight += 1
+            return True
+    
+    async def acquire_async(self, timeout=None):
+        """
+        异步等待并占用一个并发名额，名额释放时立即被唤醒
+        
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+        
+        Returns:
+            是否在超时前占用成功
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+    
+    def _wake_async_waiters(self):
+        """唤醒所有等待名额的异步调用方，由它们重新竞争名额（需持有锁）"""
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_set_waiter_result, waiter)
+            except RuntimeError:
+                # 事件循环已关闭，对应的调用方已不存在
+                pass
+    
+    def release(self, throttled=False, success=True):
+        """
+        释放并发名额并调整上限
+        
+        Args:
+            throttled: 请求是否被限流
+            success: 请求是否成功，只有成功的请求会增加上限
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                previous = int(self.limit)
+                self.limit = max(self.min_limit, self.limit / 2)
+                if int(self.limit) < previous:
+                    logger.warning(f'请求被限流，并发上限降为 {int(self.limit)}')
+            elif success:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+
+def _set_waiter_result(waiter):
+    """在等待方的事件循环中唤醒等待名额的future"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """组合请求数、token数和并发限制，所有调用方共用一个实例"""
+    
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_concurrency=4):
+        """
+        初始化限流器
+        
+        Args:
+            requests_per_minute: 每分钟请求数上限，0表示不限制
+            tokens_per_minute: 每分钟token数上限（输入和输出之和），0表示不限制
+            max_concurrency: 最大并发请求数
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimiter(max_concurrency)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens, deadline=None):
+        """
+        预留请求和token配额
+        
+        Args:
+            tokens: 本次请求预估的token数
+            deadline: 调用的截止时间（time.monotonic），None表示不限制
+        
+        Returns:
+            需要等待的秒数（包括Retry-After暂停的剩余时间）
+        
+        Raises:
+            TimeoutError: 已经超过截止时间，或等待配额后会超过截止时间（此时归还预留的配额）
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError('调用已超过截止时间，不再等待限流配额')
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        wait = max(wait, self.paused_until - time.monotonic())
+        if deadline is not None and time.monotonic() + wait >= deadline:
+            self._unreserve(tokens)
+            raise TimeoutError(f'需要等待限流配额 {wait:.1f} 秒，超过调用的截止时间')
+        return wait
+    
+    def _unreserve(self, tokens):
+        """归还未使用的请求和token配额"""
+        self.requests.refund(1)
+        self.tokens.refund(min(tokens, self.tokens.capacity))
+    
+    def _remaining(self, deadline):
+        """距截止时间的剩余秒数，None表示不限制"""
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+    
+    def acquire(self, tokens, deadline=None):
+        """
+        等待配额和并发名额
+        
+        Args:
+            tokens: 本次请求预估的token数
+            deadline: 调用的截止时间（time.monotonic），等待时间计入其中，None表示不限制
+        
+        Raises:
+            TimeoutError: 截止时间前未能获得配额或并发名额
+        """
+        wait = self._reserve(tokens, deadline)
+        if wait > 0:
+            logger.info(f'达到速率限制，等待 {wait:.1f} 秒')
+            time.sleep(wait)
+        if not self.concurrency.acquire(timeout=self._remaining(deadline)):
+            self._unreserve(tokens)
+            raise TimeoutError('等待并发名额超过调用的截止时间')
+    
+    async def acquire_async(self, tokens, deadline=None):
+        """
+        异步等待配额和并发名额
+        
+        Args:
+            tokens: 本次请求预估的token数
+            deadline: 调用的截止时间（time.monotonic），等待时间计入其中，None表示不限制
+        
+        Raises:
+            TimeoutError: 截止时间前未能获得配额或并发名额
+        """
+        wait = self._reserve(tokens, deadline)
+        if wait > 0:
+            logger.info(f'达到速率限制，等待 {wait:.1f} 秒')
+            await asyncio.sleep(wait)
+        if not await self.concurrency.acquire_async(timeout=self._remaining(deadline)):
+            self._unreserve(tokens)
+            raise TimeoutError('等待并发名额超过调用的截止时间')
+    
+    def release(self, throttled=False, retry_after=None, unused_tokens=0, success=True):
+        """
+        请求结束后释放并发名额
+        
+        Args:
+            throttled: 请求是否被限流（429等）
+            retry_after: 服务端要求的等待秒数，提供时所有调用方暂停到该时间之后
+            unused_tokens: 预估多出的token数，归还给token桶
+            success: 请求是否成功
+        """
+        self.concurrency.release(throttled=throttled, success=success)
+        self.tokens.refund(unused_tokens)
+        if retry_after:
+            with self._lock:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+    
+    def backoff(self, attempt, retry_after=None):
+        """
+        计算重试前的等待时间：带完全随机抖动的指数退避，服务端给出Retry-After时至少等待该时间
+        
+        Args:
+            attempt: 已重试次数，从0开始
+            retry_after: 服务端要求的等待秒数
+        
+        Returns:
+            等待秒数
+        """
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
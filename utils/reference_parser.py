@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+参考文献解析工具
+功能：
+1. 在论文全文中定位参考文献部分
+2. 按编号（[1]、1.、[Author et al., 2020]）切分参考文献条目
+3. 启发式提取作者、标题、年份、会议/期刊和链接
+4. 生成Markdown参考文献表格
+"""
+
+import re
+import logging
+
+from utils.markdown_utils import format_table
+from utils.text_utils import dehyphenate
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 参考文献标题，取全文中最后一次出现的位置
+REFERENCES_HEADING_PATTERN = re.compile(
+    r'^[ \t]*((\d+|[IVX]+)\.?[ \t]*)?(references|bibliography|参考文献)[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# 参考文献之后的附录标题
+APPENDIX_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(appendix|appendices|supplementary material|附录)\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# 条目起始：[1]、[Bai et al., 2019]
+BRACKET_ENTRY_PATTERN = re.compile(r'^[ \t]*\[([^\[\]\n]{1,80})\][ \t]*', re.MULTILINE)
+
+# 条目起始：1. 或 1)
+NUMBERED_ENTRY_PATTERN = re.compile(r'^[ \t]*(\d{1,3})[.)][ \t]+', re.MULTILINE)
+
+URL_PATTERN = re.compile(r'https?://\S+')
+DOI_PATTERN = re.compile(r'\b(?:doi:\s*)?(10\.\d{4,9}/\S+)', re.IGNORECASE)
+ARXIV_PATTERN = re.compile(r'arXiv[:\s]*(\d{4}\.\d{4,5})(v\d+)?', re.IGNORECASE)
+TITLE_QUOTE_PATTERN = re.compile(r'[“"](.+?)[,.]?[”"]')
+YEAR_PATTERN = re.compile(r'\b((?:19|20)\d{2})[a-z]?\b')
+PAREN_YEAR_PATTERN = re.compile(r'\(((?:19|20)\d{2})[a-z]?\)')
+
+# 会议/期刊名称之后的卷期、页码、日期等信息
+VENUE_END_PATTERN = re.compile(
+    r',\s*(vol|no|pp|volume)\.?\s'
+    r'|\s+\d+,\s*no\.'
+    r'|\s*\((?:19|20)\d{2}[a-z]?\)'
+    r'|,\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s'
+    r'|,\s*(?:19|20)\d{2}\b'
+    r'|,\s*\d',
+    re.IGNORECASE
+)
+
+# 句号前是这些词时不视为句子结束（姓名缩写、常见缩写）
+NON_TERMINAL_WORD_PATTERN = re.compile(
+    r'([A-Z]\.?-)?[A-Z]|al|et al|Proc|Int|Conf|Trans|vol|no|pp|Vol|No|Jr|Dr|St|Eds?|eds?|vs',
+)
+
+# 作者字段的最大长度，超出时在作者之间截断并加“等”
+AUTHORS_MAX_CHARS = 120
+
+MISSING = '未提供'
+
+
+def split_references(text):
+    """
+    将论文全文拆分为正文和参考文献两部分
+    
+    Args:
+        text: 论文全文
+    
+    Returns:
+        (不含参考文献的文本, 参考文献文本)，找不到参考文献时第二项为空字符串
+    """
+    headings = list(REFERENCES_HEADING_PATTERN.finditer(text))
+    if not headings:
+        return text, ''
+    
+    heading = headings[-1]
+    appendix = APPENDIX_HEADING_PATTERN.search(text, heading.end())
+    end = appendix.start() if appendix else len(text)
+    
+    body = (text[:heading.start()].rstrip() + '\n\n' + text[end:].lstrip()).strip()
+    return body, text[heading.end():end].strip()
+
+
+def _entry_starts(references_text):
+    """
+    识别条目编号风格，返回各条目的(起始位置, 正文起始位置, 编号)
+    
+    Args:
+        references_text: 参考文献文本
+    
+    Returns:
+        条目位置列表
+    """
+    bracket_matches = list(BRACKET_ENTRY_PATTERN.finditer(references_text))
+    numbered_matches = list(NUMBERED_ENTRY_PATTERN.finditer(references_text))
+    
+    # 数字编号要求连续递增，避免把行首的年份、卷号当成编号
+    sequential = []
+    expected = None
+    for match in numbered_matches:
+        number = int(match.group(1))
+        if expected is None or number == expected:
+            sequential.append(match)
+            expected = number + 1
+    
+    if len(bracket_matches) >= len(sequential):
+        return [(m.start(), m.end(), f'[{m.group(1)}]') for m in bracket_matches]
+    return [(m.start(), m.end(), f'[{m.group(1)}]') for m in sequential]
+
+
+def _join_lines(entry_text):
+    """
+    合并条目中的多行文本，断开的单词和链接直接拼接
+    
+    Args:
+        entry_text: 条目原始文本
+    
+    Returns:
+        单行文本
+    """
+    entry_text = dehyphenate(entry_text.strip())
+    lines = [line.strip() for line in entry_text.split('\n') if line.strip()]
+    if not lines:
+        return ''
+    
+    joined = lines[0]
+    for line in lines[1:]:
+        last_token = joined.split()[-1]
+        # 链接在换行处断开时不插入空格
+        if re.match(r'(https?://|doi\.org|10\.\d{4})', last_token) and last_token[-1] in '/.-_':
+            joined += line
+        else:
+            joined += ' ' + line
+    return joined
+
+
+def _split_sentences(text):
+    """
+    按句号切分，忽略姓名缩写和常见缩写后的句号
+    
+    Args:
+        text: 条目文本
+    
+    Returns:
+        句子列表
+    """
+    sentences = []
+    start = 0
+    for match in re.finditer(r'\.\s+', text):
+        words = text[start:match.start()].split()
+        if not words or NON_TERMINAL_WORD_PATTERN.fullmatch(words[-1]):
+            continue
+        sentences.append(text[start:match.start()].strip())
+        start = match.end()
+    tail = text[start:].strip().rstrip('.')
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _extract_link(text):
+    """提取条目中的链接，优先使用URL，其次DOI和arXiv编号"""
+    url = URL_PATTERN.search(text)
+    if url:
+        return url.group().rstrip('.,;')
+    doi = DOI_PATTERN.search(text)
+    if doi:
+        return f'https://doi.org/{doi.group(1).rstrip(".,;")}'
+    arxiv = ARXIV_PATTERN.search(text)
+    if arxiv:
+        return f'https://arxiv.org/abs/{arxiv.group(1)}'
+    return None
+
+
+def _extract_venue(text):
+    """从标题之后的文本中提取会议/期刊名称"""
+    text = re.sub(r'^[\s,.]*(in\s+)?', '', text, flags=re.IGNORECASE)
+    end = VENUE_END_PATTERN.search(text, 1)
+    if end:
+        text = text[:end.start()]
+    text = text.strip(' ,.:;')
+    return text[:100] if text else None
+
+
+def _format_authors(authors, max_chars=AUTHORS_MAX_CHARS):
+    """
+    保留完整的作者列表，超出长度上限时在作者之间截断并加“等”
+    
+    Args:
+        authors: 条目中的作者文本
+        max_chars: 作者字段的最大长度
+    
+    Returns:
+        作者字符串，没有作者时返回None
+    """
+    authors = re.sub(r'\s+', ' ', authors).strip(' ,.')
+    if not authors:
+        return None
+    if authors.endswith('et al'):
+        authors += '.'
+    if len(authors) <= max_chars:
+        return authors
+    
+    names = [name.strip() for name in re.split(r',|\band\b|&', authors) if name.strip()]
+    kept = names[0][:max_chars]
+    for name in names[1:]:
+        if len(kept) + len(name) + 2 > max_chars:
+            break
+        kept += f', {name}'
+    return re.sub(r'\s*et al\.?$', '', kept) + '等'
+
+
+def parse_reference(entry_text, label=None):
+    """
+    解析单条参考文献
+    
+    Args:
+        entry_text: 条目文本（不含编号）
+        label: 条目编号
+    
+    Returns:
+        包含label、authors、title、year、venue、link、raw的字典，无法识别的字段为None
+    """
+    raw = _join_lines(entry_text)
+    link = _extract_link(raw)
+    # 去掉链接后再识别年份和其他字段，避免DOI中的数字被误认为年份
+    text = DOI_PATTERN.sub('', URL_PATTERN.sub('', raw)).strip(' ,.')
+    
+    year = PAREN_YEAR_PATTERN.search(text) or None
+    if year:
+        year = year.group(1)
+    else:
+        years = YEAR_PATTERN.findall(text)
+        year = years[-1] if years else None
+    
+    authors = title = venue = None
+    quoted = TITLE_QUOTE_PATTERN.search(text)
+    if quoted:
+        # IEEE风格：作者, “标题,” 期刊, 卷期, 年份.
+        authors = text[:quoted.start()]
+        title = quoted.group(1)
+        venue = _extract_venue(text[quoted.end():])
+    else:
+        # 作者-年份风格：作者. 标题. In 会议, 年份.
+        sentences = _split_sentences(text)
+        if len(sentences) >= 3:
+            authors, title = sentences[0], sentences[1]
+            venue = _extract_venue('. '.join(sentences[2:]))
+        elif len(sentences) == 2:
+            authors, title = sentences
+        elif sentences:
+            title = sentences[0]
+        if title:
+            title = PAREN_YEAR_PATTERN.sub('', title).strip(' ,.')
+    
+    return {
+        'label': label,
+        'authors': _format_authors(authors) if authors else None,
+        'title': title.strip(' ,.') if title else None,
+        'year': year,
+        'venue': venue,
+        'link': link,
+        'raw': raw,
+    }
+
+
+def parse_references(references_text):
+    """
+    切分并解析参考文献部分
+    
+    Args:
+        references_text: 参考文献文本（split_references的第二项）
+    
+    Returns:
+        参考文献字典列表，字段见parse_reference
+    """
+    if not references_text:
+        return []
+    
+    starts = _entry_starts(references_text)
+    if not starts:
+        logger.warning('未能识别参考文献条目编号')
+        return []
+    
+    references = []
+    for i, (_, body_start, label) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(references_text)
+        reference = parse_reference(references_text[body_start:end], label)
+        if reference['raw']:
+            references.append(reference)
+    
+    logger.info(f'解析到 {len(references)} 条参考文献')
+    return references
+
+
+def format_references_table(references):
+    """
+    将参考文献渲染为Markdown表格
+    
+    Args:
+        references: parse_references返回的参考文献列表
+    
+    Returns:
+        Markdown表格字符串，没有参考文献时返回空字符串
+    """
+    headers = ['编号', '作者', '标题', '年份', '会议/期刊', '来源链接']
+    rows = [
+        [
+            (value or MISSING).replace('|', '\\|')
+            for value in (
+                reference['label'], reference['authors'], reference['title'],
+                reference['year'], reference['venue'], reference['link']
+            )
+        ]
+        for reference in references
+    ]
+    return format_table(headers, rows)
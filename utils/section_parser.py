@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+论文章节切分工具
+功能：
+1. 根据标题编号、关键词和字体（粗体或大字号）识别章节标题
+2. 生成章节索引：章节类型、标题、在全文中的字符偏移和页码范围
+3. 按章节类型截取文本，下游模块无需重新扫描全文
+4. 在token预算内按章节优先级选取文本
+5. 按章节边界将长文本切分为不超过token上限的文本块
+"""
+
+import re
+import logging
+
+from utils.text_utils import PAGE_SEPARATOR, estimate_tokens
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 章节识别规则版本，修改规则后递增，使旧的章节索引缓存失效
+SECTION_INDEX_VERSION = 1
+
+# 章节类型及其标题关键词，按顺序匹配
+SECTION_KEYWORDS = [
+    ('abstract', re.compile(r'^abstract\b|摘\s*要', re.IGNORECASE)),
+    ('introduction', re.compile(r'introduction|引\s*言|绪\s*论', re.IGNORECASE)),
+    ('method', re.compile(r'problem (formulation|definition|statement)|问题定义', re.IGNORECASE)),
+    ('related_work', re.compile(r'related\s*works?|literature review|background|preliminar|相关工作', re.IGNORECASE)),
+    ('method', re.compile(
+        r'method|approach|methodology|framework|proposed|algorithm|system model|architecture|方法|模型',
+        re.IGNORECASE
+    )),
+    ('experiments', re.compile(r'experiment|evaluation|results|performance|case stud|实验', re.IGNORECASE)),
+    ('conclusion', re.compile(r'conclu|summary|future work|discussion|结\s*论|总\s*结', re.IGNORECASE)),
+    ('references', re.compile(r'^(references|bibliography)$|参考文献', re.IGNORECASE)),
+    ('appendix', re.compile(r'appendix|appendices|supplementary|附\s*录', re.IGNORECASE)),
+    ('acknowledgments', re.compile(r'acknowledg|致\s*谢', re.IGNORECASE)),
+]
+
+# 不带编号也可以单独成行作为标题的章节
+UNNUMBERED_SECTIONS = {'abstract', 'introduction', 'related_work', 'conclusion', 'references', 'appendix', 'acknowledgments'}
+
+# 一级标题编号：1、1.、1 |、III.、第1章
+NUMBERED_HEADING_PATTERN = re.compile(
+    r'^(?P<number>(?P<arabic>\d{1,2})\.?(\s*\|\s*|\s+)|(?P<roman>[IVX]{1,5})\.\s+|第[一二三四五六七八九十\d]+[章节]\s*)'
+    r'(?P<title>\S.{1,80})$'
+)
+
+# 行首的摘要标题，后面可能紧跟摘要正文：Abstract—Wireless traffic ...
+INLINE_ABSTRACT_PATTERN = re.compile(r'^(abstract|摘\s*要)(\s*[—–:：\-.]\s*|\s+)\S', re.IGNORECASE)
+
+ROMAN_VALUES = {'I': 1, 'V': 5, 'X': 10}
+
+# 相邻两个一级标题的编号最多相差几（中间的标题可能因双栏混排而未识别）
+MAX_NUMBER_GAP = 3
+
+# token预算不足时按层级保留章节，前面的层级优先；参考文献在本地解析，不占用预算
+SECTION_PRIORITY = [
+    ('abstract', 'front'),
+    ('method', 'experiments', 'conclusion'),
+    ('introduction', 'related_work', 'other'),
+    ('acknowledgments', 'appendix'),
+]
+
+# 粗体字体名称特征
+BOLD_FONT_PATTERN = re.compile(r'bold|black|heavy|semibold|demi|medi', re.IGNORECASE)
+
+
+def classify_heading(title):
+    """
+    根据标题文字判断章节类型
+    
+    Args:
+        title: 标题文字（不含编号）
+    
+    Returns:
+        章节类型名称，无法判断时返回'other'
+    """
+    title = title.strip().rstrip(':：.')
+    for name, pattern in SECTION_KEYWORDS:
+        if pattern.search(title):
+            return name
+    return 'other'
+
+
+def _is_heading_title(title):
+    """标题文字特征：词数少、以字母开头、不以句末标点结尾、不是图表标题"""
+    words = title.split()
+    if not words or len(words) > 10 or title[-1] in ',.;，。；':
+        return False
+    if re.match(r'(fig(ure)?|table|tab|eq|图|表)\b', title, re.IGNORECASE):
+        return False
+    letters = sum(1 for char in title if char.isalpha())
+    return letters / len(title) > 0.6 and (title[0].isupper() or not title[0].isascii())
+
+
+def _roman_to_int(numeral):
+    """罗马数字转换为整数"""
+    total = 0
+    for i, char in enumerate(numeral):
+        value = ROMAN_VALUES[char]
+        if i + 1 < len(numeral) and ROMAN_VALUES[numeral[i + 1]] > value:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+def match_heading(line):
+    """
+    判断一行文本是否为一级章节标题
+    
+    Args:
+        line: 去掉首尾空白的一行文本
+    
+    Returns:
+        (章节类型, 标题文字, 章节编号)，章节编号为(编号样式, 序号)，没有编号时为None；
+        不是标题时返回None
+    """
+    if not line or len(line) > 90:
+        return None
+    
+    if INLINE_ABSTRACT_PATTERN.match(line):
+        return 'abstract', 'Abstract', None
+    
+    match = NUMBERED_HEADING_PATTERN.match(line)
+    if match and _is_heading_title(match.group('title')):
+        number = None
+        if match.group('arabic'):
+            number = ('arabic', int(match.group('arabic')))
+        elif match.group('roman'):
+            number = ('roman', _roman_to_int(match.group('roman')))
+        return classify_heading(match.group('title')), line, number
+    
+    title = line.rstrip(':：')
+    name = classify_heading(title)
+    words = title.split()
+    # 没有编号的标题只有几个短词，排除与另一栏正文拼在一起的行
+    if name in UNNUMBERED_SECTIONS and len(words) <= 4 and max(map(len, words)) <= 20 and _is_heading_title(title):
+        return name, title, None
+    return None
+
+
+def find_font_headings(page):
+    """
+    从页面字体中找出粗体或大字号的短语，作为识别标题的字体线索
+    
+    Args:
+        page: pdfplumber页面对象
+    
+    Returns:
+        标题样式的短语列表
+    """
+    words = page.extract_words(extra_attrs=['fontname', 'size'])
+    if not words:
+        return []
+    
+    sizes = sorted(word['size'] for word in words)
+    body_size = sizes[len(sizes) // 2]
+    
+    phrases = []
+    current = []
+    for word in words:
+        styled = BOLD_FONT_PATTERN.search(word['fontname']) or word['size'] >= body_size + 1
+        # 同一行中连续的标题样式单词组成一个短语
+        if styled and current and abs(word['top'] - current[-1]['top']) < 2:
+            current.append(word)
+            continue
+        if current:
+            phrases.append(' '.join(item['text'] for item in current))
+        current = [word] if styled else []
+    if current:
+        phrases.append(' '.join(item['text'] for item in current))
+    
+    return [phrase for phrase in phrases if len(phrase.split()) <= 10]
+
+
+def _page_offsets(pages):
+    """
+    计算每页文本在合并后全文中的起始偏移，与PAGE_SEPARATOR合并方式一致
+    
+    Args:
+        pages: [(页码, 页面文本), ...]，只包含非空页面
+    
+    Returns:
+        [(页码, 起始偏移, 页面文本), ...]
+    """
+    offsets = []
+    position = 0
+    for page_number, page_text in pages:
+        offsets.append((page_number, position, page_text))
+        position += len(page_text) + len(PAGE_SEPARATOR)
+    return offsets
+
+
+def build_section_index(pages, font_headings=None):
+    """
+    生成章节索引
+    
+    Args:
+        pages: [(页码, 页面文本), ...]，页码从1开始，只包含非空页面
+        font_headings: {页码: 标题样式短语列表}，字体线索，可选
+    
+    Returns:
+        章节列表，每项包含name、title、start、end、page_start、page_end；
+        第一个标题之前的内容（论文标题、作者等）记为'front'
+    """
+    page_offsets = _page_offsets(pages)
+    total_length = page_offsets[-1][1] + len(page_offsets[-1][2]) if page_offsets else 0
+    
+    headings = []
+    for page_number, page_start, page_text in page_offsets:
+        # 单独成行的标题
+        position = 0
+        for line in page_text.split('\n'):
+            matched = match_heading(line.strip())
+            if matched:
+                headings.append((page_start + position, page_number) + matched)
+            position += len(line) + 1
+        
+        # 字体线索：双栏文本中标题可能与另一栏的正文拼在同一行，标题样式的短语不要求位于行首
+        for phrase in (font_headings or {}).get(page_number, []):
+            matched = match_heading(phrase)
+            if not matched:
+                continue
+            found = re.search(r'(?m)(^|(?<=\s))' + re.escape(phrase), page_text)
+            if found:
+                headings.append((page_start + found.start(), page_number) + matched)
+    
+    # 同一位置只保留一次；第一个已知章节之前的编号行多为作者单位，参考文献之后只接受附录；
+    # 编号样式保持一致且依次递增（允许跳过未识别的章节），排除算法伪代码行号和有序列表
+    headings.sort()
+    unique = []
+    last_number = None
+    for heading in headings:
+        name, number = heading[2], heading[4]
+        if unique and heading[0] - unique[-1][0] < 3:
+            continue
+        if not unique and name == 'other':
+            continue
+        if unique and name == 'abstract':
+            continue
+        if unique and unique[-1][2] in ('references', 'appendix') and name != 'appendix':
+            continue
+        if number is not None:
+            style, value = number
+            last_style, last_value = last_number or (style, 0)
+            if style != last_style or not last_value < value <= last_value + MAX_NUMBER_GAP:
+                continue
+            last_number = number
+        unique.append(heading)
+    
+    sections = []
+    if not unique or unique[0][0] > 0:
+        first_page = page_offsets[0][0] if page_offsets else None
+        sections.append({'name': 'front', 'title': '', 'start': 0, 'page_start': first_page})
+    for start, page_number, name, title, _ in unique:
+        sections.append({'name': name, 'title': title, 'start': start, 'page_start': page_number})
+    
+    for i, section in enumerate(sections):
+        section['end'] = sections[i + 1]['start'] if i + 1 < len(sections) else total_length
+        end_pages = [page for page, offset, _ in page_offsets if offset < section['end']]
+        section['page_end'] = end_pages[-1] if end_pages else section['page_start']
+    
+    _infer_method_sections(sections)
+    logger.info(f'识别到 {len(sections)} 个章节: {", ".join(section["name"] for section in sections)}')
+    return sections
+
+
+def _infer_method_sections(sections):
+    """
+    引言之后、实验之前无法归类的一级章节通常是方法部分（标题多为模型名称）
+    
+    Args:
+        sections: 章节列表，原地修改
+    """
+    names = [section['name'] for section in sections]
+    if 'introduction' not in names:
+        return
+    begin = names.index('introduction') + 1
+    end = next(
+        (i for i in range(begin, len(names)) if names[i] in ('experiments', 'conclusion', 'references', 'appendix')),
+        len(names)
+    )
+    for section in sections[begin:end]:
+        if section['name'] == 'other':
+            section['name'] = 'method'
+
+
+def get_section_text(text, sections, names):
+    """
+    按章节类型截取文本
+    
+    Args:
+        text: 生成索引时使用的全文
+        sections: build_section_index返回的章节索引
+        names: 章节类型名称或名称列表
+    
+    Returns:
+        按原文顺序拼接的章节文本，没有匹配的章节时返回空字符串
+    """
+    if isinstance(names, str):
+        names = [names]
+    parts = [text[section['start']:section['end']].strip() for section in sections if section['name'] in names]
+    return PAGE_SEPARATOR.join(part for part in parts if part)
+
+
+def _truncate_to_tokens(text, max_tokens):
+    """
+    截断文本使估算token数不超过上限，尽量在换行处截断
+    
+    Args:
+        text: 文本内容
+        max_tokens: token数上限
+    
+    Returns:
+        截断后的文本
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    
+    cut = int(len(text) * max_tokens / tokens)
+    while cut > 0 and estimate_tokens(text[:cut]) > max_tokens:
+        cut = int(cut * 0.95)
+    newline = text.rfind('\n', 0, cut)
+    if newline > cut * 0.8:
+        cut = newline
+    return text[:cut].rstrip()
+
+
+def _fill_budget(tokens, budget):
+    """
+    在同一层级的章节之间分配预算：短章节完整保留，长章节截断到相同的上限
+    
+    Args:
+        tokens: 各章节的估算token数列表
+        budget: 可分配的token数
+    
+    Returns:
+        各章节分配到的token数列表
+    """
+    if sum(tokens) <= budget:
+        return list(tokens)
+    
+    cap = 0
+    remaining = budget
+    pending = sorted(tokens)
+    while pending:
+        share = remaining // len(pending)
+        if pending[0] > share:
+            cap = share
+            break
+        remaining -= pending.pop(0)
+    return [min(count, cap) for count in tokens]
+
+
+def select_sections(text, sections, token_budget):
+    """
+    在token预算内按章节优先级选取文本，保持原文顺序
+    
+    Args:
+        text: 生成索引时使用的全文
+        sections: build_section_index返回的章节索引
+        token_budget: 输入token预算，参考文献不计入预算且始终保留
+    
+    Returns:
+        选取后的文本，全文未超出预算时原样返回
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    
+    section_texts = [text[section['start']:section['end']].strip() for section in sections]
+    kept = {i: section_text for i, section_text in enumerate(section_texts) if sections[i]['name'] == 'references'}
+    truncated = []
+    
+    remaining = token_budget
+    tiers = list(SECTION_PRIORITY) + [tuple(
+        {section['name'] for section in sections} - {name for tier in SECTION_PRIORITY for name in tier} - {'references'}
+    )]
+    for tier in tiers:
+        indices = [i for i, section in enumerate(sections) if section['name'] in tier]
+        if not indices or remaining <= 0:
+            continue
+        tokens = [estimate_tokens(section_texts[i]) for i in indices]
+        allowed = _fill_budget(tokens, remaining)
+        for i, count, limit in zip(indices, tokens, allowed):
+            if limit <= 0:
+                continue
+            if limit < count:
+                kept[i] = _truncate_to_tokens(section_texts[i], limit)
+                truncated.append(sections[i]['name'])
+            else:
+                kept[i] = section_texts[i]
+        remaining -= sum(allowed)
+    
+    dropped = [sections[i]['name'] for i in range(len(sections)) if i not in kept]
+    if truncated or dropped:
+        logger.info(
+            f'全文超出token预算 {token_budget}，截断章节: {", ".join(truncated) or "无"}，'
+            f'舍弃章节: {", ".join(dropped) or "无"}'
+        )
+    return PAGE_SEPARATOR.join(kept[i] for i in sorted(kept) if kept[i])
+
+
+def _split_oversized(text, max_tokens, separators=('\n\n', '\n')):
+    """
+    将超出token上限的单个章节依次按段落、按行切分，单行仍然超出时按字符截断
+    
+    Args:
+        text: 章节文本
+        max_tokens: 每块的token数上限
+        separators: 依次尝试的分隔符
+    
+    Returns:
+        文本块列表
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    if not separators:
+        pieces = []
+        while text:
+            piece = _truncate_to_tokens(text, max_tokens) or text[:max(1, len(text) // 2)]
+            pieces.append(piece)
+            text = text[len(piece):].lstrip()
+        return pieces
+    
+    separator = separators[0]
+    pieces = []
+    current = ''
+    for part in text.split(separator):
+        for sub_part in _split_oversized(part, max_tokens, separators[1:]):
+            candidate = current + separator + sub_part if current else sub_part
+            if current and estimate_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                current = sub_part
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text, max_tokens):
+    """
+    按章节边界将文本切分为不超过token上限的文本块，相邻的短章节合并到同一块
+    
+    Args:
+        text: 论文文本
+        max_tokens: 每块的token数上限
+    
+    Returns:
+        文本块列表，每项包含text和sections（块中各章节的标题或类型名称）
+    """
+    sections = build_section_index([(1, text)])
+    chunks = []
+    current = None
+    for section in sections:
+        section_text = text[section['start']:section['end']].strip()
+        if not section_text:
+            continue
+        label = section['title'] or section['name']
+        for piece in _split_oversized(section_text, max_tokens):
+            if current and estimate_tokens(current['text'] + PAGE_SEPARATOR + piece) <= max_tokens:
+                current['text'] += PAGE_SEPARATOR + piece
+                if current['sections'][-1] != label:
+                    current['sections'].append(label)
+            else:
+                current = {'text': piece, 'sections': [label]}
+                chunks.append(current)
+    
+    logger.info(f'全文按章节切分为 {len(chunks)} 块，每块不超过 {max_tokens} tokens')
+    return chunks
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+表格整理工具
+功能：
+1. 清理pdfplumber提取的表格：合并单元格内换行、拆分多行单元格、删除空行空列
+2. 过滤图片坐标轴、正文框等误识别的表格
+3. 将表格转换为紧凑的CSV文本块，供大模型直接读取数值
+4. 从正文中删除与表格内容重复的文本行
+"""
+
+import io
+import re
+import csv
+import logging
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 清理后的表格至少需要的行数和列数
+TABLE_MIN_ROWS = 2
+TABLE_MIN_COLUMNS = 2
+
+# 单元格平均字符数超过该值时视为正文框而不是表格
+TABLE_MAX_AVG_CELL_CHARS = 60
+
+# 单元格中的词有该比例以上能在正文中找到时才保留表格，排除把字符拆散的误识别
+TABLE_MIN_TEXT_MATCH = 0.5
+
+NUMBER_PATTERN = re.compile(r'^[-+±]?\d+(\.\d+)?%?$')
+
+
+def _clean_cell(cell):
+    """单元格去掉首尾空白，None视为空字符串"""
+    return re.sub(r'[ \t]+', ' ', cell or '').strip()
+
+
+def _split_multiline_row(row):
+    """
+    拆分多行单元格：一行中多行单元格的行数相同时（如 MAE\\nMAPE\\nRMSE），按行拆成多行，
+    单行的单元格（合并单元格，如数据集名称）放在第一行
+    
+    Args:
+        row: 清理后的单元格列表
+    
+    Returns:
+        行列表
+    """
+    line_counts = [cell.count('\n') + 1 for cell in row if cell]
+    multiline_counts = {count for count in line_counts if count > 1}
+    if len(multiline_counts) != 1 or len(line_counts) > 2 * line_counts.count(max(multiline_counts)):
+        return [[cell.replace('\n', ' ') for cell in row]]
+    
+    num_lines = multiline_counts.pop()
+    columns = [cell.split('\n') if '\n' in cell else [cell] + [''] * (num_lines - 1) for cell in row]
+    return [[column[i].strip() for column in columns] for i in range(num_lines)]
+
+
+def clean_table(table):
+    """
+    清理单个表格
+    
+    Args:
+        table: pdfplumber提取的二维列表，单元格可能为None或包含换行
+    
+    Returns:
+        清理后的二维列表，不像表格（行列太少、全为空、单元格是大段文字）时返回None
+    """
+    rows = []
+    for row in table:
+        rows.extend(_split_multiline_row([_clean_cell(cell) for cell in row]))
+    
+    # 删除空行和空列
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return None
+    width = max(len(row) for row in rows)
+    rows = [row + [''] * (width - len(row)) for row in rows]
+    keep = [j for j in range(width) if any(row[j] for row in rows)]
+    rows = [[row[j] for j in keep] for row in rows]
+    
+    if len(rows) < TABLE_MIN_ROWS or len(keep) < TABLE_MIN_COLUMNS:
+        return None
+    
+    cells = [cell for row in rows for cell in row if cell]
+    if sum(len(cell) for cell in cells) / len(cells) > TABLE_MAX_AVG_CELL_CHARS:
+        return None
+    return rows
+
+
+def table_to_csv(rows):
+    """
+    将表格转换为CSV文本
+    
+    Args:
+        rows: 清理后的二维列表
+    
+    Returns:
+        CSV字符串，不含末尾换行
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue().rstrip('\n')
+
+
+def _line_tokens(text):
+    """按空白切分，忽略只有标点的词"""
+    return [token for token in text.split() if re.search(r'\w', token)]
+
+
+def _table_tokens(rows):
+    """表格所有单元格中的词"""
+    return [token for row in rows for cell in row for token in _line_tokens(cell)]
+
+
+def format_tables_csv(tables, text=None):
+    """
+    清理表格并生成提交给大模型的CSV文本块
+    
+    Args:
+        tables: pdfplumber提取的表格列表
+        text: 论文文本，提供时只保留单元格内容能在正文中找到的表格
+    
+    Returns:
+        (CSV文本块字符串, 清理后的表格列表)，没有有效表格时文本块为空字符串
+    """
+    cleaned = [rows for rows in map(clean_table, tables or []) if rows]
+    if text is not None:
+        text_tokens = set(_line_tokens(text))
+        cleaned = [
+            rows for rows in cleaned
+            if sum(token in text_tokens for token in _table_tokens(rows)) >= TABLE_MIN_TEXT_MATCH * len(_table_tokens(rows))
+        ]
+    if tables:
+        logger.info(f'提取到 {len(tables)} 个表格，清理后保留 {len(cleaned)} 个')
+    
+    blocks = [f'表格{i}:\n```csv\n{table_to_csv(rows)}\n```' for i, rows in enumerate(cleaned, 1)]
+    return '\n\n'.join(blocks), cleaned
+
+
+def _table_run(line, tokens_set):
+    """
+    找出行首或行尾连续出现在表格中的词，双栏排版时表格行可能与另一栏的正文拼在同一行
+    
+    Args:
+        line: 一行文本
+        tokens_set: 表格单元格中的词集合
+    
+    Returns:
+        (起始位置, 结束位置)，没有包含数值的连续表格词时返回None
+    """
+    words = list(re.finditer(r'\S+', line))
+    in_table = [not re.search(r'\w', word.group()) or word.group() in tokens_set for word in words]
+    
+    best = None
+    for run in (words[:in_table.index(False)] if False in in_table else words,
+                words[len(words) - in_table[::-1].index(False):] if False in in_table else words):
+        tokens = [word.group() for word in run]
+        if len(tokens) >= 2 and any(NUMBER_PATTERN.match(token) for token in tokens):
+            if best is None or len(run) > len(best):
+                best = run
+    return (best[0].start(), best[-1].end()) if best else None
+
+
+def remove_table_text(text, tables):
+    """
+    删除正文中与表格内容重复的文本（pdfplumber把表格单元格按行拼接后的文本）
+    
+    只删除连续两行以上、位于行首或行尾且全部出现在同一个表格中的含数值文本，
+    表格漏掉的列（如本文方法的结果）和正文不会被删除
+    
+    Args:
+        text: 论文文本
+        tables: 清理后的表格列表
+    
+    Returns:
+        (处理后的文本, 删除了表格文本的行数)
+    """
+    table_tokens = [set(_table_tokens(rows)) for rows in tables]
+    if not any(table_tokens):
+        return text, 0
+    
+    lines = text.split('\n')
+    runs = []
+    for line in lines:
+        line_runs = [run for run in (_table_run(line, tokens_set) for tokens_set in table_tokens) if run]
+        runs.append(max(line_runs, key=lambda run: run[1] - run[0]) if line_runs else None)
+    
+    removed = 0
+    cleaned = []
+    for i, line in enumerate(lines):
+        run = runs[i]
+        isolated = not (i > 0 and runs[i - 1]) and not (i + 1 < len(lines) and runs[i + 1])
+        if run is None or isolated:
+            cleaned.append(line)
+            continue
+        removed += 1
+        rest = (line[:run[0]] + line[run[1]:]).strip()
+        if rest:
+            cleaned.append(rest)
+    return '\n'.join(cleaned), removed
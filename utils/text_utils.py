@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文本规范化工具
+功能：
+1. 识别并删除跨页重复的页眉、页脚和页码
+2. 删除arXiv侧边水印和无法映射的字形占位符
+3. 合并跨行断开的连字符单词，压缩多余空白
+4. 估算中英文混合文本的token数
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 页面之间的分隔符，与pdf_utils合并页面文本时使用的分隔符一致
+PAGE_SEPARATOR = '\n\n'
+
+# 每页检查开头和结尾的行数，用于识别页眉页脚
+HEADER_FOOTER_LINES = 3
+
+# 同一行（忽略数字和空白后）出现在该比例以上的页面时视为页眉或页脚
+HEADER_FOOTER_MIN_RATIO = 0.4
+
+# arXiv侧边水印，如 arXiv:2301.01234v2 [cs.LG] 5 Jan 2023；竖排水印常被逐字倒序提取
+ARXIV_WATERMARK_PATTERNS = [
+    re.compile(r'^\s*arXiv:\s*\d{4}\.\d{4,5}(v\d+)?\s*\[[^\]]+\]\s*\d{1,2}\s*[A-Za-z]{3}\s*\d{4}\s*$'),
+    re.compile(r'^\s*\d{4}\s*[A-Za-z]{3}\s*\d{1,2}\s*\][^\[]+\[\s*(\d+v)?\d{4,5}\.\d{4}\s*:\s*viXra\s*$'),
+]
+
+# 单独成行的页码，如 3、- 3 -、Page 3、3 of 15
+PAGE_NUMBER_PATTERN = re.compile(r'^\s*(page\s*)?[-\u2013]?\s*\d{1,4}\s*[-\u2013]?\s*((of|/)\s*\d{1,4})?\s*$', re.IGNORECASE)
+
+# pdfminer无法映射到Unicode的字形，如(cid:88)
+CID_PATTERN = re.compile(r'\(cid:\d+\)')
+
+# 行尾断开的连字符单词，左半部分可能本身含连字符（如 state-of-the-\nart），下一行以小写字母开头
+HYPHEN_BREAK_PATTERN = re.compile(r'\b([A-Za-z][A-Za-z\-\u2010]*)[-\u2010]\n([a-z][A-Za-z]*)')
+
+# 文本中未断行的连字符复合词，如 fine-tuning
+HYPHENATED_WORD_PATTERN = re.compile(r'\b[A-Za-z]+(?:[-\u2010][A-Za-z]+)+\b')
+
+CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+
+def estimate_tokens(text):
+    """
+    估算中英文混合文本的token数
+    
+    按DeepSeek官方给出的经验值：1个中文字符约0.6个token，1个英文字符约0.3个token
+    
+    Args:
+        text: 文本内容
+    
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    cjk_chars = len(CJK_PATTERN.findall(text))
+    return math.ceil(cjk_chars * 0.6 + (len(text) - cjk_chars) * 0.3)
+
+
+def _line_signature(line):
+    """页眉页脚比较用的行签名：忽略大小写、数字和空白，页码变化不影响匹配"""
+    return re.sub(r'\s+', '', re.sub(r'\d+', '#', line.lower()))
+
+
+def remove_headers_footers(pages):
+    """
+    删除跨页重复出现在页面开头或结尾的行
+    
+    Args:
+        pages: 每页文本列表
+    
+    Returns:
+        (处理后的每页文本列表, 删除的行数)
+    """
+    if len(pages) < 3:
+        return pages, 0
+    
+    page_lines = [page.split('\n') for page in pages]
+    
+    # 统计每个签名在多少个页面的首尾位置出现
+    signature_pages = Counter()
+    for lines in page_lines:
+        edge_lines = lines[:HEADER_FOOTER_LINES] + lines[-HEADER_FOOTER_LINES:]
+        signature_pages.update({_line_signature(line) for line in edge_lines if line.strip()})
+    min_pages = max(2, math.ceil(len(pages) * HEADER_FOOTER_MIN_RATIO))
+    repeated = {signature for signature, count in signature_pages.items() if count >= min_pages}
+    
+    removed = 0
+    cleaned_pages = []
+    for lines in page_lines:
+        edge = min(HEADER_FOOTER_LINES, len(lines))
+        keep = [True] * len(lines)
+        for i in list(range(edge)) + list(range(len(lines) - edge, len(lines))):
+            line = lines[i]
+            if _line_signature(line) in repeated or PAGE_NUMBER_PATTERN.match(line):
+                keep[i] = False
+        removed += keep.count(False)
+        cleaned_pages.append('\n'.join(line for line, kept in zip(lines, keep) if kept))
+    
+    return cleaned_pages, removed
+
+
+def remove_watermarks(text):
+    """
+    删除arXiv侧边水印行和无法映射的字形占位符
+    
+    Args:
+        text: 文本内容
+    
+    Returns:
+        处理后的文本
+    """
+    lines = [
+        line for line in text.split('\n')
+        if not any(pattern.match(line) for pattern in ARXIV_WATERMARK_PATTERNS)
+    ]
+    return CID_PATTERN.sub('', '\n'.join(lines))
+
+
+def dehyphenate(text):
+    """
+    合并因换行断开的连字符单词，如 differ-\\nences -> differences
+    
+    复合词保留连字符只删除换行：左半部分已含连字符（state-of-the-\\nart），
+    或带连字符的写法在文中其他位置出现过而合并后的写法没有出现过（fine-\\ntuning）
+    
+    Args:
+        text: 文本内容
+    
+    Returns:
+        处理后的文本
+    """
+    hyphenated_words = {word.lower().replace('\u2010', '-') for word in HYPHENATED_WORD_PATTERN.findall(text)}
+    plain_words = set(re.findall(r'\b[a-z]+\b', text.lower()))
+    
+    def join(match):
+        left, right = match.group(1), match.group(2)
+        merged, hyphenated = left + right, f'{left}-{right}'
+        if '-' in left or '\u2010' in left:
+            return hyphenated
+        if hyphenated.lower() in hyphenated_words and merged.lower() not in plain_words:
+            return hyphenated
+        return merged
+    
+    # 只在下一行以小写字母开头时处理，保留 Origin-\nDestination 这类复合词的连字符和换行
+    return HYPHEN_BREAK_PATTERN.sub(join, text)
+
+
+def collapse_whitespace(text):
+    """
+    压缩连续空格，去掉行首行尾空白，最多保留一个空行
+    
+    Args:
+        text: 文本内容
+    
+    Returns:
+        处理后的文本
+    """
+    text = re.sub(r'[ \t\u00a0]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def normalize_paper_text(text):
+    """
+    提交给大模型前的文本规范化流水线
+    
+    Args:
+        text: 从PDF提取的全文，各页之间以PAGE_SEPARATOR分隔
+    
+    Returns:
+        (规范化后的文本, 统计信息字典)，统计信息包含处理前后的token估算和删除的页眉页脚行数
+    """
+    tokens_before = estimate_tokens(text)
+    
+    pages = text.split(PAGE_SEPARATOR)
+    pages, header_footer_lines = remove_headers_footers(pages)
+    normalized = PAGE_SEPARATOR.join(pages)
+    normalized = remove_watermarks(normalized)
+    normalized = dehyphenate(normalized)
+    normalized = collapse_whitespace(normalized)
+    
+    tokens_after = estimate_tokens(normalized)
+    stats = {
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'header_footer_lines': header_footer_lines,
+    }
+    return normalized, stats
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大模型调用用量记录
+功能：
+1. 将每次调用的token用量、缓存命中token、耗时、模型、结束原因和调用方追加写入JSONL台账
+2. 通过上下文变量记录当前命令和论文，并发任务和线程中自动继承
+3. 按命令、日期、论文或调用方汇总用量和耗时分位数
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from utils.prompt_templates import PROMPT_VERSION
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 当前调用上下文（命令、论文等），asyncio任务和asyncio.to_thread会复制创建时的上下文
+_usage_context = contextvars.ContextVar('llm_usage_context', default={})
+
+# 汇总时支持的分组字段
+SUMMARY_GROUPS = ('command', 'day', 'paper', 'caller', 'prompt_version')
+
+
+def set_usage_context(**fields):
+    """
+    设置当前上下文的用量标签（如命令名），对之后的调用持续生效
+    
+    Args:
+        fields: 标签字段，如command='analyze'
+    """
+    _usage_context.set({**_usage_context.get(), **fields})
+
+
+@contextmanager
+def usage_scope(**fields):
+    """
+    在with块内为调用添加用量标签（如论文标题），退出时恢复
+    
+    Args:
+        fields: 标签字段，如paper='论文标题'
+    """
+    token = _usage_context.set({**_usage_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _usage_context.reset(token)
+
+
+def _usage_value(usage, *names):
+    """依次读取usage对象中的字段，兼容DeepSeek和OpenAI的字段名"""
+    for name in names:
+        value = usage
+        for part in name.split('.'):
+            value = getattr(value, part, None) if value is not None else None
+        if value is not None:
+            return value
+    return 0
+
+
+def _percentile(values, percent):
+    """最近秩法计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class UsageLedger:
+    """追加写入的JSONL用量台账，默认启用，设置环境变量LLM_USAGE_LEDGER=0禁用"""
+    
+    def __init__(self, path=None):
+        """
+        初始化台账
+        
+        Args:
+            path: 台账文件路径，默认从环境变量LLM_USAGE_LEDGER_PATH获取
+        """
+        self.path = os.path.abspath(path or os.getenv('LLM_USAGE_LEDGER_PATH', './.cache/llm_usage.jsonl'))
+        self.enabled = os.getenv('LLM_USAGE_LEDGER', '1') != '0'
+        self._lock = threading.Lock()
+    
+    def record(self, model, caller, latency, usage=None, finish_reason=None, first_token_latency=None,
+               retries=0, cache_hit=False, error=None, usage_estimated=False):
+        """
+        追加一条调用记录
+        
+        Args:
+            model: 模型名称
+            caller: 调用方名称
+            latency: 调用耗时（秒，含重试和等待限流的时间）
+            usage: API返回的usage对象（或字段相同的估算值），命中缓存或调用失败时为None
+            finish_reason: 结束原因（stop、length等）
+            first_token_latency: 流式请求收到第一段内容的耗时（秒）
+            retries: 重试次数
+            cache_hit: 是否命中本地响应缓存（未调用API）
+            error: 调用失败时的错误信息
+            usage_estimated: usage是否为本地估算值（流式请求未返回用量时）
+        """
+        if not self.enabled:
+            return
+        
+        now = datetime.now()
+        entry = {
+            'time': now.isoformat(timespec='seconds'),
+            'day': now.strftime('%Y-%m-%d'),
+            **_usage_context.get(),
+            'caller': caller,
+            'model': model,
+            'prompt_version': PROMPT_VERSION,
+            'prompt_tokens': _usage_value(usage, 'prompt_tokens'),
+            'completion_tokens': _usage_value(usage, 'completion_tokens'),
+            'cached_tokens': _usage_value(usage, 'prompt_cache_hit_tokens', 'prompt_tokens_details.cached_tokens'),
+            'latency': round(latency, 3),
+            'first_token_latency': round(first_token_latency, 3) if first_token_latency is not None else None,
+            'finish_reason': finish_reason,
+            'retries': retries,
+            'cache_hit': cache_hit,
+            'usage_estimated': usage_estimated,
+            'error': error,
+        }
+        try:
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except Exception as e:
+            logger.warning(f'写入LLM用量台账失败: {str(e)}')
+    
+    def read(self, days=None):
+        """
+        读取台账记录
+        
+        Args:
+            days: 只读取最近多少天的记录，None表示全部
+        
+        Returns:
+            记录字典列表
+        """
+        if not os.path.exists(self.path):
+            return []
+        since = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d') if days else None
+        entries = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 进程中途退出可能留下不完整的最后一行
+                    continue
+                if since is None or entry.get('day', '') >= since:
+                    entries.append(entry)
+        return entries
+    
+    def summarize(self, group_by, days=None):
+        """
+        按字段汇总调用次数、token用量和耗时分位数
+        
+        Args:
+            group_by: 分组字段，可选command、day、paper、caller、prompt_version
+            days: 只统计最近多少天的记录，None表示全部
+        
+        Returns:
+            汇总结果列表，按总token数降序排列
+        """
+        groups = {}
+        for entry in self.read(days):
+            groups.setdefault(entry.get(group_by) or '-', []).append(entry)
+        
+        summary = []
+        for key, entries in groups.items():
+            api_entries = [entry for entry in entries if not entry.get('cache_hit')]
+            latencies = [entry['latency'] for entry in api_entries if not entry.get('error')]
+            prompt_tokens = sum(entry.get('prompt_tokens', 0) for entry in entries)
+            completion_tokens = sum(entry.get('completion_tokens', 0) for entry in entries)
+            summary.append({
+                'key': key,
+                'calls': len(api_entries),
+                'cache_hits': len(entries) - len(api_entries),
+                'errors': sum(1 for entry in entries if entry.get('error')),
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cached_tokens': sum(entry.get('cached_tokens', 0) for entry in entries),
+                'total_tokens': prompt_tokens + completion_tokens,
+                'latency_p50': _percentile(latencies, 50),
+                'latency_p90': _percentile(latencies, 90),
+                'latency_p99': _percentile(latencies, 99),
+            })
+        summary.sort(key=lambda item: item['total_tokens'], reverse=True)
+        return summary
+
+
+# 创建全局实例，方便其他模块直接导入使用
+usage_ledger = UsageLedger()
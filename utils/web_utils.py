@@ -7,10 +7,15 @@
 1. 发送HTTP请求获取网页内容
 2. 解析HTML内容
 3. 设置和管理WebDriver
+4. 流式获取PDF到临时缓冲区
+5. 基于HTTP Range请求按需读取远程PDF
 """
 
+import io
 import os
 import logging
+import hashlib
+import tempfile
 import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -29,6 +34,10 @@ DEFAULT_HEADERS = {
     'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
 }
 
+# PDF文件头标识，规范允许其出现在文件前1024字节内
+PDF_MAGIC = b'%PDF-'
+PDF_MAGIC_WINDOW = 1024
+
 
 def fetch_url_content(url, use_selenium=False, timeout=30, proxies=None):
     """
@@ -198,4 +207,228 @@ def download_file(url, save_path, timeout=60, proxies=None):
         raise
     except Exception as e:
         logger.error(f'下载文件时出错: {str(e)}')
-        raise
\ No newline at end of file
+        raise
+
+
+def fetch_pdf_to_spool(url, timeout=None, max_size_mb=None, spool_threshold_mb=None, proxies=None):
+    """
+    流式获取PDF到临时缓冲区，小文件保存在内存中，超过阈值后自动转存到磁盘
+    
+    在读取正文之前检查Content-Length，并在收到前1024字节时校验PDF文件头，
+    不是PDF或超过大小上限时立即中止下载
+    
+    Args:
+        url: PDF文件URL
+        timeout: 连接和读取超时时间（秒），默认从环境变量REQUEST_TIMEOUT获取
+        max_size_mb: 允许的最大文件大小（MB），默认从环境变量PDF_MAX_SIZE_MB获取
+        spool_threshold_mb: 内存缓冲阈值（MB），默认从环境变量PDF_SPOOL_THRESHOLD_MB获取
+        proxies: 代理设置
+        
+    Returns:
+        (已定位到开头的临时文件对象, 内容的SHA-256)元组，调用方负责关闭文件对象
+    """
+    timeout = timeout or int(os.getenv('REQUEST_TIMEOUT', '60'))
+    max_size = int(float(max_size_mb or os.getenv('PDF_MAX_SIZE_MB', '200')) * 1024 * 1024)
+    spool_threshold = int(float(spool_threshold_mb or os.getenv('PDF_SPOOL_THRESHOLD_MB', '16')) * 1024 * 1024)
+    
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    response = session.get(url, timeout=timeout, proxies=proxies, stream=True)
+    spool = None
+    try:
+        response.raise_for_status()
+        
+        # 服务器声明的大小已超过上限时不再读取正文
+        content_length = int(response.headers.get('content-length') or 0)
+        if content_length > max_size:
+            raise ValueError(f'PDF文件过大: {content_length/1024/1024:.2f}MB，上限为 {max_size/1024/1024:.2f}MB')
+        
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+        digest = hashlib.sha256()
+        head = b''
+        size = 0
+        
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if not chunk:
+                continue
+            
+            # 尽早校验文件头，避免把HTML错误页当作PDF完整下载
+            if head is not None:
+                head += chunk[:PDF_MAGIC_WINDOW]
+                if len(head) >= PDF_MAGIC_WINDOW:
+                    if PDF_MAGIC not in head[:PDF_MAGIC_WINDOW]:
+                        raise ValueError(f'URL返回的内容不是PDF文件: {url}')
+                    head = None
+            
+            size += len(chunk)
+            if size > max_size:
+                raise ValueError(f'PDF文件超过大小上限 {max_size/1024/1024:.2f}MB: {url}')
+            
+            digest.update(chunk)
+            spool.write(chunk)
+        
+        if head is not None and PDF_MAGIC not in head:
+            raise ValueError(f'URL返回的内容不是PDF文件: {url}')
+        
+        spool.seek(0)
+        logger.info(f'成功获取PDF内容，大小: {size/1024/1024:.2f}MB')
+        return spool, digest.hexdigest()
+        
+    except Exception:
+        if spool is not None:
+            spool.close()
+        raise
+    finally:
+        response.close()
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    基于HTTP Range请求的只读文件对象
+    
+    按固定大小的块按需获取远程文件内容，已获取的块缓存在内存中。
+    PDF解析器只读取trailer、xref和实际访问到的对象，因此只需下载文件的一小部分。
+    """
+    
+    def __init__(self, url, size, session=None, timeout=None, block_size=None, proxies=None):
+        """
+        初始化远程文件
+        
+        Args:
+            url: 文件URL（应为重定向后的最终地址）
+            size: 文件总大小（字节）
+            session: requests会话，None表示新建
+            timeout: 请求超时时间（秒）
+            block_size: 每次请求的块大小（字节），默认从环境变量PDF_RANGE_BLOCK_KB获取
+            proxies: 代理设置
+        """
+        super().__init__()
+        self.url = url
+        self.size = size
+        self.timeout = timeout or int(os.getenv('REQUEST_TIMEOUT', '60'))
+        self.block_size = block_size or int(os.getenv('PDF_RANGE_BLOCK_KB', '128')) * 1024
+        self.proxies = proxies
+        self.etag = None
+        self.bytes_fetched = 0
+        self.request_count = 0
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+        self._session = session
+        self._blocks = {}
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f'不支持的whence参数: {whence}')
+        self._pos = max(0, position)
+        return self._pos
+    
+    def _fetch_blocks(self, first, last):
+        """获取缺失的块，连续的缺失块合并为一次Range请求"""
+        missing = [i for i in range(first, last + 1) if i not in self._blocks]
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        
+        for run_first, run_last in runs:
+            start = run_first * self.block_size
+            end = min((run_last + 1) * self.block_size, self.size) - 1
+            response = self._session.get(
+                self.url,
+                headers={'Range': f'bytes={start}-{end}'},
+                timeout=self.timeout,
+                proxies=self.proxies
+            )
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise IOError(f'服务器未按Range请求返回部分内容，状态码: {response.status_code}')
+            
+            data = response.content
+            self.bytes_fetched += len(data)
+            self.request_count += 1
+            for index in range(run_first, run_last + 1):
+                offset = (index - run_first) * self.block_size
+                self._blocks[index] = data[offset:offset + self.block_size]
+    
+    def readinto(self, buffer):
+        if self._pos >= self.size:
+            return 0
+        
+        length = min(len(buffer), self.size - self._pos)
+        first = self._pos // self.block_size
+        last = (self._pos + length - 1) // self.block_size
+        self._fetch_blocks(first, last)
+        
+        data = b''.join(self._blocks[i] for i in range(first, last + 1))
+        offset = self._pos - first * self.block_size
+        chunk = data[offset:offset + length]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+def open_pdf_range(url, timeout=None, block_size=None, proxies=None):
+    """
+    以Range请求的方式打开远程PDF
+    
+    Args:
+        url: PDF文件URL
+        timeout: 请求超时时间（秒），默认从环境变量REQUEST_TIMEOUT获取
+        block_size: 每次请求的块大小（字节）
+        proxies: 代理设置
+        
+    Returns:
+        HTTPRangeFile实例；服务器不支持Range请求时返回None
+    """
+    timeout = timeout or int(os.getenv('REQUEST_TIMEOUT', '60'))
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    
+    try:
+        response = session.head(url, timeout=timeout, proxies=proxies, allow_redirects=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f'HEAD请求失败，无法使用Range请求: {str(e)}')
+        return None
+    
+    accept_ranges = response.headers.get('accept-ranges', '').lower()
+    size = int(response.headers.get('content-length') or 0)
+    if 'bytes' not in accept_ranges or not size:
+        logger.info(f'服务器未声明支持Range请求: {url}')
+        return None
+    
+    range_file = HTTPRangeFile(response.url, size, session=session, timeout=timeout,
+                               block_size=block_size, proxies=proxies)
+    range_file.etag = response.headers.get('etag')
+    
+    # 校验PDF文件头
+    try:
+        head = range_file.read(PDF_MAGIC_WINDOW)
+    except (IOError, requests.exceptions.RequestException) as e:
+        logger.warning(f'Range请求失败: {str(e)}')
+        return None
+    if PDF_MAGIC not in head:
+        raise ValueError(f'URL返回的内容不是PDF文件: {url}')
+    range_file.seek(0)
+    
+    logger.info(f'使用Range请求读取远程PDF，文件大小: {size/1024/1024:.2f}MB')
+    return range_file